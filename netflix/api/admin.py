@@ -8,6 +8,7 @@ from .models import (
     WatchHistory, WatchProgress, Rating, Review, UserContentInteraction,
     Device, DeviceLogin, Download
 )
+from .stream_slots import end_sessions
 
 
 # Enhanced User Admin
@@ -82,10 +83,38 @@ class StripeEventAdmin(admin.ModelAdmin):
     date_hierarchy = 'processed_at'
 
 
+# Content Admin (includes soft-deleted rows)
+@admin.register(Content)
+class ContentAdmin(admin.ModelAdmin):
+    list_display = ['title', 'content_type', 'release_date', 'maturity_level', 'is_deleted']
+    list_filter = ['content_type', 'is_deleted', 'maturity_level']
+    search_fields = ['title', 'imdb_id']
+
+    def get_queryset(self, request):
+        # The default manager hides soft-deleted content; admins need to see (and restore) it.
+        return Content.all_objects.select_related('maturity_level')
+
+
+# Streaming sessions, with remote sign-out
+@admin.register(DeviceLogin)
+class DeviceLoginAdmin(admin.ModelAdmin):
+    list_display = ['profile', 'device', 'ip_address', 'login_at', 'logout_at']
+    list_filter = [('logout_at', admin.EmptyFieldListFilter), 'login_at']
+    search_fields = ['user__email', 'device__device_name', 'ip_address']
+    list_select_related = ['profile', 'device']
+    readonly_fields = ['login_at']
+    
+    actions = ['end_selected_sessions']
+    
+    @admin.action(description='End selected sessions (sign out devices)')
+    def end_selected_sessions(self, request, queryset):
+        count = end_sessions(queryset)
+        self.message_user(request, f'{count} session(s) ended.')
+
+
 # Register remaining models with basic admin
 admin.site.register(Profile)
 admin.site.register(MaturityLevel)
-admin.site.register(Content)
 admin.site.register(Movie)
 admin.site.register(TVShow)
 admin.site.register(Season)
@@ -100,5 +129,4 @@ admin.site.register(Rating)
 admin.site.register(Review)
 admin.site.register(UserContentInteraction)
 admin.site.register(Device)
-admin.site.register(DeviceLogin)
 admin.site.register(Download)
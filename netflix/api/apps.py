@@ -5,4 +5,13 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
         import api.signals  # noqa: F401
+        from api.db_routing import check_pin_cache
+        from api.sqlite_tuning import tune_connection
+
+        checks.register(check_pin_cache, checks.Tags.caches, deploy=True)
+
+        connection_created.connect(tune_connection, dispatch_uid='api.sqlite_tuning')
@@ -0,0 +1,268 @@
+"""
+In-memory typeahead over content titles and cast names.
+
+Each process keeps two sorted-array prefix indexes (titles, cast) of
+normalized keys. Every word start of a title or name is a key, so "knig"
+finds "The Dark Knight". Entries are stored in rank order, so the best
+completions for a prefix are the smallest entry positions in its key range;
+for short prefixes those are precomputed.
+
+Every entry carries the minimum age of its maturity level (for cast, the
+lowest of their titles), so results can be restricted to what a profile may
+watch without touching the database.
+
+The index is built on first use (or loaded from the JSON snapshot at
+AUTOCOMPLETE_SNAPSHOT_PATH) and rebuilt in a background thread when the catalog version changes; the new
+index is swapped in atomically while the old one keeps serving.
+"""
+import bisect
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Min
+
+from .catalog_cache import catalog_version
+from .models import Content, ContentCast
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+# Prefixes up to this length get a precomputed best-first candidate list.
+HOT_PREFIX_LENGTH = 3
+HOT_CANDIDATES = 100
+NO_AGE_LIMIT = 255
+
+
+# ==================== PREFIX INDEX ====================
+class PrefixIndex:
+    """
+    Sorted keys -> entry positions. `entries` must be in rank order (best
+    first); each is (id, label, minimum_age, extra) and `keys` is an iterable of
+    (normalized key, entry position).
+    """
+
+    def __init__(self, entries, keys):
+        pairs = sorted(set(keys))
+        self.entries = entries
+        self.keys = [key for key, _ in pairs]
+        self.positions = array('I', (position for _, position in pairs))
+        self.min_ages = array('B', (min(entry[2], NO_AGE_LIMIT) for entry in entries))
+        self.hot = self._hot_prefixes()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def dump(self):
+        """JSON-serializable form; `restore` rebuilds the index from it."""
+        return {
+            'entries': [[str(entry_id), *rest] for entry_id, *rest in self.entries],
+            'keys': [[key, position] for key, position in zip(self.keys, self.positions)],
+        }
+
+    @classmethod
+    def restore(cls, data):
+        return cls([(uuid.UUID(entry_id), *rest) for entry_id, *rest in data['entries']],
+                   ((key, position) for key, position in data['keys']))
+
+    def _hot_prefixes(self):
+        candidates = defaultdict(set)
+        for key, position in zip(self.keys, self.positions):
+            for length in range(1, min(HOT_PREFIX_LENGTH, len(key)) + 1):
+                candidates[key[:length]].add(position)
+        return {
+            prefix: array('I', heapq.nsmallest(HOT_CANDIDATES, positions))
+            for prefix, positions in candidates.items()
+        }
+
+    def _range(self, prefix):
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\U0010ffff', lo=start)
+        return start, end
+
+    def complete(self, prefix, limit=10, max_age=None):
+        """Best `limit` entries with a key starting with `prefix`, within `max_age`."""
+        max_age = NO_AGE_LIMIT if max_age is None else max_age
+        if len(prefix) <= HOT_PREFIX_LENGTH:
+            found = self._filter(self.hot.get(prefix, ()), limit, max_age)
+            # The hot list is truncated; only a restrictive age filter can exhaust it.
+            if len(found) == limit or len(self.hot.get(prefix, ())) < HOT_CANDIDATES:
+                return [self.entries[position] for position in found]
+        start, end = self._range(prefix)
+        candidates = sorted(set(self.positions[start:end]))
+        return [self.entries[position] for position in self._filter(candidates, limit, max_age)]
+
+    def _filter(self, positions, limit, max_age):
+        found = []
+        for position in positions:
+            if self.min_ages[position] <= max_age:
+                found.append(position)
+                if len(found) == limit:
+                    break
+        return found
+
+
+def _word_keys(text):
+    """Every suffix of `text` starting at a word boundary, normalized."""
+    words = tokenize(text)
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class Autocomplete:
+    def __init__(self, titles, cast, version):
+        self.titles = titles
+        self.cast = cast
+        self.version = version
+
+    @classmethod
+    def build(cls, version=None):
+        version = catalog_version() if version is None else version
+
+        # Newest titles first.
+        contents = list(
+            Content.objects
+            .filter(episode_details__isnull=True)
+            .order_by('-release_date', 'title')
+            .values_list('id', 'title', 'content_type', 'maturity_level__minimum_age')
+        )
+        title_entries, title_keys = [], []
+        for position, (content_id, title, content_type, minimum_age) in enumerate(contents):
+            title_entries.append((content_id, title, minimum_age, content_type))
+            title_keys.extend((key, position) for key in _word_keys(title))
+
+        # Most credited cast first; visible to a profile once any of their titles is.
+        cast_rows = (
+            ContentCast.objects
+            .filter(content__is_deleted=False)
+            .values_list('cast_member_id', 'cast_member__name')
+            .annotate(minimum_age=Min('content__maturity_level__minimum_age'), credits=Count('id'))
+            .order_by('-credits', 'cast_member__name')
+        )
+        cast_entries, cast_keys = [], []
+        for position, (cast_member_id, name, minimum_age, _) in enumerate(cast_rows):
+            cast_entries.append((cast_member_id, name, minimum_age, None))
+            cast_keys.extend((key, position) for key in _word_keys(name))
+
+        return cls(PrefixIndex(title_entries, title_keys), PrefixIndex(cast_entries, cast_keys), version)
+
+    def complete(self, text, limit=10, max_age=None):
+        prefix = ' '.join(tokenize(text))
+        if not prefix:
+            return {'titles': [], 'cast': []}
+        return {
+            'titles': [
+                {'id': content_id, 'title': title, 'content_type': content_type}
+                for content_id, title, _, content_type in self.titles.complete(prefix, limit, max_age)
+            ],
+            'cast': [
+                {'id': cast_id, 'name': name}
+                for cast_id, name, _, _ in self.cast.complete(prefix, limit, max_age)
+            ],
+        }
+
+    # ---- snapshots ----
+    # Plain JSON (entries and key pairs) so loading a snapshot never runs code.
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': SNAPSHOT_FORMAT,
+                'version': self.version,
+                'titles': self.titles.dump(),
+                'cast': self.cast.dump(),
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The snapshot at `path`, or None if it is missing, unreadable or from another format."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot['format'] != SNAPSHOT_FORMAT:
+                return None
+            return cls(PrefixIndex.restore(snapshot['titles']), PrefixIndex.restore(snapshot['cast']),
+                       snapshot['version'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+# ==================== PROCESS-WIDE INSTANCE ====================
+class AutocompleteHolder:
+    """
+    Owns the live Autocomplete. Checks the catalog version at most every
+    AUTOCOMPLETE_VERSION_CHECK seconds and rebuilds in the background on change.
+    """
+
+    def __init__(self):
+        self.current = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    def get(self):
+        if self.current is None:
+            with self.lock:
+                if self.current is None:
+                    self.current = self._load_or_build()
+                    self.checked_at = time.monotonic()
+            return self.current
+
+        now = time.monotonic()
+        if now - self.checked_at >= settings.AUTOCOMPLETE_VERSION_CHECK:
+            self.checked_at = now
+            version = catalog_version()
+            if version != self.current.version:
+                self._rebuild_in_background(version)
+        return self.current
+
+    def _load_or_build(self):
+        path = settings.AUTOCOMPLETE_SNAPSHOT_PATH
+        version = catalog_version()
+        if path:
+            snapshot = Autocomplete.load(path)
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+        index = Autocomplete.build(version)
+        self._save(index)
+        return index
+
+    def _rebuild_in_background(self, version):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=self._rebuild, args=(version,), name='autocomplete-rebuild', daemon=True).start()
+
+    def _rebuild(self, version):
+        try:
+            index = Autocomplete.build(version)
+            self.current = index
+            self._save(index)
+        except Exception:
+            logger.exception('Autocomplete rebuild failed; serving the previous index.')
+        finally:
+            self.rebuilding = False
+            connections.close_all()
+
+    def _save(self, index):
+        path = settings.AUTOCOMPLETE_SNAPSHOT_PATH
+        if not path:
+            return
+        try:
+            index.save(path)
+        except OSError:
+            logger.warning('Could not write autocomplete snapshot to %s', path, exc_info=True)
+
+
+autocomplete = AutocompleteHolder()
@@ -0,0 +1,15 @@
+"""
+Benchmark suites.
+
+Each suite module exposes `run(options)` returning a list of result dicts
+(see harness.measure). Run them with `manage.py run_benchmarks --suite <name>`.
+"""
+SUITES = {
+    'endpoints': 'api.benchmarks.endpoints',
+    'renderers': 'api.benchmarks.renderers',
+    'maturity': 'api.benchmarks.maturity',
+    'soft_delete': 'api.benchmarks.soft_delete',
+    'recommendations': 'api.benchmarks.recommendations',
+    'ids': 'api.benchmarks.ids',
+    'sqlite_writes': 'api.benchmarks.sqlite_writes',
+}
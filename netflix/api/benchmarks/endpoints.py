@@ -0,0 +1,145 @@
+"""
+Key API endpoints exercised through the test client against seeded data.
+
+Run `manage.py seed_benchmark_data` first.
+"""
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+
+from django.core.management.base import CommandError
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from api.models import Content, DeviceLogin, Genre, Profile, UserSubscription
+from .harness import measure
+from .seed import BENCH_EMAIL_DOMAIN, BENCH_IMDB_PREFIX
+
+WEBHOOK_SECRET = 'whsec_benchmark'
+
+
+def _stripe_signature(payload, secret=WEBHOOK_SECRET):
+    timestamp = int(time.time())
+    signed = f'{timestamp}.{payload}'.encode()
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def _sample_ids(queryset, count, rng):
+    ids = list(queryset.values_list('id', flat=True)[:count * 20])
+    if not ids:
+        raise CommandError('No seeded data found. Run `manage.py seed_benchmark_data` first.')
+    return [rng.choice(ids) for _ in range(count)]
+
+
+def run(options):
+    # Test-client host, locmem e-mail backend and DEBUG=False, as in the test runner.
+    setup_test_environment()
+    try:
+        return _run(options)
+    finally:
+        teardown_test_environment()
+
+
+def _run(options):
+    iterations = options['iterations']
+    rng = random.Random(options.get('seed', 7))
+
+    seeded = Content.objects.filter(imdb_id__startswith=BENCH_IMDB_PREFIX)
+    movie_ids = _sample_ids(seeded.filter(content_type=Content.ContentType.MOVIE), 200, rng)
+    show_ids = _sample_ids(seeded.filter(content_type=Content.ContentType.TV_SHOW, tv_show_details__isnull=False), 200, rng)
+
+    profile = (
+        Profile.objects.filter(user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}', user__devices__isnull=False)
+        .select_related('user').first()
+    )
+    if profile is None:
+        raise CommandError('No seeded users found. Run `manage.py seed_benchmark_data` first.')
+    user = profile.user
+    device = user.devices.first()
+    subscription = UserSubscription.objects.filter(user=user).exclude(stripe_subscription_id=None).first()
+    genre = Genre.objects.order_by('display_order').first()
+
+    client = APIClient()
+    client.force_authenticate(user)
+    results = []
+
+    def scenario(name, func, setup=None, n=iterations):
+        results.append(measure(name, func, iterations=n, setup=setup))
+
+    def get(url, **extra):
+        response = client.get(url, **extra)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    # Full catalog pages are very large until pagination lands; keep them short.
+    scenario('movies-list', lambda _: get('/api/movies/', QUERY_STRING=f'genre={genre.name}'),
+             n=max(1, iterations // 10))
+    scenario('movies-detail', lambda _: get(f'/api/movies/{rng.choice(movie_ids)}/'))
+    scenario('tv-shows-detail', lambda _: get(f'/api/tv-shows/{rng.choice(show_ids)}/'))
+
+    # Same endpoints negotiated as MessagePack, with average payload sizes.
+    for name, url, ids in [('movies-detail', '/api/movies/', movie_ids), ('tv-shows-detail', '/api/tv-shows/', show_ids)]:
+        for format_name, accept in [('json', 'application/json'), ('msgpack', 'application/msgpack')]:
+            sizes = []
+            scenario(f'{name}-{format_name}', lambda _: sizes.append(
+                len(get(f'{url}{rng.choice(ids)}/', HTTP_ACCEPT=accept).content)
+            ))
+            results[-1]['bytes'] = round(sum(sizes) / len(sizes))
+
+    def upsert_progress(_):
+        response = client.post(
+            '/api/watch-progress/',
+            {'content_id': str(rng.choice(movie_ids)), 'resume_time_seconds': rng.randint(0, 5000)},
+            format='json', HTTP_X_PROFILE_ID=str(profile.id),
+        )
+        assert response.status_code == 200, response.status_code
+
+    scenario('watch-progress-upsert', upsert_progress)
+
+    def end_sessions():
+        DeviceLogin.objects.filter(user=user, logout_at__isnull=True).delete()
+
+    def select_profile(_):
+        response = client.post(
+            '/api/profile/select/', {'profile_id': str(profile.id)},
+            format='json', HTTP_X_DEVICE_ID=str(device.id),
+        )
+        assert response.status_code == 200, response.status_code
+
+    scenario('profile-select', select_profile, setup=end_sessions)
+    end_sessions()
+
+    if subscription:
+        webhook_client = APIClient()
+
+        def webhook_payload():
+            event = {
+                'id': f'evt_bench_{uuid.uuid4().hex}',
+                'object': 'event',
+                'type': 'customer.subscription.updated',
+                'data': {'object': {
+                    'id': subscription.stripe_subscription_id,
+                    'object': 'subscription',
+                    'status': 'active',
+                    'cancel_at_period_end': False,
+                    'current_period_start': int(subscription.current_period_start.timestamp()),
+                    'current_period_end': int(subscription.current_period_end.timestamp()),
+                }},
+            }
+            return json.dumps(event)
+
+        def post_webhook(payload):
+            response = webhook_client.post(
+                '/api/payment/stripe/webhook/', data=payload, content_type='application/json',
+                HTTP_STRIPE_SIGNATURE=_stripe_signature(payload),
+            )
+            assert response.status_code == 200, response.status_code
+
+        with override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET):
+            scenario('stripe-webhook', post_webhook, setup=webhook_payload)
+
+    return results
@@ -0,0 +1,115 @@
+"""
+Timing, query counting and allocation tracking shared by benchmark suites.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from django.db import connection, connections
+from django.utils import timezone
+
+from api.instrumentation import RequestMetrics
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(name, func, iterations=50, warmup=3, setup=None, alloc_iterations=5):
+    """
+    Run `func(arg)` repeatedly and summarize latency, queries and allocations.
+
+    `setup`, if given, runs before every call outside the timed region and
+    its return value is passed as `arg` (None otherwise). Allocations are
+    sampled in a separate pass because tracemalloc slows everything down.
+    """
+    def prepare():
+        return setup() if setup else None
+
+    for _ in range(warmup):
+        func(prepare())
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        arg = prepare()
+        metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics))
+            start = time.perf_counter()
+            func(arg)
+            timings.append(time.perf_counter() - start)
+        queries.append(metrics.query_count)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            arg = prepare()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            func(arg)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'alloc_peak_kib': round(statistics.fmean(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'db_vendor': connection.vendor,
+        'platform': platform.platform(),
+    }
+
+
+def write_results(path, suite, results):
+    document = {
+        'suite': suite,
+        'recorded_at': timezone.now().isoformat(),
+        'environment': environment(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(previous, current, metrics=('p50_ms', 'p95_ms', 'queries_per_request', 'alloc_peak_kib')):
+    """Yield (name, metric, before, after, change_pct) for results present in both runs."""
+    before = {r['name']: r for r in previous.get('results', [])}
+    for result in current:
+        old = before.get(result['name'])
+        if not old:
+            continue
+        for metric in metrics:
+            a, b = old.get(metric), result.get(metric)
+            if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+                continue
+            change = ((b - a) / a * 100) if a else 0.0
+            yield result['name'], metric, a, b, round(change, 1)
@@ -0,0 +1,97 @@
+"""
+Primary key layouts for high-volume tables: insert throughput and index size.
+
+Fills three scratch tables shaped like watch_history (key, profile id,
+timestamp, seconds) with 10M x `--scale` rows each, keyed by random UUIDv4,
+time-ordered UUIDv7 (TIME_ORDERED_IDS) and a bigint sequence, in batches of
+BATCH_SIZE rows per transaction. Reports rows per second and the on-disk
+size of the primary key index and the table. The tables are dropped
+afterwards; no seeded data is needed.
+"""
+import time
+import uuid
+
+from django.db import connection, models, transaction
+
+from api.ids import uuid7
+from .harness import measure
+from .soft_delete import index_size
+
+FULL_ROWS = 10_000_000
+BATCH_SIZE = 10_000
+PROFILES = 1000
+
+KEYS = {
+    'uuid4': (models.UUIDField(), uuid.uuid4),
+    'uuid7': (models.UUIDField(), uuid7),
+    'bigint': (models.BigIntegerField(), None),
+}
+
+
+def _table(key):
+    return f'bench_ids_{key}'
+
+
+def _pk_index(key):
+    if connection.vendor == 'sqlite':
+        return f'sqlite_autoindex_{_table(key)}_1'
+    return f'{_table(key)}_pkey'
+
+
+def _create(key, field):
+    uuid_type = models.UUIDField().db_type(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {_table(key)}')
+        cursor.execute(
+            f'CREATE TABLE {_table(key)} (id {field.db_type(connection)} PRIMARY KEY, '
+            f'profile_id {uuid_type} NOT NULL, created_at bigint NOT NULL, seconds integer NOT NULL)'
+        )
+
+
+def _drop(key):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {_table(key)}')
+
+
+def _kib(size):
+    return round(size / 1024, 1) if size is not None else None
+
+
+def run(options):
+    rows = max(BATCH_SIZE, int(FULL_ROWS * options['scale']) // BATCH_SIZE * BATCH_SIZE)
+    uuid_field = models.UUIDField()
+    profiles = [uuid_field.get_db_prep_value(uuid.uuid4(), connection) for _ in range(PROFILES)]
+
+    results = []
+    for key, (field, generate) in KEYS.items():
+        sequence = iter(range(1, rows + 1))
+
+        def batch():
+            now = time.time_ns() // 1000
+            ids = (
+                [next(sequence) for _ in range(BATCH_SIZE)] if generate is None
+                else [field.get_db_prep_value(generate(), connection) for _ in range(BATCH_SIZE)]
+            )
+            return [(pk, profiles[i % PROFILES], now + i, i % 3600) for i, pk in enumerate(ids)]
+
+        def insert(values):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {_table(key)} (id, profile_id, created_at, seconds) VALUES (%s, %s, %s, %s)', values,
+                )
+
+        _create(key, field)
+        try:
+            result = measure(f'insert-{key}', insert, iterations=rows // BATCH_SIZE, warmup=0, setup=batch, alloc_iterations=0)
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {_table(key)}')
+            result.update(
+                rows=rows,
+                rows_per_s=round(BATCH_SIZE / (result['mean_ms'] / 1000)),
+                pk_index_kib=_kib(index_size(_pk_index(key))),
+                table_kib=_kib(index_size(_table(key))),
+            )
+            results.append(result)
+        finally:
+            _drop(key)
+    return results
@@ -0,0 +1,85 @@
+"""
+Profile-filtered catalog listing vs the unfiltered list.
+
+Requests carry a unique throwaway query parameter so every iteration misses
+the rendered-response cache and measures the query path. The ORM scenarios
+time the listing query alone (first page by release date) with and without
+the maturity filter, plus the query plan of the filtered one. The ORM query
+is the one MovieViewSet pages through: live movies, newest release first.
+
+Run `manage.py seed_benchmark_data` first.
+"""
+import itertools
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from api.maturity import bracket_for_age, maturity_brackets
+from api.models import Content, Genre, Profile
+from api.pagination import CatalogPagination
+from .harness import measure
+from .seed import BENCH_EMAIL_DOMAIN
+
+PAGE_SIZE = CatalogPagination.page_size
+
+
+def run(options):
+    setup_test_environment()
+    try:
+        return _run(options)
+    finally:
+        teardown_test_environment()
+
+
+def _profile(is_kid):
+    profile = (
+        Profile.objects.filter(user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}', is_kid_profile=is_kid)
+        .select_related('user').first()
+    )
+    if profile is None:
+        raise CommandError('No seeded profiles found. Run `manage.py seed_benchmark_data` first.')
+    return profile
+
+
+def _run(options):
+    iterations = options['iterations']
+    kid, adult = _profile(True), _profile(False)
+    genre = Genre.objects.order_by('display_order').first()
+    counter = itertools.count()
+    results = []
+
+    def list_movies(profile=None):
+        client = APIClient()
+        client.force_authenticate(profile.user if profile else adult.user)
+        headers = {'HTTP_X_PROFILE_ID': str(profile.id)} if profile else {}
+
+        def call(_):
+            response = client.get('/api/movies/', {'genre': genre.name, 'nocache': next(counter)}, **headers)
+            assert response.status_code == 200, response.status_code
+        return call
+
+    n = max(1, iterations // 10)
+    results.append(measure('movies-list-unfiltered', list_movies(), iterations=n))
+    results.append(measure('movies-list-adult-profile', list_movies(adult), iterations=n))
+    results.append(measure('movies-list-kid-profile', list_movies(kid), iterations=n))
+
+    brackets = maturity_brackets()
+    kid_levels = brackets['eligible'][bracket_for_age(kid.age)]
+    listing = Content.objects.filter(content_type=Content.ContentType.MOVIE).order_by('-release_date', 'id')
+
+    def first_page(queryset):
+        return lambda _: list(queryset.values_list('id', 'title', 'release_date')[:PAGE_SIZE])
+
+    results.append(measure('orm-first-page-unfiltered', first_page(listing), iterations=iterations))
+    filtered = listing.filter(maturity_level_id__in=kid_levels)
+    results.append(measure('orm-first-page-kid-levels', first_page(filtered), iterations=iterations))
+
+    with connection.cursor() as cursor:
+        sql, params = filtered.values_list('id')[:PAGE_SIZE].query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        cursor.execute(prefix + sql, params)
+        results[-1]['plan'] = ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    return results
@@ -0,0 +1,59 @@
+"""
+Item-item recommender: offline build time and online query latency.
+
+The build runs once over every seeded interaction and rating; the query
+scenarios time `recommend()` alone and the full /api/recommendations/
+request for profiles that have watch history.
+
+Run `manage.py seed_benchmark_data` first.
+"""
+import itertools
+
+from django.core.management.base import CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from api.models import ContentNeighbors, Profile
+from api.recommendations import build_neighbors, recommend
+from .harness import measure
+from .seed import BENCH_EMAIL_DOMAIN
+
+PROFILES = 50
+
+
+def run(options):
+    setup_test_environment()
+    try:
+        return _run(options)
+    finally:
+        teardown_test_environment()
+
+
+def _run(options):
+    iterations = options['iterations']
+    profiles = list(
+        Profile.objects.filter(user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}', content_interactions__isnull=False)
+        .select_related('user').distinct()[:PROFILES]
+    )
+    if not profiles:
+        raise CommandError('No seeded profiles with history found. Run `manage.py seed_benchmark_data` first.')
+
+    results = [measure('build-neighbors', lambda _: build_neighbors(log=lambda message: None),
+                       iterations=1, warmup=0, alloc_iterations=0)]
+    results[-1]['titles'] = ContentNeighbors.objects.count()
+
+    cycle = itertools.cycle(profiles)
+    results.append(measure('recommend', lambda profile: recommend(profile.id, 20), iterations=iterations, setup=lambda: next(cycle)))
+
+    clients = {}
+
+    def request(profile):
+        client = clients.get(profile.id)
+        if client is None:
+            client = clients[profile.id] = APIClient()
+            client.force_authenticate(profile.user)
+        response = client.get('/api/recommendations/', HTTP_X_PROFILE_ID=str(profile.id))
+        assert response.status_code == 200, response.status_code
+
+    results.append(measure('recommendations-endpoint', request, iterations=iterations, setup=lambda: next(cycle)))
+    return results
@@ -0,0 +1,166 @@
+"""
+Renderer/parser comparison (stdlib JSON, orjson, MessagePack) across
+representative API payloads.
+
+Payloads are synthetic but shaped like the real responses: a movie list
+(MovieSerializer), a TV show detail with seasons and episodes
+(TVShowSerializer), subscription plans with Decimal prices and an active
+streams document with raw UUIDs and datetimes. No database is needed.
+"""
+import io
+import logging
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import MessagePackParser, ORJSONParser
+from api.renderers import MessagePackRenderer, ORJSONRenderer, orjson
+from .harness import measure
+from .seed import WORDS
+
+logger = logging.getLogger(__name__)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _content(rng):
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'title': _text(rng, 3).title(),
+        'description': _text(rng, 30),
+        'content_type': 'movie',
+        'release_date': '2010-07-16',
+        'duration_minutes': rng.randint(20, 180),
+        'poster_image_url': 'https://img.example.com/poster/1.jpg',
+        'backdrop_image_url': None,
+        'trailer_url': None,
+        'maturity_level': {'code': 'PG-13', 'name': 'Parents Strongly Cautioned', 'minimum_age': 13},
+        'genres': rng.sample(['Action', 'Comedy', 'Drama', 'Sci-Fi', 'Thriller'], 2),
+        'cast': [
+            {
+                'name': _text(rng, 2).title(),
+                'profile_image_url': None,
+                'character_name': _text(rng, 1).title(),
+                'role_type': 'actor',
+                'billing_order': order,
+            }
+            for order in range(4)
+        ],
+    }
+
+
+def movie_list(rng, count=500):
+    return [dict(_content(rng), director=_text(rng, 2).title()) for _ in range(count)]
+
+
+def tv_show_detail(rng, seasons=8, episodes=12):
+    show = _content(rng)
+    show.update({
+        'content_type': 'tv_show',
+        'total_seasons': seasons,
+        'total_episodes': seasons * episodes,
+        'status': 'ongoing',
+        'seasons': [
+            {
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'season_number': s,
+                'title': f'Season {s}',
+                'description': _text(rng, 20),
+                'release_date': '2015-01-01',
+                'episodes': [
+                    {
+                        'episode_number': e,
+                        'title': _text(rng, 3).title(),
+                        'description': _text(rng, 25),
+                        'duration_minutes': rng.randint(20, 60),
+                    }
+                    for e in range(1, episodes + 1)
+                ],
+            }
+            for s in range(1, seasons + 1)
+        ],
+    })
+    return show
+
+
+def subscription_plans():
+    return [
+        {
+            'id': uuid.uuid4(), 'name': name, 'price_monthly': Decimal(price),
+            'price_yearly': Decimal(price) * 10, 'max_concurrent_streams': streams,
+            'supports_uhd': streams > 2, 'allows_downloads': True,
+        }
+        for name, price, streams in [('Mobile', '149.00', 1), ('Basic', '199.00', 1),
+                                     ('Standard', '499.00', 2), ('Premium', '649.00', 4)]
+    ]
+
+
+def active_streams(rng, count=4):
+    now = timezone.now()
+    return {
+        'max_streams': count,
+        'active_count': count,
+        'sessions': [
+            {
+                'session_id': uuid.UUID(int=rng.getrandbits(128), version=4),
+                'device_name': 'Chrome on Windows',
+                'profile_name': _text(rng, 1).title(),
+                'login_at': now - timedelta(minutes=rng.randint(1, 300)),
+                'ip_address': '203.0.113.7',
+            }
+            for _ in range(count)
+        ],
+    }
+
+
+def payloads(rng):
+    return {
+        'movie-list-500': movie_list(rng),
+        'tv-show-detail': tv_show_detail(rng),
+        'subscription-plans': subscription_plans(),
+        'active-streams': active_streams(rng),
+    }
+
+
+def run(options):
+    iterations = options['iterations']
+    rng = random.Random(options.get('seed', 7))
+    results = []
+
+    # name -> (renderer, parser)
+    formats = {
+        'json': (JSONRenderer(), JSONParser()),
+        'orjson': (ORJSONRenderer(), ORJSONParser()),
+        'msgpack': (MessagePackRenderer(), MessagePackParser()),
+    }
+    if orjson is None:
+        logger.warning('orjson is not installed; ORJSONRenderer falls back to the stdlib encoder.')
+
+    for payload_name, data in payloads(rng).items():
+        for format_name, (renderer, parser) in formats.items():
+            media_type = renderer.media_type
+            result = measure(
+                f'render-{payload_name}-{format_name}',
+                lambda _: renderer.render(data, media_type),
+                iterations=iterations,
+            )
+            rendered = renderer.render(data, media_type)
+            result['bytes'] = len(rendered)
+            if format_name == 'orjson':
+                result['encoder'] = 'orjson' if orjson else 'stdlib'
+            results.append(result)
+
+            results.append(measure(
+                f'parse-{payload_name}-{format_name}',
+                lambda _: parser.parse(io.BytesIO(rendered), media_type, {'encoding': 'utf-8'}),
+                iterations=iterations,
+            ))
+
+    return results
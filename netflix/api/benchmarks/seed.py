@@ -0,0 +1,323 @@
+"""
+Deterministic large-catalog data generator for the benchmark suite.
+
+At scale=1.0 it seeds 100k movies, 5k TV shows with seasons and episodes,
+100k users with profiles, subscriptions and devices, and 1M WatchHistory
+rows. Every row is created with bulk_create, so signals do not fire; the
+per-profile UserContentInteraction totals they would maintain are
+aggregated from the seeded history instead.
+Seeded rows are tagged (bench e-mails, `bm` imdb ids) so they can be
+flushed without touching real data.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from api.models import (
+    User, Profile, SubscriptionPlan, UserSubscription, MaturityLevel, Content, Movie,
+    TVShow, Season, Episode, Genre, ContentGenre, CastMember, ContentCast,
+    WatchHistory, WatchProgress, Rating, UserContentInteraction, Device
+)
+
+BASE_COUNTS = {
+    'movies': 100_000,
+    'shows': 5_000,
+    'cast_members': 20_000,
+    'users': 100_000,
+    'watch_history': 1_000_000,
+}
+
+BENCH_EMAIL_DOMAIN = 'bench.example.com'
+BENCH_IMDB_PREFIX = 'bm'
+BENCH_PLAN_NAME = 'Benchmark Premium'
+BATCH_SIZE = 2000
+
+MATURITY_LEVELS = [
+    ('G', 'General Audiences', 0),
+    ('TV-Y7', 'Children 7+', 7),
+    ('PG', 'Parental Guidance', 10),
+    ('PG-13', 'Parents Strongly Cautioned', 13),
+    ('TV-14', 'Parents Strongly Cautioned 14+', 14),
+    ('R', 'Restricted', 17),
+    ('NC-17', 'Adults Only', 18),
+]
+
+GENRES = [
+    'Action', 'Comedy', 'Drama', 'Horror', 'Sci-Fi', 'Thriller', 'Romance',
+    'Documentary', 'Animation', 'Fantasy', 'Crime', 'Family',
+]
+
+WORDS = [
+    'night', 'shadow', 'river', 'empire', 'dream', 'storm', 'silent', 'golden',
+    'last', 'city', 'lost', 'secret', 'winter', 'fire', 'ocean', 'star', 'broken',
+    'wild', 'dark', 'kingdom', 'heart', 'ghost', 'iron', 'garden', 'edge', 'code',
+]
+
+DEVICE_TYPES = [choice for choice, _ in Device.DeviceType.choices]
+
+
+def counts_for_scale(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+
+
+def _batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _bulk(model, rows):
+    created = 0
+    for batch in _batched(rows):
+        model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        created += len(batch)
+    return created
+
+
+class CatalogSeeder:
+    """Generate benchmark rows with a fixed random seed so runs are comparable."""
+
+    def __init__(self, scale=1.0, seed=42, log=print):
+        self.counts = counts_for_scale(scale)
+        self.rng = random.Random(seed)
+        self.log = log
+        self.now = timezone.now()
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _title(self, words=3):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).title()
+
+    def _release_date(self):
+        return date(1970, 1, 1) + timedelta(days=self.rng.randrange(20_000))
+
+    def seed(self):
+        self.seed_reference_data()
+        self.seed_catalog()
+        self.seed_users()
+        self.seed_activity()
+
+    @staticmethod
+    def flush(log=print):
+        log('Removing seeded users...')
+        User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}').delete()
+        log('Removing seeded content...')
+        Content.all_objects.filter(imdb_id__startswith=BENCH_IMDB_PREFIX).delete()
+        CastMember.objects.filter(profile_image_url__contains=BENCH_EMAIL_DOMAIN).delete()
+
+    @staticmethod
+    def is_seeded():
+        return User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}').exists()
+
+    # ==================== REFERENCE DATA ====================
+    def seed_reference_data(self):
+        self.maturity_ids = []
+        for order, (code, name, minimum_age) in enumerate(MATURITY_LEVELS):
+            level, _ = MaturityLevel.objects.get_or_create(
+                code=code, defaults={'name': name, 'minimum_age': minimum_age, 'display_order': order}
+            )
+            self.maturity_ids.append(level.id)
+
+        self.genre_ids = []
+        for order, name in enumerate(GENRES):
+            genre, _ = Genre.objects.get_or_create(name=name, defaults={'display_order': order})
+            self.genre_ids.append(genre.id)
+
+        self.plan, _ = SubscriptionPlan.objects.get_or_create(
+            name=BENCH_PLAN_NAME,
+            defaults={
+                'price_monthly': 649, 'max_concurrent_streams': 4, 'max_profiles': 5,
+                'supports_uhd': True, 'allows_downloads': True, 'max_download_devices': 4,
+                'is_active': False,
+            }
+        )
+
+    # ==================== CATALOG ====================
+    def _content(self, content_type, index, **extra):
+        return Content(
+            id=self._uuid(),
+            title=self._title(),
+            description=' '.join(self.rng.choice(WORDS) for _ in range(30)),
+            content_type=content_type,
+            release_date=self._release_date(),
+            duration_minutes=self.rng.randint(20, 180),
+            poster_image_url=f'https://img.example.com/poster/{index}.jpg',
+            imdb_id=f'{BENCH_IMDB_PREFIX}{content_type[0]}{index}',
+            maturity_level_id=self.rng.choice(self.maturity_ids),
+            **extra,
+        )
+
+    def seed_catalog(self):
+        counts = self.counts
+        self.log(f"Seeding {counts['cast_members']} cast members...")
+        self.cast_ids = [self._uuid() for _ in range(counts['cast_members'])]
+        _bulk(CastMember, (
+            CastMember(
+                id=cast_id, name=self._title(2),
+                profile_image_url=f'https://{BENCH_EMAIL_DOMAIN}/cast/{i}.jpg',
+            )
+            for i, cast_id in enumerate(self.cast_ids)
+        ))
+
+        self.log(f"Seeding {counts['movies']} movies...")
+        self.movie_ids = []
+        for batch in _batched(range(counts['movies'])):
+            contents = [self._content(Content.ContentType.MOVIE, i) for i in batch]
+            with transaction.atomic():
+                Content.objects.bulk_create(contents)
+                Movie.objects.bulk_create([
+                    Movie(content=c, director=self._title(2)) for c in contents
+                ])
+                self._seed_metadata(contents)
+            self.movie_ids.extend(c.id for c in contents)
+
+        self.log(f"Seeding {counts['shows']} TV shows with seasons and episodes...")
+        self.show_ids = []
+        self.episode_ids = []
+        episode_index = 0
+        for batch in _batched(range(counts['shows']), 200):
+            shows = [self._content(Content.ContentType.TV_SHOW, i) for i in batch]
+            seasons, episodes, episode_contents = [], [], []
+            tv_shows = []
+            for show in shows:
+                season_count = self.rng.randint(1, 4)
+                episodes_per_season = self.rng.randint(6, 10)
+                tv_show = TVShow(
+                    content=show, total_seasons=season_count,
+                    total_episodes=season_count * episodes_per_season,
+                )
+                tv_shows.append(tv_show)
+                for season_number in range(1, season_count + 1):
+                    season = Season(id=self._uuid(), tv_show=tv_show, season_number=season_number)
+                    seasons.append(season)
+                    for episode_number in range(1, episodes_per_season + 1):
+                        content = self._content(Content.ContentType.TV_SHOW, f'e{episode_index}')
+                        episode_index += 1
+                        episode_contents.append(content)
+                        episodes.append(Episode(content=content, season=season, episode_number=episode_number))
+            with transaction.atomic():
+                Content.objects.bulk_create(shows + episode_contents, batch_size=BATCH_SIZE)
+                TVShow.objects.bulk_create(tv_shows)
+                Season.objects.bulk_create(seasons, batch_size=BATCH_SIZE)
+                Episode.objects.bulk_create(episodes, batch_size=BATCH_SIZE)
+                self._seed_metadata(shows)
+            self.show_ids.extend(s.id for s in shows)
+            self.episode_ids.extend(c.id for c in episode_contents)
+
+    def _seed_metadata(self, contents):
+        genres, cast = [], []
+        for content in contents:
+            for genre_id in self.rng.sample(self.genre_ids, self.rng.randint(1, 3)):
+                genres.append(ContentGenre(content=content, genre_id=genre_id))
+            for order, cast_id in enumerate(self.rng.sample(self.cast_ids, min(4, len(self.cast_ids)))):
+                cast.append(ContentCast(
+                    id=self._uuid(), content=content, cast_member_id=cast_id,
+                    character_name=self._title(1), billing_order=order,
+                ))
+        ContentGenre.objects.bulk_create(genres, batch_size=BATCH_SIZE)
+        ContentCast.objects.bulk_create(cast, batch_size=BATCH_SIZE)
+
+    # ==================== USERS ====================
+    def seed_users(self):
+        count = self.counts['users']
+        self.log(f'Seeding {count} users with profiles, subscriptions and devices...')
+        password = make_password('benchmark-password')
+        countries = ['US', 'IN', 'GB', 'DE', 'BR', 'JP']
+        self.profile_ids = []
+        self.user_devices = {}
+        for batch in _batched(range(count)):
+            users, profiles, subscriptions, devices = [], [], [], []
+            for i in batch:
+                user = User(
+                    id=self._uuid(), email=f'user{i}@{BENCH_EMAIL_DOMAIN}',
+                    password=password, country_code=self.rng.choice(countries),
+                    stripe_customer_id=f'cus_bench_{i}',
+                )
+                users.append(user)
+                for p in range(self.rng.randint(1, 4)):
+                    kid = p == 3
+                    profiles.append(Profile(
+                        id=self._uuid(), user=user, name=f'Profile {p}',
+                        is_kid_profile=kid, age=self.rng.randint(6, 12) if kid else self.rng.randint(18, 70),
+                    ))
+                subscriptions.append(UserSubscription(
+                    id=self._uuid(), user=user, subscription_plan=self.plan,
+                    status=UserSubscription.SubscriptionStatus.ACTIVE,
+                    current_period_start=self.now - timedelta(days=10),
+                    current_period_end=self.now + timedelta(days=3650),
+                    stripe_subscription_id=f'sub_bench_{i}',
+                ))
+                for d in range(self.rng.randint(1, 2)):
+                    devices.append(Device(
+                        id=self._uuid(), user=user, device_type=self.rng.choice(DEVICE_TYPES),
+                        device_name=f'Bench Device {d}',
+                    ))
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                Profile.objects.bulk_create(profiles)
+                UserSubscription.objects.bulk_create(subscriptions)
+                Device.objects.bulk_create(devices)
+            self.profile_ids.extend(p.id for p in profiles)
+            for device in devices:
+                self.user_devices.setdefault(device.user_id, []).append(device.id)
+
+    # ==================== ACTIVITY ====================
+    def seed_activity(self):
+        count = self.counts['watch_history']
+        self.log(f'Seeding {count} watch history rows...')
+        watchable = self.movie_ids + self.episode_ids
+        window_seconds = 365 * 24 * 3600
+
+        def history_rows():
+            for _ in range(count):
+                started = self.now - timedelta(seconds=self.rng.randrange(window_seconds))
+                watched = self.rng.randint(60, 7200)
+                yield WatchHistory(
+                    id=self._uuid(),
+                    profile_id=self.rng.choice(self.profile_ids),
+                    content_id=self.rng.choice(watchable),
+                    watch_started_at=started,
+                    watch_ended_at=started + timedelta(seconds=watched),
+                    watched_seconds=watched,
+                    start_position_seconds=0,
+                    end_position_seconds=watched,
+                )
+
+        _bulk(WatchHistory, history_rows())
+
+        progress_count = count // 10
+        self.log(f'Seeding {progress_count} watch progress rows and ratings...')
+        pairs = {
+            (self.rng.choice(self.profile_ids), self.rng.choice(watchable))
+            for _ in range(progress_count)
+        }
+        _bulk(WatchProgress, (
+            WatchProgress(id=self._uuid(), profile_id=p, content_id=c, resume_time_seconds=self.rng.randint(0, 5000))
+            for p, c in pairs
+        ))
+        _bulk(Rating, (
+            Rating(id=self._uuid(), profile_id=p, content_id=c, rating_value=self.rng.randint(1, 5))
+            for p, c in pairs
+        ))
+
+        self.log('Aggregating user content interactions...')
+        totals = (
+            WatchHistory.objects.filter(profile__user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+            .values_list('profile_id', 'content_id')
+            .annotate(seconds=Sum('watched_seconds'), watches=Count('id'), last=Max('watch_ended_at'))
+            .order_by()
+        )
+        _bulk(UserContentInteraction, (
+            UserContentInteraction(
+                id=self._uuid(), profile_id=p, content_id=c, total_watch_time_seconds=seconds,
+                watch_count=watches, last_watched_at=last,
+            )
+            for p, c, seconds, watches, last in totals.iterator(chunk_size=BATCH_SIZE)
+        ))
@@ -0,0 +1,89 @@
+"""
+Live-catalog queries and index sizes as soft-deleted content piles up.
+
+Marks a growing share of the seeded content as deleted (0% -> 75%) and, at
+each step, times the first catalog page through the default (live-only)
+manager and records the size of the partial `WHERE is_deleted = false`
+index next to the full (is_deleted, release_date) index. Seeded rows are
+restored afterwards. Updates bypass signals, so caches and the search
+index are untouched.
+
+Run `manage.py seed_benchmark_data` first.
+"""
+from django.core.management.base import CommandError
+from django.db import connection
+
+from api.models import Content
+from .harness import measure
+from .seed import BENCH_IMDB_PREFIX
+
+DELETED_SHARES = (0.0, 0.25, 0.5, 0.75)
+PAGE_SIZE = 50
+PARTIAL_INDEX = 'content_live_release_idx'
+
+
+def _full_index_name():
+    constraints = connection.introspection.get_constraints(connection.cursor(), Content._meta.db_table)
+    for name, info in constraints.items():
+        if info['index'] and info['columns'] == ['is_deleted', 'release_date'] and not name.startswith('content_live'):
+            return name
+    raise CommandError('The (is_deleted, release_date) index is missing.')
+
+
+def index_size(name):
+    """On-disk size of an index in bytes."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name = %s', [name])
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_relation_size(%s::regclass)', [name])
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+def _analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE content')
+
+
+def run(options):
+    iterations = options['iterations']
+    seeded_ids = list(
+        Content.all_objects.filter(imdb_id__startswith=BENCH_IMDB_PREFIX, is_deleted=False)
+        .order_by('id').values_list('id', flat=True)
+    )
+    if not seeded_ids:
+        raise CommandError('No seeded data found. Run `manage.py seed_benchmark_data` first.')
+    full_index = _full_index_name()
+
+    def latest(_):
+        return list(Content.objects.order_by('-release_date').values_list('id', 'title')[:PAGE_SIZE])
+
+    def latest_movies(_):
+        return list(
+            Content.objects.filter(content_type=Content.ContentType.MOVIE)
+            .order_by('-release_date').values_list('id', 'title')[:PAGE_SIZE]
+        )
+
+    results = []
+    deleted = 0
+    try:
+        for share in DELETED_SHARES:
+            target = int(len(seeded_ids) * share)
+            Content.all_objects.filter(id__in=seeded_ids[deleted:target]).update(is_deleted=True)
+            deleted = target
+            _analyze()
+
+            sizes = {
+                key: round(size / 1024, 1) if size is not None else None
+                for key, size in [('partial_index_kib', index_size(PARTIAL_INDEX)), ('full_index_kib', index_size(full_index))]
+            }
+            label = f'{round(share * 100)}pct-deleted'
+            for name, func in [('latest-page', latest), ('latest-movies-page', latest_movies)]:
+                results.append(dict(measure(f'{name}-{label}', func, iterations=iterations), **sizes))
+    finally:
+        Content.all_objects.filter(id__in=seeded_ids[:deleted]).update(is_deleted=False)
+        _analyze()
+
+    return results
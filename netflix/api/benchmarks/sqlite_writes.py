@@ -0,0 +1,141 @@
+"""
+Concurrent SQLite writes: the watch progress upsert from THREADS threads.
+
+Each configuration gets a fresh scratch database file next to the app
+database. Every thread upserts progress rows (read the row, then update or
+insert it, in one transaction), the way WatchProgressViewSet does, through
+its own sqlite3 connection:
+
+- `baseline`: rollback journal, deferred transactions (SQLite defaults)
+- `development`: the development profile (WAL)
+- `production`: the production profile (WAL, synchronous=NORMAL, mmap,
+  larger cache) with BEGIN IMMEDIATE
+- `production-serialized`: as above, writers queued on a process lock
+  (SQLITE_SERIALIZE_WRITES)
+
+Reports upserts per second, per-upsert latency and how many failed with
+"database is locked". 100k x `--scale` upserts per configuration; no
+seeded data is needed.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from netflix.database import SQLITE_PROFILES
+from api.sqlite_tuning import apply_pragmas
+from .harness import percentile
+
+THREADS = 8
+FULL_UPSERTS = 100_000
+PROFILES = 200
+CONTENT = 500
+
+CONFIGURATIONS = [
+    # (name, pragmas, BEGIN statement, serialize)
+    ('baseline', {}, 'BEGIN', False),
+    ('development', SQLITE_PROFILES['development'], 'BEGIN', False),
+    ('production', SQLITE_PROFILES['production'], 'BEGIN IMMEDIATE', False),
+    ('production-serialized', SQLITE_PROFILES['production'], 'BEGIN IMMEDIATE', True),
+]
+
+
+def _connect(path):
+    busy_timeout = settings.SQLITE_PRAGMAS['busy_timeout'] / 1000
+    return sqlite3.connect(path, timeout=busy_timeout, isolation_level=None)
+
+
+def _create(path, pragmas):
+    connection = _connect(path)
+    apply_pragmas(connection, pragmas)
+    connection.execute(
+        'CREATE TABLE watch_progress (id char(32) PRIMARY KEY, profile_id char(32) NOT NULL, '
+        'content_id char(32) NOT NULL, resume_time_seconds integer NOT NULL, updated_at real NOT NULL, '
+        'UNIQUE (profile_id, content_id))'
+    )
+    connection.close()
+
+
+def _upsert(connection, begin, profile_id, content_id, position):
+    connection.execute(begin)
+    try:
+        row = connection.execute(
+            'SELECT id FROM watch_progress WHERE profile_id = ? AND content_id = ?', (profile_id, content_id),
+        ).fetchone()
+        if row:
+            connection.execute(
+                'UPDATE watch_progress SET resume_time_seconds = ?, updated_at = ? WHERE id = ?',
+                (position, time.time(), row[0]),
+            )
+        else:
+            connection.execute(
+                'INSERT INTO watch_progress VALUES (?, ?, ?, ?, ?)',
+                (uuid.uuid4().hex, profile_id, content_id, position, time.time()),
+            )
+        connection.execute('COMMIT')
+    except sqlite3.OperationalError:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def _run_configuration(name, pragmas, begin, serialize, upserts):
+    directory = os.path.dirname(str(settings.DATABASES['default']['NAME'])) or None
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        path = os.path.join(scratch, 'bench.sqlite3')
+        _create(path, pragmas)
+        profiles = [uuid.uuid4().hex for _ in range(PROFILES)]
+        content = [uuid.uuid4().hex for _ in range(CONTENT)]
+        lock = threading.Lock()
+        timings, errors = [], []
+        start = threading.Barrier(THREADS + 1)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            connection = _connect(path)
+            apply_pragmas(connection, pragmas)
+            local_timings, local_errors = [], 0
+            start.wait()
+            for _ in range(upserts // THREADS):
+                args = (rng.choice(profiles), rng.choice(content), rng.randrange(7200))
+                began = time.perf_counter()
+                try:
+                    if serialize:
+                        with lock:
+                            _upsert(connection, begin, *args)
+                    else:
+                        _upsert(connection, begin, *args)
+                except sqlite3.OperationalError:
+                    local_errors += 1
+                local_timings.append(time.perf_counter() - began)
+            connection.close()
+            timings.extend(local_timings)
+            errors.append(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+    return {
+        'name': f'upsert-{name}',
+        'threads': THREADS,
+        'iterations': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'upserts_per_s': round((len(timings) - sum(errors)) / elapsed),
+        'locked_errors': sum(errors),
+    }
+
+
+def run(options):
+    upserts = max(THREADS * 100, int(FULL_UPSERTS * options['scale']))
+    return [_run_configuration(*configuration, upserts) for configuration in CONFIGURATIONS]
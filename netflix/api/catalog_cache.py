@@ -0,0 +1,110 @@
+"""
+Rendered-response cache for catalog endpoints.
+
+Catalog documents (movie / TV show / genre lists and details) are the same
+for every user, so the rendered bytes are cached per URL and negotiated
+media type, together with precompressed variants of the body. Hits skip
+the queries, serialization, rendering and compression entirely.
+
+Keys embed a global catalog version which signals bump whenever catalog
+rows change, so stale documents simply stop being read and expire. The
+version lives in the shared cache (CACHE_REDIS_URL) so a bump from admin,
+Celery or another worker reaches every process. If the key is ever evicted
+it restarts from the clock rather than from 1, so documents cached under
+earlier versions are never read again.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .compression import apply_encoding, choose_encoding, precompress
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(CATALOG_VERSION_KEY, version, timeout=None):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog document once the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    transaction.on_commit(bump)
+
+
+class CatalogCacheMixin:
+    """
+    Cache rendered list/retrieve responses of a read-only viewset.
+    Override `catalog_cache_variant()` to split the cache further (e.g. per
+    audience) when the response depends on more than the URL.
+    """
+    catalog_cache_timeout = None
+
+    def catalog_cache_variant(self, request):
+        return ''
+
+    def catalog_cache_key(self, request):
+        raw = '|'.join([
+            request.get_full_path(),
+            request.accepted_media_type or '',
+            self.catalog_cache_variant(request),
+        ])
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f'catalog:{catalog_version()}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        # The browsable API embeds per-request forms; never cache it.
+        if request.accepted_renderer.format == 'api':
+            return handler(request, *args, **kwargs)
+
+        key = self.catalog_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            return self._response_from_entry(request, entry)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(partial(self._store, key))
+        return response
+
+    def _store(self, key, response):
+        body = response.content
+        entry = {
+            'content_type': response['Content-Type'],
+            'body': body,
+            'encoded': precompress(body),
+        }
+        timeout = self.catalog_cache_timeout or settings.CATALOG_CACHE_TIMEOUT
+        cache.set(key, entry, timeout)
+
+    def _response_from_entry(self, request, entry):
+        response = HttpResponse(entry['body'], content_type=entry['content_type'])
+        response['X-Catalog-Cache'] = 'hit'
+        encoded = entry['encoded']
+        if encoded:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), encoded)
+            if encoding:
+                apply_encoding(response, encoded[encoding], encoding)
+        return response
@@ -0,0 +1,173 @@
+"""
+Response compression.
+
+CompressionMiddleware negotiates brotli, zstd or gzip from Accept-Encoding
+(brotli and zstd only when the `brotli` / `zstandard` packages are
+installed) and compresses bodies larger than COMPRESSION_MIN_SIZE.
+Streaming responses, small bodies, responses that already carry a
+Content-Encoding and already-compressed media types are left alone.
+
+`precompress()` builds every available encoding of a body up front so
+cached documents (see catalog_cache) can be served without recompressing.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Levels for per-request compression favour speed; precompressed variants
+# are built once per cache fill and can afford a higher ratio.
+DYNAMIC_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+PRECOMPRESS_LEVELS = {'br': 9, 'zstd': 10, 'gzip': 9}
+
+# Server preference when the client accepts several encodings equally.
+PREFERENCE = ('br', 'zstd', 'gzip')
+
+INCOMPRESSIBLE_PREFIXES = ('image/', 'video/', 'audio/', 'font/woff')
+INCOMPRESSIBLE_TYPES = {
+    'application/zip', 'application/gzip', 'application/x-gzip', 'application/zstd',
+    'application/x-brotli', 'application/octet-stream', 'application/pdf',
+}
+
+
+def available_encodings():
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+def compress(body, encoding, level=None):
+    level = level if level is not None else DYNAMIC_LEVELS[encoding]
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    # mtime=0 keeps output deterministic so cached variants are stable.
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def precompress(body):
+    """Return {encoding: bytes} for every available encoding that actually saves space."""
+    variants = {}
+    if len(body) < settings.COMPRESSION_MIN_SIZE:
+        return variants
+    for encoding in available_encodings():
+        compressed = compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def parse_accept_encoding(header):
+    """Return {encoding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def choose_encoding(header, candidates):
+    """Pick the best encoding from `candidates` the client accepts, or None."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in candidates:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    if media_type in INCOMPRESSIBLE_TYPES:
+        return False
+    return not media_type.startswith(INCOMPRESSIBLE_PREFIXES)
+
+
+def apply_encoding(response, body, encoding):
+    """Set an encoded body on `response` and fix up the related headers."""
+    response.content = body
+    response['Content-Length'] = str(len(body))
+    response['Content-Encoding'] = encoding
+    # A compressed body is not byte-identical, so a strong ETag must be weakened.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware:
+    """
+    Compress responses above COMPRESSION_MIN_SIZE with the best encoding the
+    client accepts. Place it near the top of MIDDLEWARE so it sees the final body.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encodings = available_encodings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        apply_encoding(response, compressed, encoding)
+        return response
@@ -0,0 +1,43 @@
+"""
+Shared cache of "content mini" dicts (the ContentMiniSerializer fields).
+
+Row-style endpoints (home, trending, recommendations) only know content ids
+until the last step; `content_minis()` turns ids into display dicts with one
+cache round trip and a single `values()` query for the misses. Keys embed the
+catalog version, so catalog edits invalidate every entry at once.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .catalog_cache import catalog_version
+from .models import Content
+
+MINI_FIELDS = ('id', 'title', 'poster_image_url', 'content_type', 'duration_minutes')
+
+
+def _key(version, content_id):
+    return f'content-mini:{version}:{content_id}'
+
+
+def content_minis(content_ids):
+    """{str(content_id): mini dict} for the live content among `content_ids`."""
+    ids = list(dict.fromkeys(str(content_id) for content_id in content_ids))
+    if not ids:
+        return {}
+
+    version = catalog_version()
+    cached = cache.get_many([_key(version, content_id) for content_id in ids])
+    minis = {mini['id']: mini for mini in cached.values()}
+
+    missing = [content_id for content_id in ids if content_id not in minis]
+    if missing:
+        fetched = {}
+        for row in Content.objects.filter(id__in=missing).values(*MINI_FIELDS):
+            row['id'] = str(row['id'])
+            fetched[row['id']] = row
+        cache.set_many(
+            {_key(version, content_id): mini for content_id, mini in fetched.items()},
+            settings.CATALOG_CACHE_TIMEOUT,
+        )
+        minis.update(fetched)
+    return minis
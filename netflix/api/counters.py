@@ -0,0 +1,346 @@
+"""
+Real-time view counters.
+
+Every new WatchHistory row and every playback heartbeat costs one round trip
+to Redis instead of a database write. WatchHistory rows feed the durable
+totals (views, watch seconds); heartbeats feed the live per-bucket watch
+seconds, so a session reported both ways is not counted twice. Both add the
+profile to the unique-viewer HyperLogLog.
+
+- `views:uniq:{content}`         HyperLogLog of profile ids (unique viewers, ~0.8% error)
+- `views:seconds:{bucket}`       sorted set of watch seconds per content for one time bucket
+- `views:pending:*` / `:dirty`   deltas not yet folded into ContentViewStats
+
+`fold_counters()` (the fold-view-counters beat task) drains the pending
+deltas into `ContentViewStats`. Without VIEW_COUNTERS_REDIS_URL an
+in-process backend with the same interface is used (tests, local runs);
+it is exact but per process. Async views use the same keys through
+redis.asyncio (`arecord_heartbeat`).
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Content, ContentViewStats
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'views'
+
+
+def _bucket(at=None):
+    size = settings.VIEW_COUNTER_BUCKET_SECONDS
+    return int((time.time() if at is None else at) // size * size)
+
+
+def _recent_buckets(minutes):
+    size = settings.VIEW_COUNTER_BUCKET_SECONDS
+    newest = _bucket()
+    return [newest - i * size for i in range(max(1, minutes * 60 // size))]
+
+
+# ==================== BACKENDS ====================
+class RedisCounterBackend:
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.errors = (redis.RedisError,)
+
+    def record(self, content_id, profile_id, views=0, seconds=0, live_seconds=0):
+        bucket_key = f'{PREFIX}:seconds:{_bucket()}'
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.pfadd(f'{PREFIX}:uniq:{content_id}', profile_id)
+        if live_seconds:
+            pipe.zincrby(bucket_key, live_seconds, content_id)
+            pipe.expire(bucket_key, settings.VIEW_COUNTER_RETENTION)
+        if seconds:
+            pipe.hincrby(f'{PREFIX}:pending:seconds', content_id, seconds)
+        if views:
+            pipe.hincrby(f'{PREFIX}:pending:views', content_id, views)
+        pipe.sadd(f'{PREFIX}:dirty', content_id)
+        pipe.execute()
+
+    def advance_position(self, content_id, profile_id, position):
+        previous = self.redis.set(
+            f'{PREFIX}:pos:{profile_id}:{content_id}', position,
+            ex=settings.VIEW_HEARTBEAT_MAX_SECONDS * 4, get=True,
+        )
+        return None if previous is None else int(previous)
+
+    def unique_viewers(self, content_ids):
+        pipe = self.redis.pipeline(transaction=False)
+        for content_id in content_ids:
+            pipe.pfcount(f'{PREFIX}:uniq:{content_id}')
+        return dict(zip(content_ids, pipe.execute()))
+
+    def top(self, minutes, limit):
+        buckets = _recent_buckets(minutes)
+        key = f'{PREFIX}:top:{minutes}:{buckets[0]}'
+        if not self.redis.exists(key):
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zunionstore(key, [f'{PREFIX}:seconds:{bucket}' for bucket in buckets])
+            pipe.expire(key, settings.VIEW_COUNTER_BUCKET_SECONDS)
+            pipe.execute()
+        return [(member.decode(), int(score)) for member, score in self.redis.zrevrange(key, 0, limit - 1, withscores=True)]
+
+    def drain(self):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(f'{PREFIX}:pending:views')
+        pipe.hgetall(f'{PREFIX}:pending:seconds')
+        pipe.smembers(f'{PREFIX}:dirty')
+        pipe.delete(f'{PREFIX}:pending:views', f'{PREFIX}:pending:seconds', f'{PREFIX}:dirty')
+        views, seconds, dirty, _ = pipe.execute()
+        return (
+            {key.decode(): int(value) for key, value in views.items()},
+            {key.decode(): int(value) for key, value in seconds.items()},
+            {member.decode() for member in dirty},
+        )
+
+    def restore(self, views, seconds, dirty):
+        pipe = self.redis.pipeline(transaction=False)
+        for content_id, count in views.items():
+            pipe.hincrby(f'{PREFIX}:pending:views', content_id, count)
+        for content_id, count in seconds.items():
+            pipe.hincrby(f'{PREFIX}:pending:seconds', content_id, count)
+        if dirty:
+            pipe.sadd(f'{PREFIX}:dirty', *dirty)
+        pipe.execute()
+
+
+class LocalCounterBackend:
+    """In-process stand-in for RedisCounterBackend: exact sets instead of HyperLogLogs."""
+    errors = ()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.viewers = defaultdict(set)
+        self.buckets = defaultdict(Counter)
+        self.positions = {}
+        self.pending_views = Counter()
+        self.pending_seconds = Counter()
+        self.dirty = set()
+
+    def record(self, content_id, profile_id, views=0, seconds=0, live_seconds=0):
+        with self.lock:
+            self.viewers[content_id].add(profile_id)
+            if live_seconds:
+                self.buckets[_bucket()][content_id] += live_seconds
+            if seconds:
+                self.pending_seconds[content_id] += seconds
+            if views:
+                self.pending_views[content_id] += views
+            self.dirty.add(content_id)
+            oldest = _bucket() - settings.VIEW_COUNTER_RETENTION
+            for bucket in [bucket for bucket in self.buckets if bucket < oldest]:
+                del self.buckets[bucket]
+
+    def advance_position(self, content_id, profile_id, position):
+        with self.lock:
+            previous = self.positions.get((profile_id, content_id))
+            self.positions[profile_id, content_id] = position
+        return previous
+
+    def unique_viewers(self, content_ids):
+        with self.lock:
+            return {content_id: len(self.viewers.get(content_id, ())) for content_id in content_ids}
+
+    def top(self, minutes, limit):
+        totals = Counter()
+        with self.lock:
+            for bucket in _recent_buckets(minutes):
+                totals.update(self.buckets.get(bucket, {}))
+        return totals.most_common(limit)
+
+    def drain(self):
+        with self.lock:
+            drained = dict(self.pending_views), dict(self.pending_seconds), set(self.dirty)
+            self.pending_views.clear()
+            self.pending_seconds.clear()
+            self.dirty.clear()
+        return drained
+
+    def restore(self, views, seconds, dirty):
+        with self.lock:
+            self.pending_views.update(views)
+            self.pending_seconds.update(seconds)
+            self.dirty |= dirty
+
+
+class AsyncRedisCounterBackend:
+    """The heartbeat path of RedisCounterBackend over redis.asyncio; one client per event loop."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.errors = (redis.RedisError,)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = redis.asyncio.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return client
+
+    async def record(self, content_id, profile_id, views=0, seconds=0, live_seconds=0):
+        bucket_key = f'{PREFIX}:seconds:{_bucket()}'
+        async with self._client().pipeline(transaction=False) as pipe:
+            pipe.pfadd(f'{PREFIX}:uniq:{content_id}', profile_id)
+            if live_seconds:
+                pipe.zincrby(bucket_key, live_seconds, content_id)
+                pipe.expire(bucket_key, settings.VIEW_COUNTER_RETENTION)
+            if seconds:
+                pipe.hincrby(f'{PREFIX}:pending:seconds', content_id, seconds)
+            if views:
+                pipe.hincrby(f'{PREFIX}:pending:views', content_id, views)
+            pipe.sadd(f'{PREFIX}:dirty', content_id)
+            await pipe.execute()
+
+    async def advance_position(self, content_id, profile_id, position):
+        previous = await self._client().set(
+            f'{PREFIX}:pos:{profile_id}:{content_id}', position,
+            ex=settings.VIEW_HEARTBEAT_MAX_SECONDS * 4, get=True,
+        )
+        return None if previous is None else int(previous)
+
+
+class AsyncLocalCounterBackend:
+    errors = ()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def record(self, *args, **kwargs):
+        self.backend.record(*args, **kwargs)
+
+    async def advance_position(self, *args):
+        return self.backend.advance_position(*args)
+
+
+_backend = None
+_async_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                url = settings.VIEW_COUNTERS_REDIS_URL
+                _backend = RedisCounterBackend(url) if url else LocalCounterBackend()
+    return _backend
+
+
+def get_async_backend():
+    global _async_backend
+    if _async_backend is None:
+        url = settings.VIEW_COUNTERS_REDIS_URL
+        backend = AsyncRedisCounterBackend(url) if url else AsyncLocalCounterBackend(get_backend())
+        with _backend_lock:
+            if _async_backend is None:
+                _async_backend = backend
+    return _async_backend
+
+
+# ==================== WRITE PATH ====================
+# Counters are best effort: a Redis outage must never fail playback requests.
+def record_view(content_id, profile_id, watched_seconds=0):
+    """A new WatchHistory row."""
+    backend = get_backend()
+    try:
+        backend.record(str(content_id), str(profile_id), views=1, seconds=max(watched_seconds or 0, 0))
+    except backend.errors:
+        logger.warning('View counter update failed for %s', content_id, exc_info=True)
+
+
+def record_heartbeat(content_id, profile_id, position_seconds):
+    """
+    A playback progress update. Counts the viewer and the seconds played since
+    the previous heartbeat; backwards seeks and gaps longer than
+    VIEW_HEARTBEAT_MAX_SECONDS (a forward seek or a paused session) add none.
+    """
+    backend = get_backend()
+    content_id, profile_id = str(content_id), str(profile_id)
+    try:
+        previous = backend.advance_position(content_id, profile_id, position_seconds)
+        backend.record(content_id, profile_id, live_seconds=_played_seconds(previous, position_seconds))
+    except backend.errors:
+        logger.warning('View counter heartbeat failed for %s', content_id, exc_info=True)
+
+
+async def arecord_heartbeat(content_id, profile_id, position_seconds):
+    """record_heartbeat() for async views."""
+    backend = get_async_backend()
+    content_id, profile_id = str(content_id), str(profile_id)
+    try:
+        previous = await backend.advance_position(content_id, profile_id, position_seconds)
+        await backend.record(content_id, profile_id, live_seconds=_played_seconds(previous, position_seconds))
+    except backend.errors:
+        logger.warning('View counter heartbeat failed for %s', content_id, exc_info=True)
+
+
+def _played_seconds(previous, position_seconds):
+    delta = 0 if previous is None else position_seconds - previous
+    return delta if 0 < delta <= settings.VIEW_HEARTBEAT_MAX_SECONDS else 0
+
+
+# ==================== READ PATH ====================
+def live_top(minutes=60, limit=10):
+    """
+    [(content_id, watch_seconds, unique_viewers)] for the content most played in
+    the last `minutes` (by heartbeat seconds); unique_viewers is all-time.
+    """
+    backend = get_backend()
+    top = backend.top(minutes, limit)
+    viewers = backend.unique_viewers([content_id for content_id, _ in top])
+    return [(content_id, seconds, viewers[content_id]) for content_id, seconds in top]
+
+
+# ==================== FOLD ====================
+def fold_counters():
+    """Move pending deltas into ContentViewStats. Returns the number of content rows touched."""
+    backend = get_backend()
+    views, seconds, dirty = backend.drain()
+    if not dirty:
+        return 0
+    try:
+        viewers = backend.unique_viewers(sorted(dirty))
+        now = timezone.now()
+        with transaction.atomic():
+            existing = ContentViewStats.objects.select_for_update().in_bulk([uuid.UUID(content_id) for content_id in dirty])
+            # Content hard-deleted since it was counted has nothing to fold into.
+            live = set(Content.all_objects.filter(id__in=dirty).values_list('id', flat=True))
+            created = []
+            for content_id in dirty:
+                key = uuid.UUID(content_id)
+                stats = existing.get(key)
+                if stats is None:
+                    if key not in live:
+                        continue
+                    stats = ContentViewStats(content_id=key)
+                    created.append(stats)
+                stats.total_views += views.get(content_id, 0)
+                stats.total_watch_seconds += seconds.get(content_id, 0)
+                stats.unique_viewers = max(stats.unique_viewers, viewers[content_id])
+                stats.updated_at = now
+            ContentViewStats.objects.bulk_create(created, batch_size=1000)
+            ContentViewStats.objects.bulk_update(
+                existing.values(), ['total_views', 'total_watch_seconds', 'unique_viewers', 'updated_at'], batch_size=1000,
+            )
+    except Exception:
+        backend.restore(views, seconds, dirty)
+        raise
+    return len(dirty)
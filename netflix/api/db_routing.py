@@ -0,0 +1,183 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only when all of these hold:
+
+- the request is GET/HEAD/OPTIONS and its view sets `read_replica = True`
+- the model belongs to one of DB_REPLICA_APPS
+- nothing has been written yet in this request, and no transaction is open
+  on the primary
+- the client is not pinned to the primary
+
+Everything else (writes, Celery tasks, management commands) uses `default`.
+One replica is picked per request, so a request reads a consistent snapshot.
+
+Stickiness: a request that writes pins its client to the primary for
+DB_REPLICA_STICKY_SECONDS, so the next reads see the write despite
+replication lag. The pin is kept both in a cookie (session clients) and in
+the cache under the user id (JWT clients that drop cookies). The next read
+may land on any worker, so with replicas the default cache must be shared
+(CACHE_REDIS_URL); `check --deploy` warns when it is per-process.
+
+Without DB_REPLICAS the middleware is dropped and the router sends
+everything to `default`.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current_state = ContextVar('db_routing_state', default=None)
+
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def pin_cache_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def check_pin_cache(app_configs, **kwargs):
+    if settings.DATABASE_REPLICAS and settings.CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return [checks.Warning(
+            'Read replicas are configured but the default cache is per-process, so JWT clients '
+            'are not pinned to the primary on other workers after a write.',
+            hint='Set CACHE_REDIS_URL.',
+            id='api.W001',
+        )]
+    return []
+
+
+class RoutingState:
+    """Routing decisions for one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self._use_replica = None
+        self._pinned = None
+        self._replica = None
+
+    @property
+    def use_replica(self):
+        if self._use_replica is None:
+            match = getattr(self.request, 'resolver_match', None)
+            if match is None:
+                # Not resolved yet (middleware queries): primary, decide again later.
+                return False
+            view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+            self._use_replica = self.request.method in SAFE_METHODS and getattr(view_class, 'read_replica', False)
+        return self._use_replica
+
+    @property
+    def pinned(self):
+        if self._pinned is None:
+            if PIN_COOKIE in self.request.COOKIES:
+                self._pinned = True
+                return True
+            # Set first: resolving request.user may itself run queries through the router.
+            self._pinned = False
+            user = getattr(self.request, 'user', None)
+            if user is None or not user.is_authenticated:
+                # DRF authenticates JWT clients (with a user query routed here) before it
+                # sets request.user, so an anonymous user is not final: decide again later.
+                self._pinned = None
+                return False
+            self._pinned = bool(cache.get(pin_cache_key(user.pk)))
+        return self._pinned
+
+    @property
+    def replica(self):
+        if self._replica is None:
+            self._replica = random.choice(settings.DATABASE_REPLICAS)
+        return self._replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current_state.get()
+        if (
+            state is None or not state.use_replica or state.wrote
+            or model._meta.app_label not in settings.DB_REPLICA_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or state.pinned
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Tracks the routing state of each request. Place after AuthenticationMiddleware."""
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_state.reset(token)
+        if state.wrote:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _current_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_state.reset(token)
+        if state.wrote:
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def pin(self, request, response):
+        window = settings.DB_REPLICA_STICKY_SECONDS
+        if window <= 0:
+            return
+        response.set_cookie(PIN_COOKIE, '1', max_age=window, httponly=True, samesite='Lax')
+        # DRF stores the authenticated (e.g. JWT) user on the Django request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(pin_cache_key(user.pk), 1, window)
@@ -0,0 +1,90 @@
+"""
+Offline download licenses.
+
+A download's license runs for DOWNLOAD_LICENSE_DAYS. `expire_downloads()`
+(the expire-downloads beat task) flips live downloads past `expires_at` to
+EXPIRED in batches, walking the (expires_at, download_status) index, so
+expired rows drop out of the status filters in DownloadViewSet instead of
+being checked with `is_expired()` row by row. `renew_device_licenses()`
+extends every download on a device with a single UPDATE, downgrading
+downloads above HD when the plan no longer supports UHD.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .models import Download
+
+LIVE_STATUSES = (
+    Download.DownloadStatus.PENDING,
+    Download.DownloadStatus.DOWNLOADING,
+    Download.DownloadStatus.COMPLETED,
+)
+# Qualities a plan without supports_uhd may not hold (CHECK 3 in DownloadViewSet.create)
+ABOVE_HD = (Download.VideoQuality.FHD, Download.VideoQuality.UHD)
+
+
+def license_expiry(now=None):
+    return (now or timezone.now()) + timedelta(days=settings.DOWNLOAD_LICENSE_DAYS)
+
+
+def active_download_device_ids(user, now=None):
+    """Devices of `user` holding live, unexpired downloads (they count against max_download_devices)."""
+    return set(
+        Download.objects.filter(
+            profile__user=user, download_status__in=LIVE_STATUSES, expires_at__gt=now or timezone.now(),
+        ).order_by().values_list('device_id', flat=True).distinct()
+    )
+
+
+def expire_downloads(batch_size=None):
+    """Mark live downloads past expires_at EXPIRED, one UPDATE per batch. Returns how many were expired."""
+    batch_size = batch_size or settings.DOWNLOAD_EXPIRY_BATCH
+    now = timezone.now()
+    due = Download.objects.filter(expires_at__lte=now, download_status__in=LIVE_STATUSES)
+    expired = 0
+    while True:
+        ids = list(due.order_by('expires_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Re-check the conditions: a renewal may have landed since the ids were read.
+        expired += due.filter(id__in=ids).update(download_status=Download.DownloadStatus.EXPIRED, updated_at=now)
+        if len(ids) < batch_size:
+            break
+    return expired
+
+
+def renew_device_licenses(device, supports_uhd, now=None):
+    """
+    Extend the license of every download on `device` (failed ones excepted) with
+    one UPDATE. Expired downloads come back as completed if they had finished,
+    otherwise as pending. Without `supports_uhd`, FHD/UHD downloads are renewed
+    as HD and go back to pending so the device fetches the HD file, as
+    DownloadViewSet.create would have downgraded them. Returns (rows renewed,
+    new expires_at).
+    """
+    now = now or timezone.now()
+    expires_at = license_expiry(now)
+    expired = Download.DownloadStatus.EXPIRED
+    status_whens = [
+        When(download_status=expired, progress_percentage__gte=100, then=Value(Download.DownloadStatus.COMPLETED)),
+        When(download_status=expired, then=Value(Download.DownloadStatus.PENDING)),
+    ]
+    updates = {}
+    if not supports_uhd:
+        # All Cases read the pre-update row, so `downgrade` still sees the old quality.
+        downgrade = Q(video_quality__in=ABOVE_HD)
+        status_whens.insert(0, When(downgrade, then=Value(Download.DownloadStatus.PENDING)))
+        updates = {
+            'video_quality': Case(When(downgrade, then=Value(Download.VideoQuality.HD)), default=F('video_quality')),
+            'progress_percentage': Case(When(downgrade, then=Value(0)), default=F('progress_percentage')),
+        }
+    renewed = Download.objects.filter(device=device).exclude(download_status=Download.DownloadStatus.FAILED).update(
+        expires_at=expires_at,
+        download_status=Case(*status_whens, default=F('download_status')),
+        updated_at=now,
+        **updates,
+    )
+    return renewed, expires_at
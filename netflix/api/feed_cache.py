@@ -0,0 +1,31 @@
+"""
+Cache keys for per-profile and per-title feeds.
+
+The home screen skeleton (api/views_home.py) is cached per profile and the
+first page of a title's reviews (api/views.py) per spoiler filter. Signals
+drop them when the underlying rows change, so keys and invalidation live
+here rather than in the view modules.
+"""
+import uuid
+
+from django.core.cache import cache
+
+REVIEW_FEED_CACHE_TIMEOUT = 300
+SPOILER_FILTERS = ('all', 'true', 'false')
+
+
+def home_cache_key(profile_id):
+    # Callers pass the X-Profile-ID header or a pk; both must land on one key.
+    return f'home:{uuid.UUID(str(profile_id))}'
+
+
+def invalidate_home(profile_id):
+    cache.delete(home_cache_key(profile_id))
+
+
+def review_feed_cache_key(content_id, spoilers):
+    return f'content-reviews:{content_id}:{spoilers}'
+
+
+def invalidate_review_feed(content_id):
+    cache.delete_many([review_feed_cache_key(content_id, spoilers) for spoilers in SPOILER_FILTERS])
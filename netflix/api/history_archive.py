@@ -0,0 +1,221 @@
+"""
+Watch history storage tiers.
+
+- Hot: rows from the last WATCH_HISTORY_HOT_MONTHS calendar months. This is
+  all WatchHistoryViewSet lists unless the client asks for a date range.
+- Postgres: `watch_history` is range partitioned by month on
+  `watch_started_at` (migration 0019), so hot listings and date-range
+  queries only touch the matching partitions. `ensure_partitions()` (a
+  daily beat task) creates the coming months ahead of time; rows outside
+  every monthly partition land in `watch_history_default`.
+- Archive: `archive_rows()` (`manage.py archive_watch_history`) moves rows
+  older than a cutoff out of `watch_history` into gzip NDJSON chunks, either
+  in the `WatchHistoryArchive` table or as `.ndjson.gz` files, and drops
+  Postgres partitions left empty. Archived rows are no longer served by the
+  API; UserContentInteraction totals are not affected.
+"""
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import WatchHistory, WatchHistoryArchive
+
+TABLE = 'watch_history'
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_FIELDS = [field.attname for field in WatchHistory._meta.concrete_fields]
+BATCH_SIZE = 10000
+
+
+# ==================== MONTHS ====================
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(moment, months):
+    years, month = divmod(moment.month - 1 + months, 12)
+    return moment.replace(year=moment.year + years, month=month + 1)
+
+
+def hot_cutoff(now=None):
+    """Start of the oldest month still considered hot."""
+    return add_months(month_start(now or timezone.now()), -(settings.WATCH_HISTORY_HOT_MONTHS - 1))
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+# ==================== POSTGRES PARTITIONS ====================
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace',
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def _create_partition_sql(month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead=3, using='default'):
+    """Create monthly partitions up to `months_ahead` months from now. Returns the names created or kept."""
+    connection = connections[using]
+    if not is_partitioned(connection):
+        return []
+    current = month_start(timezone.now())
+    months = [add_months(current, offset) for offset in range(months_ahead + 1)]
+    with connection.cursor() as cursor:
+        for month in months:
+            cursor.execute(_create_partition_sql(month))
+    return [partition_name(month) for month in months]
+
+
+def drop_empty_partitions(before, using='default'):
+    """Drop monthly partitions that end at or before `before` and hold no rows."""
+    connection = connections[using]
+    if not is_partitioned(connection):
+        return []
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s',
+            [TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            suffix = name.rpartition('_p')[2]
+            if name == DEFAULT_PARTITION or not suffix.isdigit():
+                continue
+            month = datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=dt_timezone.utc)
+            if add_months(month, 1) > before:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {name})')
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'DROP TABLE {name}')
+                dropped.append(name)
+    return dropped
+
+
+def _copy_and_swap(schema_editor, model, create_sql, primary_key, after_create=()):
+    """Rebuild `model`'s table with `create_sql`, copying every row, then restore indexes and FKs."""
+    old = f'{TABLE}_old'
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+    schema_editor.execute(create_sql.format(table=TABLE, old=old))
+    for statement in after_create:
+        schema_editor.execute(statement)
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+    # Dropping the old table frees its index and constraint names for reuse.
+    schema_editor.execute(f'DROP TABLE {old} CASCADE')
+    schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})')
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+        for statement in schema_editor._field_indexes_sql(model, field):
+            schema_editor.execute(statement)
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def convert_to_partitioned(schema_editor, model):
+    """
+    Turn the plain watch_history table into a monthly range-partitioned one.
+    The primary key becomes (id, watch_started_at), as Postgres requires the
+    partition key in it; ids stay unique because they are random UUIDs.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(watch_started_at) FROM {TABLE}')
+        oldest = cursor.fetchone()[0] or timezone.now()
+    month, last = month_start(oldest), add_months(month_start(timezone.now()), 3)
+    partitions = []
+    while month <= last:
+        partitions.append(_create_partition_sql(month))
+        month = add_months(month, 1)
+    partitions.append(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+    _copy_and_swap(
+        schema_editor, model,
+        'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (watch_started_at)',
+        'id, watch_started_at', partitions,
+    )
+
+
+def convert_to_plain(schema_editor, model):
+    _copy_and_swap(schema_editor, model, 'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', 'id')
+
+
+# ==================== ARCHIVE ====================
+def _json_default(value):
+    # Full-precision timestamps (DjangoJSONEncoder would round to milliseconds).
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f'Cannot archive {type(value).__name__}')
+
+
+def encode_rows(rows):
+    return gzip.compress('\n'.join(json.dumps(row, default=_json_default) for row in rows).encode())
+
+
+def decode_rows(payload):
+    """Archived rows as dicts (values as stored: ISO datetimes, string UUIDs)."""
+    return [json.loads(line) for line in gzip.decompress(payload).decode().splitlines()]
+
+
+def _write_file(directory, rows, payload):
+    name = f"{TABLE}-{rows[0]['watch_started_at']:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    path = os.path.join(directory, name)
+    with open(f'{path}.tmp', 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def archive_rows(cutoff, directory=None, batch_size=BATCH_SIZE, log=print):
+    """
+    Move rows with watch_started_at before `cutoff` out of watch_history, oldest
+    first, one batch per transaction. Each batch becomes a WatchHistoryArchive
+    row, or a file in `directory` if given. Returns the number of rows moved.
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                WatchHistory.objects.filter(watch_started_at__lt=cutoff)
+                .order_by('watch_started_at', 'id').values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            payload = encode_rows(rows)
+            if directory:
+                # Written before the delete commits: a failed batch is archived
+                # again next run (duplicates possible, never loss).
+                target = _write_file(directory, rows, payload)
+            else:
+                target = WatchHistoryArchive.objects.create(
+                    first_started_at=rows[0]['watch_started_at'], last_started_at=rows[-1]['watch_started_at'],
+                    row_count=len(rows), payload=payload,
+                )
+            WatchHistory.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        log(f'Archived {moved} rows (up to {rows[-1]["watch_started_at"]:%Y-%m-%d}) to {target}')
+    for name in drop_empty_partitions(month_start(cutoff)):
+        log(f'Dropped empty partition {name}')
+    return moved
@@ -0,0 +1,276 @@
+"""
+Per-request query and latency instrumentation.
+
+Opt-in with QUERY_INSTRUMENTATION_ENABLED. For every request the middleware
+records the number of SQL queries, time spent in the database, time spent
+building serializer output and total latency. Results are:
+
+- exposed as X-Query-Count / X-DB-Time-Ms / X-Serializer-Time-Ms /
+  X-Response-Time-Ms headers when DEBUG is on
+- aggregated into per-view histograms served in Prometheus text format
+  from /metrics
+- checked for N+1 patterns (the same SQL shape repeated more than
+  N_PLUS_ONE_THRESHOLD times in one request)
+
+Histograms live in process memory, so each worker exposes its own series.
+"""
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+# Latency buckets in seconds, query-count buckets in queries.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_QUOTED_RE = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """Normalize SQL so queries differing only in literals compare equal."""
+    shape = _IN_LIST_RE.sub('IN (...)', sql)
+    shape = _QUOTED_RE.sub('?', shape)
+    shape = _NUMBER_RE.sub('?', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+class RequestMetrics:
+    """Counters for a single request; doubles as a connection execute wrapper."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.shapes = Counter()
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def repeated_shapes(self, threshold):
+        return {shape: count for shape, count in self.shapes.items() if count > threshold}
+
+
+def current_metrics():
+    """Return the RequestMetrics of the request being served, if any."""
+    return _current_metrics.get()
+
+
+# ==================== PROMETHEUS REGISTRY ====================
+def _format_labels(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Histogram:
+    """Cumulative histogram keyed by the `view` label."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}
+
+    def observe(self, view, value):
+        series = self._series.get(view)
+        if series is None:
+            series = self._series[view] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['counts'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for view, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series['counts']):
+                labels = _format_labels([('view', view), ('le', _format_bound(bound))])
+                lines.append(f'{self.name}_bucket{{{labels}}} {count}')
+            labels = _format_labels([('view', view)])
+            lines.append(f'{self.name}_sum{{{labels}}} {series["sum"]}')
+            lines.append(f'{self.name}_count{{{labels}}} {series["count"]}')
+        return lines
+
+
+class ViewCounter:
+    """Monotonic counter keyed by the `view` label."""
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = Counter()
+
+    def inc(self, view, amount=1):
+        self._values[view] += amount
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} counter',
+        ]
+        for view, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{{{_format_labels([("view", view)])}}} {value}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            'api_request_duration_seconds', 'Total request latency.', LATENCY_BUCKETS
+        )
+        self.db_time = Histogram(
+            'api_request_db_seconds', 'Time spent executing SQL per request.', LATENCY_BUCKETS
+        )
+        self.serializer_time = Histogram(
+            'api_request_serializer_seconds', 'Time spent building serializer output per request.', LATENCY_BUCKETS
+        )
+        self.queries = Histogram(
+            'api_request_queries', 'SQL queries issued per request.', QUERY_BUCKETS
+        )
+        self.n_plus_one = ViewCounter(
+            'api_n_plus_one_total', 'Requests where one SQL shape repeated above the N+1 threshold.'
+        )
+
+    def observe(self, view, metrics, total_time, repeated):
+        with self._lock:
+            self.latency.observe(view, total_time)
+            self.db_time.observe(view, metrics.db_time)
+            self.serializer_time.observe(view, metrics.serializer_time)
+            self.queries.observe(view, metrics.query_count)
+            if repeated:
+                self.n_plus_one.inc(view)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.latency, self.db_time, self.serializer_time, self.queries, self.n_plus_one):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ==================== SERIALIZER TIMING ====================
+def install_serializer_timing():
+    """
+    Wrap BaseSerializer.data so time spent producing serializer output is
+    attributed to the current request. Serializer.data and ListSerializer.data
+    both go through it via super(), nested serializers do not, so each
+    top-level serialization is timed exactly once.
+    """
+    original = serializers.BaseSerializer.data
+    if getattr(original.fget, 'instrumented', False):
+        return
+
+    def data(self):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics._serializer_depth:
+            return original.fget(self)
+        metrics._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics._serializer_depth -= 1
+
+    data.instrumented = True
+    serializers.BaseSerializer.data = property(data)
+
+
+# ==================== MIDDLEWARE & VIEW ====================
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, DB time, serializer time and latency per request.
+    Should be first in MIDDLEWARE so latency covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        total_time = time.perf_counter() - start
+
+        view = _view_label(request)
+        repeated = metrics.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD)
+        REGISTRY.observe(view, metrics, total_time, repeated)
+
+        for shape, count in repeated.items():
+            logger.warning(f"Possible N+1 in {view}: {count}x {shape[:200]}")
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(metrics.query_count)
+            response['X-DB-Time-Ms'] = f'{metrics.db_time * 1000:.2f}'
+            response['X-Serializer-Time-Ms'] = f'{metrics.serializer_time * 1000:.2f}'
+            response['X-Response-Time-Ms'] = f'{total_time * 1000:.2f}'
+            if repeated:
+                response['X-N-Plus-One'] = str(max(repeated.values()))
+
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; 404 unless instrumentation is enabled. Open to
+    staff sessions and to `Authorization: Bearer <METRICS_TOKEN>` (scrapers).
+    """
+    if not settings.QUERY_INSTRUMENTATION_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    if not scraper and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
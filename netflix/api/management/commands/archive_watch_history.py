@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.history_archive import BATCH_SIZE, add_months, archive_rows, month_start
+from api.models import WatchHistory
+
+
+class Command(BaseCommand):
+    help = 'Move watch history older than N months out of watch_history into compressed archive chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.WATCH_HISTORY_ARCHIVE_MONTHS,
+                            help='Keep this many calendar months (default WATCH_HISTORY_ARCHIVE_MONTHS).')
+        parser.add_argument('--to-dir', help='Write .ndjson.gz files here instead of the watch_history_archive table.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would move.')
+
+    def handle(self, *args, **options):
+        cutoff = add_months(month_start(timezone.now()), -options['months'])
+        if options['dry_run']:
+            count = WatchHistory.objects.filter(watch_started_at__lt=cutoff).count()
+            self.stdout.write(f'{count} rows started before {cutoff:%Y-%m-%d} would be archived.')
+            return
+
+        moved = archive_rows(cutoff, directory=options['to_dir'], batch_size=options['batch_size'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} watch history rows started before {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.autocomplete import Autocomplete
+
+
+class Command(BaseCommand):
+    help = 'Build the title / cast typeahead index and write it to AUTOCOMPLETE_SNAPSHOT_PATH.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.AUTOCOMPLETE_SNAPSHOT_PATH,
+                            help='Snapshot file (defaults to AUTOCOMPLETE_SNAPSHOT_PATH).')
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError('No snapshot path: set AUTOCOMPLETE_SNAPSHOT_PATH or pass --path.')
+
+        start = time.perf_counter()
+        index = Autocomplete.build()
+        index.save(options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index.titles)} titles and {len(index.cast)} cast members "
+            f"in {time.perf_counter() - start:.2f}s -> {options['path']}"
+        ))
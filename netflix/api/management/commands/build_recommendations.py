@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.recommendations import build_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item-item similarity lists used by /api/recommendations/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbors', type=int, help='Similar titles kept per title (default RECOMMENDATION_NEIGHBORS).')
+
+    def handle(self, *args, **options):
+        stored = build_neighbors(size=options['neighbors'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f'Recommendations built: neighbors stored for {stored} titles.'))
@@ -0,0 +1,33 @@
+"""
+Check that the stream-limit queries are index-only scans (see
+api/query_plans.py). Exits non-zero on failure, so it can run in CI after
+`migrate`.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import User
+from api.query_plans import INDEX, VENDORS, stream_limit_plans
+
+
+class Command(BaseCommand):
+    help = 'Fail unless the stream-limit queries on device_login are index-only scans.'
+
+    def handle(self, *args, **options):
+        if connection.vendor not in VENDORS:
+            raise CommandError(f'Query plans are only checked on SQLite and Postgres, not {connection.vendor}.')
+        user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('No users found; the checked queries need a user id.')
+
+        failed = []
+        for name, sql, plan, index_only in stream_limit_plans(user):
+            self.stdout.write(f'{name}: {sql}\n    {plan}')
+            if index_only:
+                self.stdout.write(self.style.SUCCESS('    index-only scan'))
+            else:
+                self.stdout.write(self.style.ERROR(f'    not an index-only scan on {INDEX}'))
+                failed.append(name)
+
+        if failed:
+            raise CommandError(f'{len(failed)} query plan(s) failed: {", ".join(failed)}')
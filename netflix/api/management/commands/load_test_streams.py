@@ -0,0 +1,228 @@
+"""
+Streaming-session load test against a running server.
+
+Opens --sessions concurrent keep-alive connections, one per simulated
+viewer. Each viewer selects a profile, sends a heartbeat every --interval
+seconds for --duration seconds, checks its active streams every
+--active-every heartbeats and logs out. --mode picks the sync DRF endpoints
+or their /api/async/ versions, so the same run can be pointed at WSGI
+workers (gunicorn) and at ASGI workers (uvicorn):
+
+    gunicorn netflix.wsgi -w 8 --threads 4 -b :8000
+    python manage.py load_test_streams --url http://127.0.0.1:8000 --mode sync --sessions 5000
+
+    uvicorn netflix.asgi:application --workers 8 --port 8000
+    python manage.py load_test_streams --url http://127.0.0.1:8000 --mode async --sessions 5000
+
+Viewers are the seeded benchmark users (`seed_benchmark_data`), up to their
+plan's stream limit each, on temporary devices that are deleted afterwards.
+Raise the open-file limit (`ulimit -n`) above --sessions on both sides.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmarks.harness import percentile, write_results
+from api.benchmarks.seed import BENCH_EMAIL_DOMAIN
+from api.models import Content, Device, DeviceLogin, Profile, User, UserSubscription
+
+DEVICE_PREFIX = 'Load Test Device'
+
+PATHS = {
+    'sync': {
+        'select': '/api/profile/select/',
+        'heartbeat': '/api/watch-progress/',
+        'active': '/api/stream/active/',
+        'logout': '/api/stream/logout/',
+    },
+    'async': {
+        'select': '/api/async/profile/select/',
+        'heartbeat': '/api/async/stream/heartbeat/',
+        'active': '/api/async/stream/active/',
+        'logout': '/api/async/stream/logout/',
+    },
+}
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client (JSON in, status and body out)."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}', f'Content-Length: {len(payload)}']
+        if body is not None:
+            head.append('Content-Type: application/json')
+        head.extend(f'{name}: {value}' for name, value in headers.items())
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.strip().lower() == 'close':
+                close = True
+        data = await self.reader.readexactly(length) if length else b''
+        if close:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+
+class Command(BaseCommand):
+    help = 'Simulate concurrent streaming sessions against a running server (sync vs async endpoints).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--mode', choices=sorted(PATHS), default='async')
+        parser.add_argument('--sessions', type=int, default=5000)
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of heartbeats per session.')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between heartbeats.')
+        parser.add_argument('--ramp', type=float, default=10, help='Seconds over which sessions start.')
+        parser.add_argument('--active-every', type=int, default=3, help='Check active streams every N heartbeats.')
+        parser.add_argument('--output', help='Results file (default: benchmark_results/load-<mode>-<timestamp>.json).')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// targets are supported.')
+        viewers = self.prepare(options['sessions'])
+        self.stdout.write(f'{len(viewers)} viewers ready, running {options["mode"]} load against {options["url"]}...')
+        try:
+            results = asyncio.run(self.run_load(url.hostname, url.port or 80, viewers, options))
+        finally:
+            Device.objects.filter(user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}', device_name__startswith=DEVICE_PREFIX).delete()
+
+        output = options['output']
+        if not output:
+            os.makedirs('benchmark_results', exist_ok=True)
+            output = os.path.join('benchmark_results', f'load-{options["mode"]}-{timezone.now():%Y%m%d-%H%M%S}.json')
+        write_results(output, f'load-{options["mode"]}', results)
+        for result in results:
+            self.stdout.write(
+                f'{result["name"]:<12} {result["iterations"]:>8} req  {result["rps"]:>8} req/s  '
+                f'p50 {result["p50_ms"]:>8} ms  p95 {result["p95_ms"]:>8} ms  p99 {result["p99_ms"]:>8} ms  '
+                f'errors {result["errors"]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    # ==================== SETUP ====================
+    def prepare(self, sessions):
+        """[(token, device id, profile id, content id)], one temporary device per viewer."""
+        content_ids = list(Content.objects.values_list('id', flat=True)[:1000])
+        if not content_ids:
+            raise CommandError('No content found. Run `manage.py seed_benchmark_data` first.')
+        subscriptions = list(
+            UserSubscription.objects.filter(
+                user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}',
+                status=UserSubscription.SubscriptionStatus.ACTIVE, current_period_end__gt=timezone.now(),
+            ).select_related('subscription_plan').order_by('user_id')
+        )
+        # Free every seeded user's slots; servers prune logged-out sessions from their slot store.
+        DeviceLogin.objects.filter(
+            user__email__endswith=f'@{BENCH_EMAIL_DOMAIN}', logout_at__isnull=True,
+        ).update(logout_at=timezone.now())
+
+        rng = random.Random(7)
+        viewers, devices = [], []
+        users = User.objects.in_bulk([subscription.user_id for subscription in subscriptions])
+        profiles = {}
+        for user_id, profile_id in Profile.objects.filter(user_id__in=users).values_list('user_id', 'id'):
+            profiles.setdefault(user_id, []).append(profile_id)
+        for subscription in subscriptions:
+            user_profiles = profiles.get(subscription.user_id)
+            if not user_profiles:
+                continue
+            token = str(AccessToken.for_user(users[subscription.user_id]))
+            for slot in range(subscription.subscription_plan.max_concurrent_streams):
+                device = Device(user_id=subscription.user_id, device_type=Device.DeviceType.SMART_TV, device_name=f'{DEVICE_PREFIX} {slot}')
+                devices.append(device)
+                viewers.append((token, str(device.id), str(user_profiles[slot % len(user_profiles)]), str(rng.choice(content_ids))))
+                if len(viewers) == sessions:
+                    break
+            if len(viewers) == sessions:
+                break
+        if len(viewers) < sessions:
+            raise CommandError(f'Only {len(viewers)} stream slots among seeded users; seed a larger --scale.')
+        Device.objects.bulk_create(devices, batch_size=1000)
+        return viewers
+
+    # ==================== LOAD ====================
+    async def run_load(self, host, port, viewers, options):
+        paths = PATHS[options['mode']]
+        timings = {name: [] for name in paths}
+        statuses = {name: Counter() for name in paths}
+
+        async def call(connection, name, method, headers, body=None):
+            started = time.perf_counter()
+            try:
+                status, _ = await connection.request(method, paths[name], headers, body)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                await connection.close()
+                status = 0
+            timings[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+            return status
+
+        async def viewer(index, token, device_id, profile_id, content_id):
+            await asyncio.sleep(options['ramp'] * index / len(viewers))
+            connection = Connection(host, port)
+            headers = {'Authorization': f'Bearer {token}', 'X-Device-ID': device_id, 'X-Profile-ID': profile_id}
+            try:
+                await call(connection, 'select', 'POST', headers, {'profile_id': profile_id})
+                position = 0
+                heartbeats = max(1, int(options['duration'] / options['interval']))
+                for beat in range(1, heartbeats + 1):
+                    await asyncio.sleep(options['interval'] * random.uniform(0.9, 1.1))
+                    position += int(options['interval'])
+                    await call(connection, 'heartbeat', 'POST', headers, {'content_id': content_id, 'resume_time_seconds': position})
+                    if beat % options['active_every'] == 0:
+                        await call(connection, 'active', 'GET', headers)
+                await call(connection, 'logout', 'POST', headers, {})
+            finally:
+                await connection.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(viewer(index, *entry) for index, entry in enumerate(viewers)))
+        elapsed = time.perf_counter() - started
+
+        results = []
+        for name, samples in timings.items():
+            errors = sum(count for status, count in statuses[name].items() if not 200 <= status < 300)
+            results.append({
+                'name': name,
+                'sessions': len(viewers),
+                'iterations': len(samples),
+                'rps': round(len(samples) / elapsed, 1),
+                'p50_ms': round(percentile(samples, 50) * 1000, 2),
+                'p95_ms': round(percentile(samples, 95) * 1000, 2),
+                'p99_ms': round(percentile(samples, 99) * 1000, 2),
+                'errors': errors,
+                'statuses': {str(status): count for status, count in sorted(statuses[name].items())},
+            })
+        return results
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.rating_stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-content rating statistics from the rating table.'
+
+    def handle(self, *args, **options):
+        written, deleted = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rating stats reconciled: {written} rows written, {deleted} stale rows removed.'
+        ))
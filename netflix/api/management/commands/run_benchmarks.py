@@ -0,0 +1,48 @@
+import os
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.benchmarks import SUITES
+from api.benchmarks.harness import compare, load_results, write_results
+
+
+class Command(BaseCommand):
+    help = 'Run a benchmark suite and store the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', choices=sorted(SUITES), default='endpoints')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--scale', type=float, default=0.01,
+                            help='Dataset size for suites that build their own data.')
+        parser.add_argument('--output', help='Results file (default: benchmark_results/<suite>-<timestamp>.json).')
+        parser.add_argument('--compare', dest='baseline', help='Previous results file to compare against.')
+
+    def handle(self, *args, **options):
+        suite = options['suite']
+        results = import_module(SUITES[suite]).run(options)
+
+        output = options['output']
+        if not output:
+            os.makedirs('benchmark_results', exist_ok=True)
+            stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+            output = os.path.join('benchmark_results', f'{suite}-{stamp}.json')
+        write_results(output, suite, results)
+
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<32} " + ' '.join(
+                    f'{key}={value}' for key, value in result.items() if key not in ('name',)
+                )
+            )
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['baseline']:
+            try:
+                previous = load_results(options['baseline'])
+            except OSError as e:
+                raise CommandError(f'Cannot read baseline: {e}')
+            self.stdout.write(f"\nCompared with {options['baseline']}:")
+            for name, metric, before, after, change in compare(previous, results):
+                self.stdout.write(f'{name:<32} {metric:<20} {before} -> {after} ({change:+}%)')
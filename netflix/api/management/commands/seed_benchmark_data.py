@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.seed import CatalogSeeder, counts_for_scale
+from api.catalog_cache import bump_catalog_version
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Seed a large deterministic catalog, users and watch history for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Fraction of the full dataset (1.0 = 100k content, 1M watch history rows).')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data.')
+        parser.add_argument('--flush', action='store_true', help='Remove previously seeded rows first.')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            CatalogSeeder.flush(log=self.stdout.write)
+        elif CatalogSeeder.is_seeded():
+            raise CommandError('Benchmark data already present. Use --flush to reseed.')
+
+        counts = counts_for_scale(options['scale'])
+        self.stdout.write(f'Seeding benchmark data: {counts}')
+        CatalogSeeder(scale=options['scale'], seed=options['seed'], log=self.stdout.write).seed()
+        # bulk_create skips signals, so invalidate caches and index for search explicitly.
+        bump_catalog_version()
+        self.stdout.write('Indexing catalog for search...')
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Benchmark data seeded.'))
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _path(name):
+    # Replicas are configured as read-only URIs: file:<path>?mode=ro
+    return str(name).removeprefix('file:').split('?')[0]
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary onto the SQLite replicas (local stand-in for replication).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep copying every N seconds; the interval simulates replication lag.')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if settings.DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3'
+        ]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3' or not replicas:
+            raise CommandError('Needs DB_ENGINE=sqlite and SQLite paths in DB_REPLICAS.')
+
+        while True:
+            source = sqlite3.connect(_path(primary['NAME']))
+            try:
+                for alias in replicas:
+                    target = sqlite3.connect(_path(settings.DATABASES[alias]['NAME']), timeout=30)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+                    self.stdout.write(f'Copied primary to {alias}.')
+            finally:
+                source.close()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
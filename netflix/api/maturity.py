@@ -0,0 +1,117 @@
+"""
+Profile-aware maturity filtering for catalog endpoints.
+
+Maturity levels are few and rarely change, so instead of joining
+maturity_level on every catalog query the eligible level ids are
+precomputed per age bracket (one bracket per distinct `minimum_age`) and
+cached per catalog version. Catalog queries then filter on
+`maturity_level_id IN (...)`. Movie and TV show listings are paginated
+newest release first, so they are served by a partial (content_type,
+release_date, maturity_level) index over live rows: it is read in page
+order and ineligible titles are skipped on the index entry, with no table
+read for them.
+"""
+import bisect
+import uuid
+
+from django.core.cache import cache
+from rest_framework import serializers
+
+from .catalog_cache import catalog_version
+from .models import MaturityLevel, Profile
+
+# Kid profiles never see titles above this age, whatever age is stored.
+KIDS_MAX_AGE = 12
+UNFILTERED = 'all'
+PROFILE_AGE_TIMEOUT = 300
+
+
+def maturity_brackets():
+    """
+    {'thresholds': sorted distinct minimum ages, 'eligible': {threshold: [level ids]}},
+    cached until the catalog changes.
+    """
+    key = f'maturity:brackets:{catalog_version()}'
+    brackets = cache.get(key)
+    if brackets is None:
+        levels = sorted(MaturityLevel.objects.values_list('minimum_age', 'id'))
+        thresholds = sorted({minimum_age for minimum_age, _ in levels})
+        brackets = {
+            'thresholds': thresholds,
+            'eligible': {
+                threshold: [level_id for minimum_age, level_id in levels if minimum_age <= threshold]
+                for threshold in thresholds
+            },
+        }
+        cache.set(key, brackets, None)
+    return brackets
+
+
+def bracket_for_age(age, brackets=None):
+    """The highest minimum age an `age`-year-old may watch, or None if nothing qualifies."""
+    brackets = brackets or maturity_brackets()
+    index = bisect.bisect_right(brackets['thresholds'], age)
+    return brackets['thresholds'][index - 1] if index else None
+
+
+def profile_age_key(user_id, profile_id):
+    return f'profile-age:{user_id}:{profile_id}'
+
+
+def invalidate_profile_age(user_id, profile_id):
+    cache.delete(profile_age_key(user_id, profile_id))
+
+
+def profile_age(user, profile_id):
+    """
+    Effective viewing age of one of `user`'s profiles (capped for kid profiles),
+    or None if it is not theirs. Cached briefly: catalog endpoints call this per
+    request; Profile signals drop the entry when the profile changes.
+    """
+    try:
+        profile_id = uuid.UUID(str(profile_id))
+    except ValueError:
+        return None
+    key = profile_age_key(user.pk, profile_id)
+    age = cache.get(key)
+    if age is None:
+        row = Profile.objects.filter(id=profile_id, user=user).values_list('age', 'is_kid_profile').first()
+        if row is None:
+            return None
+        age, is_kid = row
+        if is_kid:
+            age = min(age, KIDS_MAX_AGE)
+        cache.set(key, age, PROFILE_AGE_TIMEOUT)
+    return age
+
+
+class MaturityFilterMixin:
+    """
+    Restrict a catalog viewset to what the X-Profile-ID profile may watch.
+    Without the header the catalog is unfiltered. Place it before
+    CatalogCacheMixin so cached documents are split per age bracket.
+    """
+
+    def get_viewer_bracket(self):
+        """UNFILTERED without a profile, else the profile's bracket (None: nothing eligible)."""
+        if not hasattr(self, '_viewer_bracket'):
+            profile_id = self.request.headers.get('X-Profile-ID')
+            if not profile_id:
+                self._viewer_bracket = UNFILTERED
+            else:
+                age = profile_age(self.request.user, profile_id)
+                if age is None:
+                    raise serializers.ValidationError("Invalid profile.")
+                self._viewer_bracket = bracket_for_age(age)
+        return self._viewer_bracket
+
+    def filter_by_maturity(self, queryset):
+        bracket = self.get_viewer_bracket()
+        if bracket == UNFILTERED:
+            return queryset
+        if bracket is None:
+            return queryset.none()
+        return queryset.filter(maturity_level_id__in=maturity_brackets()['eligible'][bracket])
+
+    def catalog_cache_variant(self, request):
+        return f'maturity:{self.get_viewer_bracket()}'
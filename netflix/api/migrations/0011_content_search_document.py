@@ -0,0 +1,100 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# SQLite: external-content FTS5 table over content_search_document, kept in
+# sync by triggers. Prefix indexes serve as-you-type queries.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE content_search USING fts5(
+        title, description, cast_names, genre_names,
+        content='content_search_document', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER content_search_ai AFTER INSERT ON content_search_document BEGIN
+        INSERT INTO content_search(rowid, title, description, cast_names, genre_names)
+        VALUES (new.id, new.title, new.description, new.cast_names, new.genre_names);
+    END
+    """,
+    """
+    CREATE TRIGGER content_search_ad AFTER DELETE ON content_search_document BEGIN
+        INSERT INTO content_search(content_search, rowid, title, description, cast_names, genre_names)
+        VALUES ('delete', old.id, old.title, old.description, old.cast_names, old.genre_names);
+    END
+    """,
+    """
+    CREATE TRIGGER content_search_au AFTER UPDATE ON content_search_document BEGIN
+        INSERT INTO content_search(content_search, rowid, title, description, cast_names, genre_names)
+        VALUES ('delete', old.id, old.title, old.description, old.cast_names, old.genre_names);
+        INSERT INTO content_search(rowid, title, description, cast_names, genre_names)
+        VALUES (new.id, new.title, new.description, new.cast_names, new.genre_names);
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS content_search_au',
+    'DROP TRIGGER IF EXISTS content_search_ad',
+    'DROP TRIGGER IF EXISTS content_search_ai',
+    'DROP TABLE IF EXISTS content_search',
+]
+
+# Postgres: weighted tsvector generated from the document columns, GIN indexed.
+# Text is already normalized by api.search, so the 'simple' configuration is enough.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE content_search_document ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(cast_names, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(genre_names, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX content_search_document_gin ON content_search_document USING GIN (document)',
+]
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS content_search_document_gin',
+    'ALTER TABLE content_search_document DROP COLUMN IF EXISTS document',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+create_fulltext_index = _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+drop_fulltext_index = _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_alter_usersubscription_stripe_subscription_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('content_type', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=500)),
+                ('description', models.TextField(blank=True, default='')),
+                ('cast_names', models.TextField(blank=True, default='')),
+                ('genre_names', models.TextField(blank=True, default='')),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='api.content')),
+            ],
+            options={
+                'db_table': 'content_search_document',
+                'indexes': [models.Index(fields=['content_type'], name='content_sea_content_7313ed_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
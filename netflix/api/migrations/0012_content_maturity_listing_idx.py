@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_content_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['maturity_level', 'is_deleted', 'release_date'], name='content_maturity_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_content_maturity_listing_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['release_date'], name='content_live_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['content_type', 'release_date'], name='content_live_type_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['maturity_level', 'release_date'], name='content_live_maturity_idx'),
+        ),
+    ]
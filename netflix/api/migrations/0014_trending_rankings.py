@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-18 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_content_live_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('high_water_mark', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ranking_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingBucket',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('country_code', models.CharField(max_length=2)),
+                ('views', models.IntegerField(default=0)),
+                ('watch_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'trending_bucket',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingRanking',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('window', models.CharField(choices=[('24h', 'Last 24 hours'), ('7d', 'Last 7 days')], max_length=3)),
+                ('country_code', models.CharField(blank=True, default='', max_length=2)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('views', models.IntegerField(default=0)),
+                ('watch_seconds', models.BigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'trending_ranking',
+                'ordering': ['window', 'country_code', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='watchhistory',
+            index=models.Index(fields=['created_at'], name='watch_histo_created_927113_idx'),
+        ),
+        migrations.AddField(
+            model_name='trendingbucket',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.content'),
+        ),
+        migrations.AddField(
+            model_name='trendingranking',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.content'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingbucket',
+            unique_together={('hour', 'country_code', 'content')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingranking',
+            unique_together={('window', 'country_code', 'rank')},
+        ),
+    ]
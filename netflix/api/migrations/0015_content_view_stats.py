@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_trending_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentViewStats',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_stats', serialize=False, to='api.content')),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('total_views', models.PositiveBigIntegerField(default=0)),
+                ('total_watch_seconds', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'content_view_stats',
+            },
+        ),
+    ]
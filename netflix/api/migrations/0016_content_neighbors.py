@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 23:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_content_view_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentNeighbors',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='api.content')),
+                ('neighbor_ids', models.BinaryField()),
+                ('scores', models.BinaryField()),
+                ('built_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'content_neighbors',
+            },
+        ),
+    ]
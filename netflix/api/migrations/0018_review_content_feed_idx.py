@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_content_rating_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_content_17c287_idx',
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['content', 'created_at', 'id'], name='review_content_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+# Postgres only: rebuild watch_history as a monthly range-partitioned table.
+# This copies every row inside the migration transaction; on a large table run
+# it in a maintenance window. DB_STATEMENT_TIMEOUT is lifted for the copy.
+def partition_watch_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('SET LOCAL statement_timeout = 0')
+    from api.history_archive import convert_to_partitioned
+    convert_to_partitioned(schema_editor, apps.get_model('api', 'WatchHistory'))
+
+
+def unpartition_watch_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('SET LOCAL statement_timeout = 0')
+    from api.history_archive import convert_to_plain
+    convert_to_plain(schema_editor, apps.get_model('api', 'WatchHistory'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_review_content_feed_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchHistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('first_started_at', models.DateTimeField()),
+                ('last_started_at', models.DateTimeField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('payload', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'watch_history_archive',
+                'indexes': [models.Index(fields=['first_started_at'], name='watch_histo_first_s_94c808_idx')],
+            },
+        ),
+        migrations.RunPython(partition_watch_history, unpartition_watch_history),
+    ]
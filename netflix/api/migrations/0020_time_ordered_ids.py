@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-19 00:02
+
+import api.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_watch_history_partitions'),
+    ]
+
+    # Only the Python-side default changes; SeparateDatabaseAndState keeps
+    # SQLite from rebuilding every table for it.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='contentcast',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='devicelogin',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='rating',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='review',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='usercontentinteraction',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='watchhistory',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='watchprogress',
+                name='id',
+                field=models.UUIDField(default=api.ids.interaction_id, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-19 00:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH = 5000
+
+
+# Copy device.user_id into device_login.user_id in primary-key batches. The
+# migration is not atomic, so each batch commits on its own and no long lock
+# is held on a large table; rerunning it only fills rows still missing a user.
+# DB_STATEMENT_TIMEOUT is lifted for the migrate session on Postgres.
+def backfill_device_login_user(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET statement_timeout = 0')
+    DeviceLogin = apps.get_model('api', 'DeviceLogin')
+    Device = apps.get_model('api', 'Device')
+    owner = Device.objects.filter(id=models.OuterRef('device_id')).values('user_id')[:1]
+    last_id = None
+    while True:
+        batch = DeviceLogin.objects.order_by('id')
+        if last_id is not None:
+            batch = batch.filter(id__gt=last_id)
+        ids = list(batch.values_list('id', flat=True)[:BACKFILL_BATCH])
+        if not ids:
+            break
+        DeviceLogin.objects.filter(id__in=ids, user__isnull=True).update(user_id=models.Subquery(owner))
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0020_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicelogin',
+            name='user',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='device_logins', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_device_login_user, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='devicelogin',
+            index=models.Index(condition=models.Q(('logout_at__isnull', True)), fields=['user', 'id', 'logout_at'], name='device_login_active_user_idx'),
+        ),
+    ]
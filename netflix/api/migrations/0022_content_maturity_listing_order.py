@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_device_login_user'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='content',
+            name='content_maturit_029074_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='content',
+            name='content_maturity_listing_idx',
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['release_date', 'maturity_level'], name='content_maturity_listing_idx'),
+        ),
+    ]
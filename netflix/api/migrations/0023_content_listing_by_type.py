@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_content_maturity_listing_order'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='content',
+            name='content_live_type_release_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='content',
+            name='content_maturity_listing_idx',
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['content_type', 'release_date', 'maturity_level'], name='content_maturity_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_content_listing_by_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('contains_spoilers', True)), fields=['content', 'created_at', 'id'], name='review_spoiler_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('contains_spoilers', False)), fields=['content', 'created_at', 'id'], name='review_clean_feed_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from django.core.validators import MinValueValidator, MaxValueValidator, MinLengthValidator
 from django.utils import timezone
 
+from .ids import interaction_id
+
 
 # ==================== CUSTOM USER MANAGER ====================
 class UserManager(BaseUserManager):
@@ -244,6 +246,12 @@ class MaturityLevel(models.Model):
         return f"{self.code} - {self.name}"
 
 
+class LiveContentManager(models.Manager):
+    """Default Content manager: soft-deleted rows are invisible. Use `Content.all_objects` to see them."""
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Content(models.Model):
     class ContentType(models.TextChoices):
         MOVIE = 'movie', 'Movie'
@@ -265,14 +273,23 @@ class Content(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
     
+    objects = LiveContentManager()
+    all_objects = models.Manager()
+    
     class Meta:
         db_table = 'content'
         indexes = [
             models.Index(fields=['release_date']),
             models.Index(fields=['content_type']),
-            models.Index(fields=['maturity_level']),
             models.Index(fields=['release_date', 'content_type']),
             models.Index(fields=['is_deleted', 'release_date']),
+            # Movie / TV show listing pages, profile-filtered or not (see api/maturity.py):
+            # walked in release order within a type, the maturity filter is checked on the
+            # index entry before the row is read
+            models.Index(fields=['content_type', 'release_date', 'maturity_level'], condition=models.Q(is_deleted=False), name='content_maturity_listing_idx'),
+            # Partial indexes over live rows only, so they do not grow with deleted content
+            models.Index(fields=['release_date'], condition=models.Q(is_deleted=False), name='content_live_release_idx'),
+            models.Index(fields=['maturity_level', 'release_date'], condition=models.Q(is_deleted=False), name='content_live_maturity_idx'),
         ]
     
     def __str__(self):
@@ -402,7 +419,7 @@ class CastMember(models.Model):
 
 
 class ContentCast(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
     cast_member = models.ForeignKey(CastMember, on_delete=models.CASCADE)
     character_name = models.CharField(max_length=255, blank=True, null=True)
@@ -422,9 +439,37 @@ class ContentCast(models.Model):
         return f"{self.content.title} - {self.cast_member.name} ({self.role_type})"
 
 
+# ==================== SEARCH INDEX MODEL ====================
+class ContentSearchDocument(models.Model):
+    """
+    Normalized search text for one searchable Content (movies and shows, not episodes).
+    The full-text structures are created by migration 0011 outside the ORM: an FTS5
+    table kept in sync by triggers on SQLite, a generated tsvector column with a GIN
+    index on Postgres. On SQLite, a migration that rebuilds this table drops those
+    triggers and must recreate them. See api/search.py.
+    """
+    id = models.BigAutoField(primary_key=True)  # doubles as the FTS5 rowid on SQLite
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, related_name='search_document')
+    content_type = models.CharField(max_length=20)
+    title = models.CharField(max_length=500)
+    description = models.TextField(blank=True, default='')
+    cast_names = models.TextField(blank=True, default='')
+    genre_names = models.TextField(blank=True, default='')
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'content_search_document'
+        indexes = [
+            models.Index(fields=['content_type']),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
 # ==================== USER INTERACTION MODELS ====================
 class WatchHistory(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='watch_history')
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='watch_history')
     watch_started_at = models.DateTimeField()
@@ -441,6 +486,7 @@ class WatchHistory(models.Model):
             models.Index(fields=['profile', '-watch_started_at']),
             models.Index(fields=['content', '-watch_started_at']),
             models.Index(fields=['profile', 'content', '-watch_started_at']),
+            models.Index(fields=['created_at']),  # incremental ranking scans (api/trending.py)
         ]
         ordering = ['-watch_started_at']
     
@@ -448,8 +494,27 @@ class WatchHistory(models.Model):
         return f"{self.profile.name} watched {self.content.title}"
 
 
+class WatchHistoryArchive(models.Model):
+    """Gzip-compressed NDJSON chunk of watch history rows moved out by `archive_watch_history`."""
+    id = models.BigAutoField(primary_key=True)
+    first_started_at = models.DateTimeField()
+    last_started_at = models.DateTimeField()
+    row_count = models.PositiveIntegerField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'watch_history_archive'
+        indexes = [
+            models.Index(fields=['first_started_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.row_count} rows {self.first_started_at:%Y-%m-%d} - {self.last_started_at:%Y-%m-%d}"
+
+
 class WatchProgress(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='watch_progress')
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='watch_progress')
     resume_time_seconds = models.IntegerField(default=0)
@@ -467,7 +532,7 @@ class WatchProgress(models.Model):
 
 
 class Rating(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='ratings')
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='ratings')
     rating_value = models.IntegerField(
@@ -489,8 +554,35 @@ class Rating(models.Model):
         return f"{self.profile.name} rated {self.content.title} {self.rating_value}/5"
 
 
+class ContentRatingStats(models.Model):
+    """Running rating totals per content, kept in step with Rating by api/rating_stats.py."""
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveBigIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'content_rating_stats'
+    
+    @property
+    def average(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+    
+    @property
+    def histogram(self):
+        return {str(star): getattr(self, f'stars_{star}') for star in range(1, 6)}
+    
+    def __str__(self):
+        return f"{self.content_id}: {self.average} ({self.rating_count})"
+
+
 class Review(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='reviews')
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='reviews')
     title = models.CharField(max_length=200, blank=True, null=True)
@@ -504,7 +596,12 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['profile']),
             models.Index(fields=['content']),
-            models.Index(fields=['content', 'created_at']),
+            # Keyset-paginated public feed: content = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=['content', 'created_at', 'id'], name='review_content_feed_idx'),
+            # Same feed with ?contains_spoilers=, one partial index per flag so neither scans past
+            # the other's rows (the filter is rendered as `[NOT] contains_spoilers`, matching the conditions)
+            models.Index(fields=['content', 'created_at', 'id'], condition=models.Q(contains_spoilers=True), name='review_spoiler_feed_idx'),
+            models.Index(fields=['content', 'created_at', 'id'], condition=models.Q(contains_spoilers=False), name='review_clean_feed_idx'),
             models.Index(fields=['profile', 'created_at']),
         ]
         ordering = ['-created_at']
@@ -514,7 +611,7 @@ class Review(models.Model):
 
 
 class UserContentInteraction(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='content_interactions')
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='user_interactions')
     total_watch_time_seconds = models.IntegerField(default=0)
@@ -538,6 +635,90 @@ class UserContentInteraction(models.Model):
         return f"{self.profile.name} - {self.content.title}"
 
 
+# ==================== RANKING MODELS ====================
+class TrendingBucket(models.Model):
+    """Hourly watch totals per content and viewer country, folded in incrementally from WatchHistory."""
+    id = models.BigAutoField(primary_key=True)
+    hour = models.DateTimeField()
+    country_code = models.CharField(max_length=2)
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='+')
+    views = models.IntegerField(default=0)
+    watch_seconds = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'trending_bucket'
+        unique_together = [['hour', 'country_code', 'content']]
+    
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H}:00 {self.country_code} {self.content_id}"
+
+
+class TrendingRanking(models.Model):
+    """Materialized top titles per window and country ('' = worldwide)."""
+    class Window(models.TextChoices):
+        DAY = '24h', 'Last 24 hours'
+        WEEK = '7d', 'Last 7 days'
+    
+    id = models.BigAutoField(primary_key=True)
+    window = models.CharField(max_length=3, choices=Window.choices)
+    country_code = models.CharField(max_length=2, blank=True, default='')
+    rank = models.PositiveSmallIntegerField()
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='+')
+    views = models.IntegerField(default=0)
+    watch_seconds = models.BigIntegerField(default=0)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'trending_ranking'
+        unique_together = [['window', 'country_code', 'rank']]
+        ordering = ['window', 'country_code', 'rank']
+    
+    def __str__(self):
+        return f"{self.window} {self.country_code or 'worldwide'} #{self.rank}"
+
+
+class ContentViewStats(models.Model):
+    """Real-time view counters folded in from api/counters.py. unique_viewers is a HyperLogLog estimate."""
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name='view_stats')
+    unique_viewers = models.PositiveIntegerField(default=0)
+    total_views = models.PositiveBigIntegerField(default=0)
+    total_watch_seconds = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'content_view_stats'
+    
+    def __str__(self):
+        return f"{self.content_id}: {self.total_views} views"
+
+
+class ContentNeighbors(models.Model):
+    """Most similar titles per content, built offline by `build_recommendations` (api/recommendations.py)."""
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name='neighbors')
+    neighbor_ids = models.BinaryField()  # packed 16-byte UUIDs, most similar first
+    scores = models.BinaryField()  # float32 cosine similarities aligned with neighbor_ids
+    built_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'content_neighbors'
+    
+    def __str__(self):
+        return f"{self.content_id}: {len(self.scores) // 4} neighbors"
+
+
+class RankingCheckpoint(models.Model):
+    """High-water mark of the last WatchHistory.created_at folded into rankings."""
+    name = models.CharField(max_length=50, primary_key=True)
+    high_water_mark = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ranking_checkpoint'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
+
+
 # ==================== DEVICE MODELS ====================
 class Device(models.Model):
     class DeviceType(models.TextChoices):
@@ -572,8 +753,11 @@ class Device(models.Model):
 
 
 class DeviceLogin(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=interaction_id, editable=False)
     device = models.ForeignKey(Device, on_delete=models.CASCADE, related_name='logins')
+    # Copy of device.user (set in save()) so stream-limit queries need no join to device.
+    # Nullable only so the column could be added and backfilled without rewriting the table.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='device_logins', null=True, editable=False)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='device_logins')
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     location_country = models.CharField(max_length=2, blank=True, null=True)
@@ -587,9 +771,17 @@ class DeviceLogin(models.Model):
             models.Index(fields=['profile']),
             models.Index(fields=['device', 'login_at']),
             models.Index(fields=['profile', 'login_at']),
+            # Active sessions only: stream counts and slot seeding are index-only scans.
+            # logout_at is always NULL here; it is a key column so SQLite treats the index as covering.
+            models.Index(fields=['user', 'id', 'logout_at'], condition=models.Q(logout_at__isnull=True), name='device_login_active_user_idx'),
         ]
         ordering = ['-login_at']
     
+    def save(self, *args, **kwargs):
+        if self.user_id is None:
+            self.user_id = self.device.user_id
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.profile.name} on {self.device.device_name} at {self.login_at}"
 
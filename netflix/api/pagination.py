@@ -0,0 +1,98 @@
+"""
+Catalog and keyset (seek) pagination.
+
+Movie and TV show listings use plain page numbers over a catalog that
+changes rarely; they are ordered newest release first, so a page is a range
+of the (content_type, release_date, maturity_level) listing index.
+
+Keyset pages are newest first on (`ordering_field`, id). The cursor is the sort key
+of the last row served, and the next page filters on "strictly before it"
+instead of using OFFSET, so every page costs the same index range scan no
+matter how deep the client scrolls, and rows added meanwhile do not shift
+pages. No total count is computed.
+"""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CatalogPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    ordering_field = 'created_at'
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, obj):
+        position = f'{getattr(obj, self.ordering_field).isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            value, pk = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+            return datetime.fromisoformat(value), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound('Invalid cursor.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-pk')
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__lt': value}) | Q(**{self.ordering_field: value, 'pk__lt': pk})
+            )
+        rows = list(queryset[:self.page_size + 1])
+        self.next_cursor = self.encode_cursor(rows[self.page_size - 1]) if len(rows) > self.page_size else None
+        return rows[:self.page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def is_first_page(self, request):
+        """No cursor and the default page size: the page worth caching."""
+        return (
+            self.cursor_query_param not in request.query_params
+            and self.get_page_size(request) == type(self).page_size
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,49 @@
+"""
+Request parsers.
+
+ORJSONParser decodes JSON request bodies with orjson when it is installed,
+falling back to DRF's JSONParser otherwise (or for non UTF-8 payloads).
+
+MessagePackParser accepts application/msgpack bodies, decoding the UUID
+ext type and Timestamps produced by MessagePackRenderer.
+"""
+import uuid
+
+import msgpack
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import UUID_EXT_TYPE, orjson
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser backed by orjson. Handles application/json."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def _msgpack_ext_hook(code, data):
+    if code == UUID_EXT_TYPE and len(data) == 16:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackParser(BaseParser):
+    """Parses application/msgpack request bodies."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3, ext_hook=_msgpack_ext_hook)
+        except ValueError as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
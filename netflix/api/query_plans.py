@@ -0,0 +1,61 @@
+"""
+Query plans of the stream-limit queries.
+
+The stream count behind ProfileSelectView and the session ids that seed the
+stream-slot store must read only the partial index on active sessions:
+`USING COVERING INDEX` on SQLite, an `Index Only Scan` node on Postgres.
+`stream_limit_plans()` runs the real queries, EXPLAINs the SQL they sent
+and reports whether each plan is index-only. On Postgres sequential and
+bitmap scans are disabled for the check, so a small table does not hide a
+missing index. Used by the tests and the `check_query_plans` command.
+"""
+import json
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from .stream_slots import _active_sessions
+from .views_device import active_stream_count
+
+INDEX = 'device_login_active_user_idx'
+VENDORS = ('sqlite', 'postgresql')
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def explain(sql):
+    """(plan summary, index-only on INDEX) for one captured statement."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            raw = cursor.fetchone()[0]
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+            nodes = list(_plan_nodes(plan))
+            summary = ' -> '.join(f'{node["Node Type"]} {node.get("Index Name", "")}'.strip() for node in nodes)
+            return summary, any(
+                node['Node Type'] == 'Index Only Scan' and node.get('Index Name') == INDEX for node in nodes
+            )
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+        return '; '.join(details), any(f'USING COVERING INDEX {INDEX}' in detail for detail in details)
+
+
+def stream_limit_plans(user):
+    """[(name, sql, plan summary, index-only)] for the stream-limit queries of `user`."""
+    checks = [
+        ('active stream count', lambda: active_stream_count(user)),
+        ('stream slot seed', lambda: list(_active_sessions(user.pk))),
+    ]
+    results = []
+    for name, run in checks:
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        sql = queries.captured_queries[-1]['sql']
+        results.append((name, sql, *explain(sql)))
+    return results
@@ -0,0 +1,77 @@
+"""
+Per-content rating aggregates.
+
+`ContentRatingStats` holds the count, sum and per-star counts of each
+title's ratings so detail responses never aggregate over `rating`. Rating
+writes apply F() deltas in the same transaction; `rebuild_stats()` (the
+`rebuild_rating_stats` command) recomputes everything from `rating` and
+fixes any drift, e.g. from ratings removed by cascading profile deletes.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import ContentRatingStats, Rating
+
+STARS = range(1, 6)
+STAT_FIELDS = ['rating_count', 'rating_sum'] + [f'stars_{star}' for star in STARS]
+
+
+def apply_rating_change(content_id, old_value, new_value):
+    """
+    Record a rating going from `old_value` to `new_value` (None for a new or
+    deleted rating). Call inside the transaction that writes the rating.
+    """
+    if old_value == new_value:
+        return
+    deltas = {}
+    if old_value is not None:
+        deltas['rating_count'] = deltas.get('rating_count', 0) - 1
+        deltas['rating_sum'] = deltas.get('rating_sum', 0) - old_value
+        deltas[f'stars_{old_value}'] = -1
+    if new_value is not None:
+        deltas['rating_count'] = deltas.get('rating_count', 0) + 1
+        deltas['rating_sum'] = deltas.get('rating_sum', 0) + new_value
+        deltas[f'stars_{new_value}'] = 1
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if ContentRatingStats.objects.filter(content_id=content_id).update(**updates):
+        return
+    try:
+        # First rating of this title; a concurrent first rating may win the insert.
+        with transaction.atomic():
+            ContentRatingStats.objects.create(content_id=content_id, **{f: max(d, 0) for f, d in deltas.items()})
+    except IntegrityError:
+        ContentRatingStats.objects.filter(content_id=content_id).update(**updates)
+
+
+def computed_stats():
+    """{content_id: {field: value}} aggregated from `rating`."""
+    aggregates = {
+        'rating_count': Count('id'),
+        'rating_sum': Sum('rating_value'),
+        **{f'stars_{star}': Count('id', filter=Q(rating_value=star)) for star in STARS},
+    }
+    rows = Rating.objects.values('content_id').annotate(**aggregates).order_by()
+    return {row.pop('content_id'): row for row in rows.iterator(chunk_size=2000)}
+
+
+def rebuild_stats(batch_size=1000):
+    """Make ContentRatingStats match `rating` exactly. Returns (rows written, rows deleted)."""
+    expected = computed_stats()
+    with transaction.atomic():
+        current = {
+            row.pop('content_id'): row
+            for row in ContentRatingStats.objects.select_for_update().values('content_id', *STAT_FIELDS)
+        }
+        stale = [content_id for content_id in current if content_id not in expected]
+        changed = [
+            ContentRatingStats(content_id=content_id, **values)
+            for content_id, values in expected.items() if current.get(content_id) != values
+        ]
+        ContentRatingStats.objects.filter(content_id__in=stale).delete()
+        ContentRatingStats.objects.bulk_create(
+            changed, batch_size=batch_size,
+            update_conflicts=True, unique_fields=['content'], update_fields=STAT_FIELDS + ['updated_at'],
+        )
+    return len(changed), len(stale)
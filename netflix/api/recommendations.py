@@ -0,0 +1,185 @@
+"""
+Item-item recommendations from ratings and watch time.
+
+Offline (`manage.py build_recommendations`): every profile's interactions
+become one sparse row of implicit feedback, with episodes folded onto their
+TV show. Item columns are L2-normalised, so `items.T @ items` is the
+cosine similarity matrix; it is computed a block of items at a time and
+only the top RECOMMENDATION_NEIGHBORS per item are kept, packed as raw
+16-byte UUIDs and float32 scores in `ContentNeighbors`.
+
+Online (`recommend()`): the profile's own interactions pick which neighbor
+lists to load; candidates are scored by a weighted sum of similarities with
+numpy, watched titles are dropped, and the best live, age-appropriate ones
+are returned.
+"""
+import math
+import time
+import uuid
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Content, ContentNeighbors, Rating, UserContentInteraction
+
+UUID_DTYPE = np.dtype('V16')
+BATCH_SIZE = 1000
+ITEM_BLOCK = 2048
+# A 1-5 star rating adds (rating - 3) * RATING_WEIGHT to the watch-time signal;
+# pairs that end up at or below zero (disliked, barely watched) are dropped.
+RATING_WEIGHT = 1.0
+MIN_SIMILARITY = 0.01
+# Candidates fetched before filtering out deleted / age-restricted titles.
+CANDIDATE_FACTOR = 3
+
+# Episodes count as their TV show.
+ITEM = Coalesce(F('content__episode_details__season__tv_show_id'), F('content_id'))
+
+
+def watch_weight(seconds):
+    return math.log1p(max(seconds or 0, 0) / 60)
+
+
+def rating_weight(rating_value):
+    return (rating_value - 3) * RATING_WEIGHT
+
+
+# ==================== BUILD ====================
+def _load_feedback():
+    """(profile_index, item ids, rows, cols, weights) of all interactions and ratings."""
+    profiles, items = {}, {}
+    rows, cols, weights = array('I'), array('I'), array('f')
+
+    def add(profile_id, item_id, weight):
+        rows.append(profiles.setdefault(profile_id, len(profiles)))
+        cols.append(items.setdefault(item_id, len(items)))
+        weights.append(weight)
+
+    interactions = (
+        UserContentInteraction.objects.annotate(item=ITEM)
+        .values_list('profile_id', 'item', 'total_watch_time_seconds').order_by()
+    )
+    for profile_id, item_id, seconds in interactions.iterator(chunk_size=BATCH_SIZE * 10):
+        add(profile_id, item_id, watch_weight(seconds))
+    ratings = Rating.objects.annotate(item=ITEM).values_list('profile_id', 'item', 'rating_value').order_by()
+    for profile_id, item_id, rating_value in ratings.iterator(chunk_size=BATCH_SIZE * 10):
+        add(profile_id, item_id, rating_weight(rating_value))
+
+    return len(profiles), list(items), rows, cols, weights
+
+
+def build_neighbors(size=None, log=print):
+    """Recompute ContentNeighbors for the whole catalog. Returns the number of items stored."""
+    # Only the offline build needs scipy.
+    from scipy import sparse
+
+    size = size or settings.RECOMMENDATION_NEIGHBORS
+    started = time.perf_counter()
+    profile_count, item_ids, rows, cols, weights = _load_feedback()
+    log(f'Loaded {len(weights)} interactions for {profile_count} profiles and {len(item_ids)} titles '
+        f'in {time.perf_counter() - started:.1f}s')
+    if not weights:
+        with transaction.atomic():
+            ContentNeighbors.objects.all().delete()
+        return 0
+
+    # Duplicate (profile, item) pairs (watch time + rating, several episodes) are summed.
+    feedback = sparse.coo_matrix(
+        (np.frombuffer(weights, dtype=np.float32), (np.frombuffer(rows, dtype=np.uint32), np.frombuffer(cols, dtype=np.uint32))),
+        shape=(profile_count, len(item_ids)),
+    ).tocsr()
+    feedback.data = np.maximum(feedback.data, 0)
+    feedback.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(feedback.multiply(feedback).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = (feedback @ sparse.diags(1 / norms)).tocsr()
+    by_item = normalized.T.tocsr()
+
+    packed_ids = np.frombuffer(b''.join(item_id.bytes for item_id in item_ids), dtype=UUID_DTYPE)
+    built_at = timezone.now()
+    neighbors = []
+    for start in range(0, len(item_ids), ITEM_BLOCK):
+        similarities = (by_item[start:start + ITEM_BLOCK] @ normalized).tocsr()
+        for offset in range(similarities.shape[0]):
+            lo, hi = similarities.indptr[offset], similarities.indptr[offset + 1]
+            columns, scores = similarities.indices[lo:hi], similarities.data[lo:hi]
+            keep = (columns != start + offset) & (scores >= MIN_SIMILARITY)
+            columns, scores = columns[keep], scores[keep]
+            if not len(scores):
+                continue
+            if len(scores) > size:
+                top = np.argpartition(-scores, size)[:size]
+                columns, scores = columns[top], scores[top]
+            order = np.argsort(-scores, kind='stable')
+            neighbors.append(ContentNeighbors(
+                content_id=item_ids[start + offset],
+                neighbor_ids=packed_ids[columns[order]].tobytes(),
+                scores=scores[order].astype(np.float32).tobytes(),
+                built_at=built_at,
+            ))
+    log(f'Computed neighbors for {len(neighbors)} titles in {time.perf_counter() - started:.1f}s')
+
+    live = set(Content.all_objects.filter(id__in=[n.content_id for n in neighbors]).values_list('id', flat=True))
+    stored = [n for n in neighbors if n.content_id in live]
+    with transaction.atomic():
+        ContentNeighbors.objects.all().delete()
+        ContentNeighbors.objects.bulk_create(stored, batch_size=BATCH_SIZE)
+    return len(stored)
+
+
+# ==================== QUERY ====================
+def profile_feedback(profile_id):
+    """({item id: weight} for positive feedback, [every item the profile has watched])."""
+    weights, watched = {}, []
+    interactions = (
+        UserContentInteraction.objects.filter(profile_id=profile_id).annotate(item=ITEM)
+        .values_list('item', 'total_watch_time_seconds', 'watch_count').order_by()
+    )
+    for item_id, seconds, watch_count in interactions:
+        weights[item_id] = weights.get(item_id, 0) + watch_weight(seconds)
+        if watch_count:
+            watched.append(item_id)
+    ratings = Rating.objects.filter(profile_id=profile_id).annotate(item=ITEM).values_list('item', 'rating_value').order_by()
+    for item_id, rating_value in ratings:
+        weights[item_id] = weights.get(item_id, 0) + rating_weight(rating_value)
+    return {item_id: weight for item_id, weight in weights.items() if weight > 0}, watched
+
+
+def recommend(profile_id, limit, levels=None):
+    """[(content_id str, score)] best first, excluding watched titles; `levels` restricts maturity."""
+    weights, watched = profile_feedback(profile_id)
+    if not weights:
+        return []
+    # The strongest signals only; a long history adds little beyond them.
+    seeds = sorted(weights, key=weights.get, reverse=True)[:settings.RECOMMENDATION_SEEDS]
+    lists = list(ContentNeighbors.objects.filter(content_id__in=seeds).values_list('content_id', 'neighbor_ids', 'scores'))
+    if not lists:
+        return []
+
+    candidates = np.frombuffer(b''.join(bytes(ids) for _, ids, _ in lists), dtype=UUID_DTYPE)
+    similarities = np.concatenate([np.frombuffer(bytes(scores), dtype=np.float32) for _, _, scores in lists])
+    seed_weights = np.repeat(
+        np.array([weights[content_id] for content_id, _, _ in lists], dtype=np.float32),
+        [len(scores) // 4 for _, _, scores in lists],
+    )
+    unique, inverse = np.unique(candidates, return_inverse=True)
+    totals = np.bincount(inverse, weights=similarities * seed_weights)
+    if watched:
+        seen = np.frombuffer(b''.join(item_id.bytes for item_id in watched), dtype=UUID_DTYPE)
+        totals[np.isin(unique, seen)] = 0
+
+    order = np.argsort(-totals, kind='stable')[:limit * CANDIDATE_FACTOR]
+    order = order[totals[order] > 0]
+    ranked = [(uuid.UUID(bytes=unique[i].tobytes()), float(totals[i])) for i in order]
+
+    eligible = Content.objects.filter(id__in=[content_id for content_id, _ in ranked])
+    if levels is not None:
+        eligible = eligible.filter(maturity_level_id__in=levels)
+    eligible = set(eligible.values_list('id', flat=True))
+    return [(str(content_id), round(score, 4)) for content_id, score in ranked if content_id in eligible][:limit]
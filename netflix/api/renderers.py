@@ -0,0 +1,84 @@
+"""
+Response renderers.
+
+ORJSONRenderer is a drop-in replacement for DRF's JSONRenderer that encodes
+with orjson when it is installed. UUIDs are serialized natively; dates and
+times, and anything orjson does not know (Decimal, lazy strings, querysets),
+are passed to DRF's JSONEncoder.default so output matches the stock renderer
+(older DRF releases truncate datetimes to milliseconds; orjson never does).
+Without orjson, or when an indented response is requested, it falls back
+to JSONRenderer.
+
+MessagePackRenderer serves the same data as application/msgpack (or
+?format=msgpack) for bandwidth-constrained clients such as smart TVs.
+"""
+import datetime
+import uuid
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+_drf_encoder = encoders.JSONEncoder()
+
+# Dates and times go through DRF's encoder so their format follows the installed DRF.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def orjson_default(obj):
+    """Fallback for types orjson cannot serialize natively."""
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson. Negotiated as application/json."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=orjson_default, option=ORJSON_OPTIONS)
+
+        # Keep output a strict JavaScript subset, as JSONRenderer does.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+# ==================== MESSAGEPACK ====================
+# Application-specific ext type for UUIDs (16 raw bytes instead of a
+# 36 character string). Aware datetimes use the standard Timestamp ext (-1).
+UUID_EXT_TYPE = 1
+
+
+def msgpack_default(obj):
+    """Compact encodings for UUIDs; DRF's JSON conventions for everything else."""
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(UUID_EXT_TYPE, obj.bytes)
+    if isinstance(obj, datetime.datetime):
+        # Only naive datetimes get here; aware ones are packed as Timestamps.
+        return obj.isoformat()
+    return _drf_encoder.default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary MessagePack renderer. Select with Accept: application/msgpack or ?format=msgpack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=msgpack_default, use_bin_type=True, datetime=True)
@@ -0,0 +1,341 @@
+"""
+Full-text catalog search.
+
+Every searchable Content (movies and TV shows; episodes are reached through
+their show) has a ContentSearchDocument holding normalized title,
+description, cast and genre text. Documents are written through the ORM;
+the inverted index itself is backend specific and created by migration 0011:
+
+- SQLite: an external-content FTS5 table with prefix indexes, ranked by bm25.
+- Postgres: a weighted, generated tsvector column with a GIN index, ranked
+  by ts_rank_cd.
+
+`get_search_backend()` hides the difference. Documents are kept in sync by
+signals (see signals.py) and can be rebuilt with `manage.py rebuild_search_index`.
+
+Queries are as-you-type friendly: every term is prefix matched, and terms
+that are not a prefix of any known title / cast / genre word are widened
+with single-edit corrections from a vocabulary cached per catalog version.
+"""
+import bisect
+import re
+import string
+import threading
+import time
+import unicodedata
+import uuid
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router, transaction
+
+from .catalog_cache import catalog_version
+from .models import Content, ContentCast, ContentGenre, ContentSearchDocument
+
+BATCH_SIZE = 1000
+
+# FTS5 prefix indexes start at two characters; shorter terms are ignored.
+MIN_TERM_LENGTH = 2
+# Terms shorter than this are too ambiguous to correct.
+MIN_CORRECTION_LENGTH = 3
+MAX_CORRECTIONS = 4
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+# ==================== TEXT NORMALIZATION ====================
+def normalize(text):
+    """Lower-case `text` and strip diacritics ("Amélie" -> "amelie")."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+# ==================== DOCUMENT SYNC ====================
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def build_documents(content_ids):
+    """Unsaved ContentSearchDocuments for the searchable content among `content_ids`."""
+    contents = (
+        Content.objects
+        .filter(id__in=content_ids, episode_details__isnull=True)
+        .values_list('id', 'content_type', 'title', 'description')
+    )
+    cast, genres = defaultdict(list), defaultdict(list)
+    cast_rows = (
+        ContentCast.objects.filter(content_id__in=content_ids)
+        .order_by('billing_order').values_list('content_id', 'cast_member__name')
+    )
+    for content_id, name in cast_rows:
+        cast[content_id].append(name)
+    genre_rows = ContentGenre.objects.filter(content_id__in=content_ids).values_list('content_id', 'genre__name')
+    for content_id, name in genre_rows:
+        genres[content_id].append(name)
+
+    return [
+        ContentSearchDocument(
+            content_id=content_id,
+            content_type=content_type,
+            title=normalize(title),
+            description=normalize(description),
+            cast_names=normalize(', '.join(cast[content_id])),
+            genre_names=normalize(', '.join(genres[content_id])),
+        )
+        for content_id, content_type, title, description in contents
+    ]
+
+
+def index_content(content_ids):
+    """
+    Rebuild the search documents of `content_ids`. Ids that no longer refer to
+    searchable content (deleted, soft-deleted, episodes) lose their document.
+    Returns the number of documents written.
+    """
+    written = 0
+    using = router.db_for_write(ContentSearchDocument)
+    for batch in _batched(set(content_ids), BATCH_SIZE):
+        documents = build_documents(batch)
+        with transaction.atomic(using=using):
+            ContentSearchDocument.objects.filter(content_id__in=batch).delete()
+            ContentSearchDocument.objects.bulk_create(documents)
+        written += len(documents)
+    return written
+
+
+def schedule_reindex(content_ids):
+    """Reindex `content_ids` once the current transaction commits."""
+    content_ids = list(content_ids)
+    if content_ids:
+        transaction.on_commit(lambda: index_content(content_ids))
+
+
+def rebuild_index(since=None, batch_size=BATCH_SIZE, log=None):
+    """
+    Reindex all content, or only content updated since `since`. A full rebuild
+    also drops documents whose content has disappeared. Returns documents written.
+    """
+    # all_objects, so content soft-deleted since the last run loses its document.
+    queryset = Content.all_objects.filter(episode_details__isnull=True)
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    else:
+        ContentSearchDocument.objects.exclude(
+            content__in=Content.objects.filter(episode_details__isnull=True)
+        ).delete()
+
+    written = 0
+    ids = queryset.order_by().values_list('id', flat=True).iterator(chunk_size=batch_size)
+    for batch in _batched(ids, batch_size):
+        written += index_content(batch)
+        if log:
+            log(f'  indexed {written} documents')
+
+    get_search_backend().optimize()
+    return written
+
+
+# ==================== TYPO TOLERANCE ====================
+class Vocabulary:
+    """Sorted title / cast / genre terms supporting prefix lookups and single-edit corrections."""
+
+    # Replacement / insertion candidates; other scripts still get deletions and transpositions.
+    ALPHABET = string.ascii_lowercase + string.digits
+
+    def __init__(self, terms):
+        self.terms = sorted(set(terms))
+
+    @classmethod
+    def from_documents(cls):
+        terms = set()
+        rows = ContentSearchDocument.objects.values_list('title', 'cast_names', 'genre_names')
+        for row in rows.iterator(chunk_size=5000):
+            for text in row:
+                terms.update(TOKEN_RE.findall(text))
+        return cls(terms)
+
+    def prefix_count(self, prefix):
+        """Number of terms starting with `prefix`."""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '\U0010ffff', lo=start)
+        return end - start
+
+    def corrections(self, term):
+        """
+        Known prefixes one edit (delete, transpose, replace, insert) away from
+        `term`, most common first. Empty when `term` is itself a known prefix.
+        """
+        if len(term) < MIN_CORRECTION_LENGTH or self.prefix_count(term):
+            return []
+        splits = [(term[:i], term[i:]) for i in range(len(term) + 1)]
+        edits = set()
+        for left, right in splits:
+            if right:
+                edits.add(left + right[1:])
+                edits.update(left + c + right[1:] for c in self.ALPHABET)
+            if len(right) > 1:
+                edits.add(left + right[1] + right[0] + right[2:])
+            edits.update(left + c + right for c in self.ALPHABET)
+        edits.discard(term)
+
+        scored = [(self.prefix_count(edit), edit) for edit in edits if len(edit) >= MIN_TERM_LENGTH]
+        scored = [(count, edit) for count, edit in scored if count]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [edit for _, edit in scored[:MAX_CORRECTIONS]]
+
+
+_vocabulary_lock = threading.Lock()
+_vocabulary = {'version': None, 'built_at': 0.0, 'value': None}
+
+
+def get_vocabulary():
+    """
+    The process-wide Vocabulary, rebuilt when the catalog version changes but
+    at most once per SEARCH_VOCABULARY_REFRESH seconds.
+    """
+    version = catalog_version()
+    current = _vocabulary['value']
+    stale = _vocabulary['version'] != version
+    if current is not None and (not stale or time.monotonic() - _vocabulary['built_at'] < settings.SEARCH_VOCABULARY_REFRESH):
+        return current
+    with _vocabulary_lock:
+        if _vocabulary['value'] is current:
+            _vocabulary['value'] = Vocabulary.from_documents()
+            _vocabulary['version'] = version
+            _vocabulary['built_at'] = time.monotonic()
+        return _vocabulary['value']
+
+
+def parse_query(text, vocabulary=None):
+    """
+    Split `text` into term groups. Every group must match through at least
+    one of its alternatives (the typed term first); all are prefix matched.
+    """
+    terms = [term for term in tokenize(text) if len(term) >= MIN_TERM_LENGTH]
+    if vocabulary is None and terms:
+        vocabulary = get_vocabulary()
+    groups = []
+    for term in dict.fromkeys(terms):
+        groups.append([term] + vocabulary.corrections(term))
+    return groups
+
+
+# ==================== BACKENDS ====================
+class SearchBackend:
+    """Query side of the index for one database connection."""
+    vendor = None
+
+    def __init__(self, using):
+        self.using = using
+
+    def match_expression(self, groups):
+        raise NotImplementedError
+
+    def count(self, groups, content_type=None):
+        raise NotImplementedError
+
+    def search(self, groups, content_type=None, limit=20, offset=0):
+        """Return [(content_id, score)], best match first."""
+        raise NotImplementedError
+
+    def optimize(self):
+        pass
+
+    def _fetch(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class SQLiteSearchBackend(SearchBackend):
+    vendor = 'sqlite'
+    # bm25 column weights: title, description, cast_names, genre_names
+    WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+    def match_expression(self, groups):
+        return ' AND '.join('(' + ' OR '.join(f'"{term}"*' for term in group) + ')' for group in groups)
+
+    def _where(self, groups, content_type):
+        sql = 'content_search MATCH %s'
+        params = [self.match_expression(groups)]
+        if content_type:
+            sql += ' AND d.content_type = %s'
+            params.append(content_type)
+        return sql, params
+
+    def count(self, groups, content_type=None):
+        where, params = self._where(groups, content_type)
+        sql = (
+            'SELECT count(*) FROM content_search '
+            'JOIN content_search_document d ON d.id = content_search.rowid '
+            f'WHERE {where}'
+        )
+        return self._fetch(sql, params)[0][0]
+
+    def search(self, groups, content_type=None, limit=20, offset=0):
+        where, params = self._where(groups, content_type)
+        weights = ', '.join(str(w) for w in self.WEIGHTS)
+        sql = (
+            f'SELECT d.content_id, bm25(content_search, {weights}) AS score FROM content_search '
+            'JOIN content_search_document d ON d.id = content_search.rowid '
+            f'WHERE {where} ORDER BY score, d.id LIMIT %s OFFSET %s'
+        )
+        rows = self._fetch(sql, params + [limit, offset])
+        # bm25 is negative and lower is better; flip it so higher is better everywhere.
+        return [(uuid.UUID(str(content_id)), -score) for content_id, score in rows]
+
+    def optimize(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("INSERT INTO content_search(content_search) VALUES ('optimize')")
+
+
+class PostgresSearchBackend(SearchBackend):
+    vendor = 'postgresql'
+
+    def match_expression(self, groups):
+        return ' & '.join('(' + ' | '.join(f'{term}:*' for term in group) + ')' for group in groups)
+
+    def _where(self, groups, content_type):
+        sql = 'document @@ query'
+        params = [self.match_expression(groups)]
+        if content_type:
+            sql += ' AND content_type = %s'
+            params.append(content_type)
+        return sql, params
+
+    def count(self, groups, content_type=None):
+        where, params = self._where(groups, content_type)
+        sql = (
+            "SELECT count(*) FROM content_search_document, to_tsquery('simple', %s) AS query "
+            f'WHERE {where}'
+        )
+        return self._fetch(sql, params)[0][0]
+
+    def search(self, groups, content_type=None, limit=20, offset=0):
+        where, params = self._where(groups, content_type)
+        sql = (
+            'SELECT content_id, ts_rank_cd(document, query) AS score '
+            "FROM content_search_document, to_tsquery('simple', %s) AS query "
+            f'WHERE {where} ORDER BY score DESC, id LIMIT %s OFFSET %s'
+        )
+        return [(content_id, score) for content_id, score in self._fetch(sql, params + [limit, offset])]
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteSearchBackend, PostgresSearchBackend)}
+
+
+def get_search_backend(using=None):
+    using = using or router.db_for_read(ContentSearchDocument)
+    vendor = connections[using].vendor
+    try:
+        return BACKENDS[vendor](using)
+    except KeyError:
+        raise ImproperlyConfigured(f'Catalog search does not support the {vendor!r} database backend.')
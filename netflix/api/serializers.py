@@ -2,7 +2,7 @@ from rest_framework import serializers
 from .models import (
     User, SubscriptionPlan, BillingHistory, UserSubscription, Profile,
     MaturityLevel, Genre, Content, Movie, TVShow, Season, Episode, ContentGenre,
-    CastMember, ContentCast, WatchHistory, WatchProgress, Rating, Review, UserContentInteraction,
+    CastMember, ContentCast, WatchHistory, WatchProgress, Rating, ContentRatingStats, Review, UserContentInteraction,
     Download, Device
 )
 
@@ -85,19 +85,30 @@ class ContentSerializer(serializers.ModelSerializer):
     maturity_level = MaturityLevelSerializer(read_only=True)
     genres = serializers.SerializerMethodField()
     cast = ContentCastSerializer(source='contentcast_set', many=True, read_only=True)
+    rating = serializers.SerializerMethodField()
     
     class Meta:
         model = Content
         fields = [
             'id', 'title', 'description', 'content_type', 'release_date', 
             'duration_minutes', 'poster_image_url', 'backdrop_image_url', 
-            'trailer_url', 'maturity_level', 'genres', 'cast'
+            'trailer_url', 'maturity_level', 'genres', 'cast', 'rating'
         ]
 
     def get_genres(self, obj):
         # Optimized to avoid N+1 if prefetch_related is used
         return [cg.genre.name for cg in obj.contentgenre_set.all()]
 
+    def get_rating(self, obj):
+        # Expects select_related('rating_stats'); titles never rated have no row.
+        # Rating writes do not bump the catalog version, so cached catalog
+        # documents show these stats up to CATALOG_CACHE_TIMEOUT seconds late.
+        try:
+            stats = obj.rating_stats
+        except ContentRatingStats.DoesNotExist:
+            stats = ContentRatingStats()
+        return {'average': stats.average, 'count': stats.rating_count, 'histogram': stats.histogram}
+
 
 class MovieSerializer(ContentSerializer):
     director = serializers.CharField(source='movie_details.director')
@@ -142,6 +153,15 @@ class ContentMiniSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'poster_image_url', 'content_type', 'duration_minutes']
 
 
+class SearchResultSerializer(ContentMiniSerializer):
+    """A ranked search hit; `score` is only comparable within one query."""
+    maturity_level = MaturityLevelSerializer(read_only=True)
+    score = serializers.FloatField(source='search_score', read_only=True)
+
+    class Meta(ContentMiniSerializer.Meta):
+        fields = ContentMiniSerializer.Meta.fields + ['release_date', 'maturity_level', 'score']
+
+
 class WatchHistorySerializer(serializers.ModelSerializer):
     content = ContentMiniSerializer(read_only=True)
     content_id = serializers.UUIDField(write_only=True)
@@ -174,6 +194,12 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = ['id', 'content_id', 'content_title', 'rating_value', 'rated_at']
         read_only_fields = ['id', 'rated_at']
 
+    def validate_content_id(self, value):
+        # Rating stats are kept per title; moving a rating would leave them on the old one.
+        if self.instance is not None and value != self.instance.content_id:
+            raise serializers.ValidationError('A rating cannot be moved to another title.')
+        return value
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     content_id = serializers.UUIDField(write_only=True)
@@ -189,6 +215,15 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class ContentReviewSerializer(serializers.ModelSerializer):
+    """A review in a title's public feed."""
+    profile_name = serializers.CharField(source='profile.name', read_only=True)
+    
+    class Meta:
+        model = Review
+        fields = ['id', 'profile_name', 'title', 'body', 'contains_spoilers', 'created_at']
+
+
 class WatchlistSerializer(serializers.ModelSerializer):
     content = ContentMiniSerializer(read_only=True)
     content_id = serializers.UUIDField(write_only=True)
@@ -218,4 +253,9 @@ class DownloadCreateSerializer(serializers.Serializer):
     """Serializer for creating downloads with validation."""
     content_id = serializers.UUIDField()
     device_id = serializers.UUIDField()
-    video_quality = serializers.ChoiceField(choices=Download.VideoQuality.choices)
\ No newline at end of file
+    video_quality = serializers.ChoiceField(choices=Download.VideoQuality.choices)
+
+
+class DownloadRenewSerializer(serializers.Serializer):
+    """Serializer for renewing every download license on a device."""
+    device_id = serializers.UUIDField()
\ No newline at end of file
@@ -1,8 +1,18 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import WatchHistory, WatchProgress, UserContentInteraction
+from .catalog_cache import bump_catalog_version
+from .counters import record_view
+from .search import schedule_reindex
+from .feed_cache import invalidate_home, invalidate_review_feed
+from .maturity import invalidate_profile_age
+from .models import (
+    Profile, WatchHistory, WatchProgress, UserContentInteraction, Review,
+    MaturityLevel, Content, Movie, TVShow, Season, Episode, Genre, ContentGenre,
+    CastMember, ContentCast
+)
 
 
 @receiver(post_save, sender=WatchHistory)
@@ -58,3 +68,81 @@ def _check_and_remove_completed_progress(watch_history, profile, content):
             profile=profile,
             content=content
         ).delete()
+
+
+# ==================== CATALOG CACHE INVALIDATION ====================
+CATALOG_MODELS = (
+    MaturityLevel, Content, Movie, TVShow, Season, Episode,
+    Genre, ContentGenre, CastMember, ContentCast,
+)
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    """Any catalog change makes every cached catalog document stale."""
+    bump_catalog_version()
+
+
+for _model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog_cache, sender=_model, dispatch_uid=f'catalog_cache_save_{_model.__name__}')
+    post_delete.connect(invalidate_catalog_cache, sender=_model, dispatch_uid=f'catalog_cache_delete_{_model.__name__}')
+
+
+# ==================== SEARCH INDEX SYNC ====================
+@receiver(post_save, sender=Content)
+@receiver(post_save, sender=Episode)
+def reindex_content(sender, instance, **kwargs):
+    """Content text changed, or content became an episode (which is not searchable)."""
+    schedule_reindex([instance.pk])
+
+
+@receiver(post_save, sender=ContentCast)
+@receiver(post_delete, sender=ContentCast)
+@receiver(post_save, sender=ContentGenre)
+@receiver(post_delete, sender=ContentGenre)
+def reindex_content_metadata(sender, instance, **kwargs):
+    schedule_reindex([instance.content_id])
+
+
+@receiver(post_save, sender=CastMember)
+def reindex_cast_member_content(sender, instance, created, **kwargs):
+    """A renamed cast member changes the document of everything they appear in."""
+    if not created:
+        schedule_reindex(ContentCast.objects.filter(cast_member=instance).values_list('content_id', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+def reindex_genre_content(sender, instance, created, **kwargs):
+    if not created:
+        schedule_reindex(ContentGenre.objects.filter(genre=instance).values_list('content_id', flat=True))
+
+
+# ==================== HOME SCREEN CACHE ====================
+@receiver(post_save, sender=WatchProgress)
+@receiver(post_delete, sender=WatchProgress)
+@receiver(post_save, sender=UserContentInteraction)
+@receiver(post_delete, sender=UserContentInteraction)
+def invalidate_profile_home(sender, instance, **kwargs):
+    """Continue watching / my list changed: rebuild the profile's home rows next time."""
+    invalidate_home(instance.profile_id)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_maturity(sender, instance, **kwargs):
+    """Age or kid flag may have changed: drop the cached viewing age and the home rows built from it."""
+    invalidate_profile_age(instance.user_id, instance.pk)
+    invalidate_home(instance.pk)
+
+
+# ==================== REVIEW FEED CACHE ====================
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_content_review_feed(sender, instance, **kwargs):
+    invalidate_review_feed(instance.content_id)
+
+
+# ==================== VIEW COUNTERS ====================
+@receiver(post_save, sender=WatchHistory)
+def count_view(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: record_view(instance.content_id, instance.profile_id, instance.watched_seconds))
@@ -0,0 +1,54 @@
+"""
+SQLite connection tuning and write serialization.
+
+`tune_connection` (connected to `connection_created` in ApiConfig.ready)
+applies SQLITE_PRAGMAS to every new SQLite connection. Read-only replica
+connections skip the PRAGMAs that need write access.
+
+SQLite allows one writer at a time. Threads of one process that write
+concurrently otherwise spin in the busy handler, and under load some give
+up with "database is locked". `serialized_write()` makes them wait their
+turn on a process-wide lock instead. Other processes are still covered only
+by busy_timeout and BEGIN IMMEDIATE (the production profile).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Need write access to the database file.
+WRITE_PRAGMAS = {'journal_mode', 'journal_size_limit'}
+
+_write_lock = threading.Lock()
+
+
+def apply_pragmas(cursor, pragmas, read_only=False):
+    for name, value in pragmas.items():
+        if read_only and name in WRITE_PRAGMAS:
+            continue
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def tune_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    read_only = 'mode=ro' in str(connection.settings_dict['NAME'])
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS, read_only=read_only)
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """
+    One transaction on `using`, run while holding the process write lock when
+    SQLITE_SERIALIZE_WRITES is on for a SQLite database. Use it outermost: a
+    thread that already holds the database lock while waiting here stalls
+    the lock holder until its busy timeout runs out.
+    """
+    if not settings.SQLITE_SERIALIZE_WRITES or connections[using].vendor != 'sqlite':
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _write_lock, transaction.atomic(using=using):
+        yield
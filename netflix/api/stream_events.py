@@ -0,0 +1,253 @@
+"""
+Server-sent streaming-session events.
+
+Devices keep GET /api/async/stream/events/ open and are told when one of the
+account's streaming sessions starts, ends, or is ended from another device,
+instead of polling ActiveStreamsView:
+
+    event: session_kicked
+    data: {"session_ids":["..."],"device_id":"..."}
+
+- `session_started` / `session_ended` / `session_kicked`: `session_ids`
+  changed; a device whose own session id is in a `session_kicked` event
+  should stop playback
+- `resync`: events may have been missed (slow client, lost subscription);
+  fetch ActiveStreamsView once and carry on
+
+Events are published on the Redis channel `streams:events:{user}`. Each
+event loop (one per ASGI worker) holds a single pattern subscription and
+fans messages out to its own subscribers, so an idle client costs a small
+queue and a suspended generator rather than a Redis connection. Frames are
+encoded once when published and shared by every subscriber.
+
+Without STREAM_EVENTS_REDIS_URL events are delivered in-process only (tests,
+single-process runs). Publishing never fails the request; errors are logged.
+"""
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'streams:events'
+
+SESSION_STARTED, SESSION_ENDED, SESSION_KICKED, RESYNC = 'session_started', 'session_ended', 'session_kicked', 'resync'
+
+RETRY_FRAME = b'retry: 3000\n\n'
+KEEPALIVE_FRAME = b': keepalive\n\n'
+RECONNECT_DELAY = 1
+
+
+def _channel(user_id):
+    return f'{PREFIX}:{user_id}'
+
+
+def encode(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'event: {event}\ndata: {payload}\n\n'.encode()
+
+
+# ==================== SUBSCRIBERS ====================
+class Subscriber:
+    """One open event stream: a bounded queue of encoded frames."""
+    __slots__ = ('queue', 'lagged')
+
+    def __init__(self):
+        self.queue = asyncio.Queue(settings.STREAM_EVENTS_QUEUE_SIZE)
+        self.lagged = False
+
+    def put(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # The client is not reading; end its stream so it reconnects and resyncs.
+            self.lagged = True
+
+
+class Hub:
+    """Subscribers of one event loop, fed by one Redis subscription."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.reader = None
+
+    def add(self, user_id, subscriber):
+        self.subscribers[user_id].add(subscriber)
+        if settings.STREAM_EVENTS_REDIS_URL and self.reader is None:
+            self.reader = asyncio.get_running_loop().create_task(self.read(settings.STREAM_EVENTS_REDIS_URL))
+
+    def discard(self, user_id, subscriber):
+        subscribers = self.subscribers.get(user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[user_id]
+        if not self.subscribers and self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+
+    def dispatch(self, user_id, frame):
+        for subscriber in self.subscribers.get(user_id, ()):
+            subscriber.put(frame)
+
+    def dispatch_all(self, frame):
+        for subscribers in self.subscribers.values():
+            for subscriber in subscribers:
+                subscriber.put(frame)
+
+    async def read(self, url):
+        import redis
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(url, socket_connect_timeout=0.5)
+        offset = len(PREFIX) + 1
+        lost = False
+        try:
+            while True:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    await pubsub.psubscribe(f'{PREFIX}:*')
+                    if lost:
+                        self.dispatch_all(encode(RESYNC, {}))
+                        lost = False
+                    async for message in pubsub.listen():
+                        self.dispatch(message['channel'].decode()[offset:], message['data'])
+                except redis.RedisError:
+                    logger.warning('Stream event subscription lost, reconnecting', exc_info=True)
+                    lost = True
+                    await asyncio.sleep(RECONNECT_DELAY)
+                finally:
+                    await pubsub.aclose()
+        finally:
+            await client.aclose()
+
+
+_hubs = weakref.WeakKeyDictionary()
+_hubs_lock = threading.Lock()
+
+
+def _hub():
+    loop = asyncio.get_running_loop()
+    with _hubs_lock:
+        hub = _hubs.get(loop)
+        if hub is None:
+            hub = _hubs[loop] = Hub()
+    return hub
+
+
+async def events(user_id):
+    """Encoded SSE frames for `user_id`, with keep-alive comments, until the client lags."""
+    user_id = str(user_id)
+    hub = _hub()
+    subscriber = Subscriber()
+    hub.add(user_id, subscriber)
+    try:
+        yield RETRY_FRAME
+        while not subscriber.lagged:
+            try:
+                yield await asyncio.wait_for(subscriber.queue.get(), settings.STREAM_EVENTS_KEEPALIVE)
+            except TimeoutError:
+                yield KEEPALIVE_FRAME
+        yield encode(RESYNC, {})
+    finally:
+        hub.discard(user_id, subscriber)
+
+
+# ==================== BACKENDS ====================
+class RedisEventBackend:
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.errors = (redis.RedisError,)
+
+    def publish(self, user_id, frame):
+        self.redis.publish(_channel(user_id), frame)
+
+
+class AsyncRedisEventBackend:
+    """RedisEventBackend over redis.asyncio; one client per event loop."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.errors = (redis.RedisError,)
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def publish(self, user_id, frame):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = redis.asyncio.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        await client.publish(_channel(user_id), frame)
+
+
+class LocalEventBackend:
+    """Delivers straight to the hubs of this process."""
+    errors = ()
+
+    def publish(self, user_id, frame):
+        with _hubs_lock:
+            hubs = list(_hubs.items())
+        for loop, hub in hubs:
+            if user_id in hub.subscribers:
+                try:
+                    loop.call_soon_threadsafe(hub.dispatch, user_id, frame)
+                except RuntimeError:
+                    # Event loop already closed.
+                    pass
+
+
+class AsyncLocalEventBackend:
+    errors = ()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def publish(self, *args):
+        self.backend.publish(*args)
+
+
+_backends = None
+_backends_lock = threading.Lock()
+
+
+def get_backends():
+    """(sync backend, async backend)."""
+    global _backends
+    if _backends is None:
+        with _backends_lock:
+            if _backends is None:
+                url = settings.STREAM_EVENTS_REDIS_URL
+                if url:
+                    _backends = RedisEventBackend(url), AsyncRedisEventBackend(url)
+                else:
+                    local = LocalEventBackend()
+                    _backends = local, AsyncLocalEventBackend(local)
+    return _backends
+
+
+# ==================== PUBLISH ====================
+def publish_event(user_id, event, **data):
+    backend = get_backends()[0]
+    try:
+        backend.publish(str(user_id), encode(event, data))
+    except backend.errors:
+        logger.warning('Stream event %s for user %s not published', event, user_id, exc_info=True)
+
+
+async def apublish_event(user_id, event, **data):
+    backend = get_backends()[1]
+    try:
+        await backend.publish(str(user_id), encode(event, data))
+    except backend.errors:
+        logger.warning('Stream event %s for user %s not published', event, user_id, exc_info=True)
@@ -0,0 +1,291 @@
+"""
+Concurrent-stream slots.
+
+`streams:slots:{user}` is a Redis set of the user's active session ids
+(DeviceLogin rows with logout_at NULL). A new session is admitted by one Lua
+script that adds it only while the set holds fewer than the plan's
+max_concurrent_streams members, so two devices racing for the last slot
+cannot both get it, as they could with a count query followed by an insert.
+
+The set is a cache of the database. When it is missing, the script seeds it
+from the DeviceLogin ids the caller read, atomically and only if no other
+request created it meanwhile. Once it exists it is never rebuilt from the
+database: it also holds sessions admitted but not yet inserted (views
+acquire before creating the DeviceLogin row), and a rebuild would drop
+them and let the limit be exceeded. When the set refuses a session, members
+whose rows are already logged out (ended outside these helpers) are removed
+and admission is retried. Members whose rows were deleted outright stay until
+the set expires, STREAM_SLOT_TTL seconds after the last admission. If Redis
+is unreachable the helpers return None and callers fall back to counting
+rows.
+
+`end_sessions()` ends many sessions at once (sign out other devices, admin)
+and frees their slots.
+
+Both a sync and an asyncio client are provided. Without
+STREAM_SLOTS_REDIS_URL an in-process backend with the same interface is
+used (tests, single-process runs).
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DeviceLogin
+from .stream_events import SESSION_KICKED, publish_event
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'streams:slots'
+
+# KEYS[1] slot set; ARGV: session id, max streams, ttl, seeding ('1' = the remaining
+# ARGV are the active session ids to seed a missing set with; an existing set wins).
+# Returns 1 admitted, 0 full, -1 set missing (retry with the seed).
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if ARGV[4] == '0' then return -1 end
+    for i = 5, #ARGV do redis.call('SADD', KEYS[1], ARGV[i]) end
+    if #ARGV > 4 then redis.call('EXPIRE', KEYS[1], ARGV[3]) end
+end
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then return 1 end
+if redis.call('SCARD', KEYS[1]) >= tonumber(ARGV[2]) then return 0 end
+redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+MISSING, FULL, ADMITTED = -1, 0, 1
+
+
+def _key(user_id):
+    return f'{PREFIX}:{user_id}'
+
+
+# ==================== BACKENDS ====================
+class RedisSlotBackend:
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.acquire_script = self.redis.register_script(ACQUIRE_SCRIPT)
+        self.errors = (redis.RedisError,)
+
+    def acquire(self, user_id, session_id, max_streams, seed=None):
+        return int(self.acquire_script(keys=[_key(user_id)], args=_acquire_args(session_id, max_streams, seed)))
+
+    def members(self, user_id):
+        return [member.decode() for member in self.redis.smembers(_key(user_id))]
+
+    def release(self, user_id, session_ids):
+        if session_ids:
+            self.redis.srem(_key(user_id), *session_ids)
+
+
+class AsyncRedisSlotBackend:
+    """RedisSlotBackend over redis.asyncio; one client per event loop."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.errors = (redis.RedisError,)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = redis.asyncio.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            client.acquire_script = client.register_script(ACQUIRE_SCRIPT)
+            self._clients[loop] = client
+        return client
+
+    async def acquire(self, user_id, session_id, max_streams, seed=None):
+        client = self._client()
+        return int(await client.acquire_script(keys=[_key(user_id)], args=_acquire_args(session_id, max_streams, seed)))
+
+    async def members(self, user_id):
+        return [member.decode() for member in await self._client().smembers(_key(user_id))]
+
+    async def release(self, user_id, session_ids):
+        if session_ids:
+            await self._client().srem(_key(user_id), *session_ids)
+
+
+class LocalSlotBackend:
+    """In-process stand-in for the Redis backends (no expiry)."""
+    errors = ()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = defaultdict(set)
+
+    def acquire(self, user_id, session_id, max_streams, seed=None):
+        with self.lock:
+            if not self.slots.get(user_id):
+                # Like Redis, an emptied set counts as missing.
+                if seed is None:
+                    return MISSING
+                self.slots[user_id] = set(seed)
+            slots = self.slots[user_id]
+            if session_id in slots:
+                return ADMITTED
+            if len(slots) >= max_streams:
+                return FULL
+            slots.add(session_id)
+            return ADMITTED
+
+    def members(self, user_id):
+        with self.lock:
+            return list(self.slots.get(user_id, ()))
+
+    def release(self, user_id, session_ids):
+        with self.lock:
+            self.slots.get(user_id, set()).difference_update(session_ids)
+
+
+class AsyncLocalSlotBackend:
+    errors = ()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def acquire(self, *args):
+        return self.backend.acquire(*args)
+
+    async def members(self, *args):
+        return self.backend.members(*args)
+
+    async def release(self, *args):
+        self.backend.release(*args)
+
+
+_backends = None
+_backends_lock = threading.Lock()
+
+
+def get_backends():
+    """(sync backend, async backend), sharing state."""
+    global _backends
+    if _backends is None:
+        with _backends_lock:
+            if _backends is None:
+                url = settings.STREAM_SLOTS_REDIS_URL
+                if url:
+                    _backends = RedisSlotBackend(url), AsyncRedisSlotBackend(url)
+                else:
+                    local = LocalSlotBackend()
+                    _backends = local, AsyncLocalSlotBackend(local)
+    return _backends
+
+
+def _acquire_args(session_id, max_streams, seed):
+    if seed is None:
+        return [session_id, max_streams, settings.STREAM_SLOT_TTL, 0]
+    return [session_id, max_streams, settings.STREAM_SLOT_TTL, 1, *seed]
+
+
+def _active_sessions(user_id):
+    return DeviceLogin.objects.filter(user_id=user_id, logout_at__isnull=True).order_by().values_list('id', flat=True)
+
+
+def _ended_sessions(user_id, session_ids):
+    # Only rows that exist and are logged out: a member without a row may be a
+    # session admitted by another request that has not inserted it yet.
+    return DeviceLogin.objects.filter(
+        id__in=session_ids, user_id=user_id, logout_at__isnull=False,
+    ).order_by().values_list('id', flat=True)
+
+
+# ==================== SYNC ====================
+def _acquire(backend, user_id, session_id, max_streams):
+    result = backend.acquire(user_id, session_id, max_streams)
+    if result == MISSING:
+        result = backend.acquire(user_id, session_id, max_streams, [str(pk) for pk in _active_sessions(user_id)])
+    return result
+
+
+def acquire_slot(user_id, session_id, max_streams):
+    """True if `session_id` may start, False if the user is at the limit, None if the slot store is down."""
+    backend = get_backends()[0]
+    user_id, session_id = str(user_id), str(session_id)
+    try:
+        result = _acquire(backend, user_id, session_id, max_streams)
+        if result == FULL:
+            # Drifted: sessions were ended without releasing their slots.
+            ended = [str(pk) for pk in _ended_sessions(user_id, backend.members(user_id))]
+            if ended:
+                backend.release(user_id, ended)
+                result = _acquire(backend, user_id, session_id, max_streams)
+    except backend.errors:
+        logger.warning('Stream slot store unavailable for user %s', user_id, exc_info=True)
+        return None
+    return result == ADMITTED
+
+
+def release_slots(user_id, session_ids):
+    backend = get_backends()[0]
+    try:
+        backend.release(str(user_id), [str(session_id) for session_id in session_ids])
+    except backend.errors:
+        # Logged-out members are pruned when the set refuses a session.
+        logger.warning('Stream slot release failed for user %s', user_id, exc_info=True)
+
+
+def end_sessions(sessions, event=SESSION_KICKED):
+    """
+    End the active sessions in the `sessions` queryset with one UPDATE, free
+    their slots and notify each owner's devices. Returns the number ended.
+    """
+    rows = list(sessions.filter(logout_at__isnull=True).order_by().values_list('id', 'user_id'))
+    if not rows:
+        return 0
+    ended = DeviceLogin.objects.filter(
+        id__in=[session_id for session_id, _ in rows], logout_at__isnull=True,
+    ).update(logout_at=timezone.now())
+    by_user = defaultdict(list)
+    for session_id, user_id in rows:
+        by_user[user_id].append(session_id)
+    for user_id, session_ids in by_user.items():
+        release_slots(user_id, session_ids)
+        publish_event(user_id, event, session_ids=session_ids)
+    return ended
+
+
+# ==================== ASYNC ====================
+async def _aacquire(backend, user_id, session_id, max_streams):
+    result = await backend.acquire(user_id, session_id, max_streams)
+    if result == MISSING:
+        seed = [str(pk) async for pk in _active_sessions(user_id)]
+        result = await backend.acquire(user_id, session_id, max_streams, seed)
+    return result
+
+
+async def aacquire_slot(user_id, session_id, max_streams):
+    backend = get_backends()[1]
+    user_id, session_id = str(user_id), str(session_id)
+    try:
+        result = await _aacquire(backend, user_id, session_id, max_streams)
+        if result == FULL:
+            ended = [str(pk) async for pk in _ended_sessions(user_id, await backend.members(user_id))]
+            if ended:
+                await backend.release(user_id, ended)
+                result = await _aacquire(backend, user_id, session_id, max_streams)
+    except backend.errors:
+        logger.warning('Stream slot store unavailable for user %s', user_id, exc_info=True)
+        return None
+    return result == ADMITTED
+
+
+async def arelease_slots(user_id, session_ids):
+    backend = get_backends()[1]
+    try:
+        await backend.release(str(user_id), [str(session_id) for session_id in session_ids])
+    except backend.errors:
+        logger.warning('Stream slot release failed for user %s', user_id, exc_info=True)
@@ -51,3 +51,43 @@ def cleanup_old_stripe_events():
     """
     print(f"Cleaning stripe events at {timezone.now()}")
     return "Cleaned Events"
+
+@shared_task
+def update_trending_rankings():
+    """
+    Every 15 minutes: fold new watch history into the trending buckets and refresh the rankings.
+    """
+    from .trending import update_rankings
+
+    folded = update_rankings()
+    return f"Folded {folded} watch rows"
+
+@shared_task
+def fold_view_counters():
+    """
+    Every minute: fold the real-time view counters into ContentViewStats.
+    """
+    from .counters import fold_counters
+
+    folded = fold_counters()
+    return f"Folded counters for {folded} titles"
+
+@shared_task
+def ensure_watch_history_partitions():
+    """
+    Daily task to create upcoming monthly watch history partitions (Postgres only).
+    """
+    from .history_archive import ensure_partitions
+
+    partitions = ensure_partitions()
+    return f"Ensured {len(partitions)} partitions"
+
+@shared_task
+def expire_downloads():
+    """
+    Every 15 minutes: mark downloads whose license has run out as expired, in batches.
+    """
+    from .downloads import expire_downloads as expire
+
+    expired = expire()
+    return f"Expired {expired} downloads"
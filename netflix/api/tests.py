@@ -1,3 +1,441 @@
-from django.test import TestCase
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import stream_slots, trending
+from .autocomplete import Autocomplete
+from .db_routing import ReplicaRouter, check_pin_cache, pin_cache_key
+from .downloads import license_expiry, renew_device_licenses
+from .maturity import KIDS_MAX_AGE, profile_age
+from .models import (
+    Content, ContentRatingStats, Device, DeviceLogin, Download, MaturityLevel, Profile, Rating, Review, User, WatchHistory,
+    WatchProgress,
+)
+from .query_plans import INDEX, VENDORS, stream_limit_plans
+from .rating_stats import apply_rating_change
+from .renderers import ORJSONRenderer
+
+
+# ==================== READ REPLICA ROUTING ====================
+@override_settings(DATABASE_REPLICAS=['replica1'], DB_REPLICA_APPS=['api'], DB_REPLICA_STICKY_SECONDS=10)
+class ReplicaStickinessTests(TransactionTestCase):
+    # Not TestCase: the router keeps reads on the primary inside an open transaction.
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='viewer@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Viewer', age=30)
+        self.client = APIClient()
+        self.headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}',
+            'HTTP_X_PROFILE_ID': str(self.profile.id),
+        }
+
+    def routed_reads(self):
+        """(model, alias the router picked) for each read of GET /api/watch-history/; queries still run on default."""
+        decisions = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            decisions.append((model, db_for_read(router, model, **hints)))
+            return DEFAULT_DB_ALIAS
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+            response = self.client.get('/api/watch-history/', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return decisions
+
+    def test_unpinned_jwt_client_reads_replica(self):
+        decisions = self.routed_reads()
+        self.assertIn((WatchHistory, 'replica1'), decisions)
+
+    def test_pinned_jwt_client_reads_primary(self):
+        cache.set(pin_cache_key(self.user.pk), 1)
+        decisions = self.routed_reads()
+        # Only DRF's own user lookup runs before the request is authenticated.
+        after_auth = [(model, alias) for model, alias in decisions if model is not User]
+        self.assertTrue(after_auth)
+        self.assertEqual({alias for _, alias in after_auth}, {DEFAULT_DB_ALIAS})
+
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([warning.id for warning in check_pin_cache(None)], ['api.W001'])
+        redis_cache = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/3'}}
+        with override_settings(CACHES=redis_cache):
+            self.assertEqual(check_pin_cache(None), [])
+
+
+# ==================== METRICS ====================
+@override_settings(QUERY_INSTRUMENTATION_ENABLED=True, METRICS_TOKEN='scrape-token')
+class MetricsAccessTests(TestCase):
+    def test_anonymous_is_forbidden(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_non_staff_is_forbidden(self):
+        self.client.force_login(User.objects.create_user(email='viewer@example.com', password='secret'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_staff_and_token_are_allowed(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+        self.client.force_login(User.objects.create_user(email='staff@example.com', password='secret', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+# ==================== MATURITY ====================
+class ProfileAgeCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='parent@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Parent', age=40)
+
+    def test_profile_change_invalidates_cached_age(self):
+        self.assertEqual(profile_age(self.user, self.profile.id), 40)
+        self.profile.is_kid_profile = True
+        self.profile.save()
+        self.assertEqual(profile_age(self.user, self.profile.id), KIDS_MAX_AGE)
+
+    def test_header_formats_share_one_entry(self):
+        self.assertEqual(profile_age(self.user, self.profile.id.hex.upper()), 40)
+        self.profile.age = 10
+        self.profile.save()
+        self.assertEqual(profile_age(self.user, str(self.profile.id)), 10)
+        self.assertIsNone(profile_age(self.user, 'not-a-uuid'))
+
+
+
+class CatalogListingTests(TestCase):
+    def test_movies_are_paginated_newest_first(self):
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        for year in (2001, 2020, 2010):
+            Content.objects.create(
+                title=str(year), content_type=Content.ContentType.MOVIE, maturity_level=level,
+                release_date=date(year, 1, 1),
+            )
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='browser@example.com', password='secret'))
+        response = client.get('/api/movies/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([movie['title'] for movie in response.data['results']], ['2020', '2010'])
+        self.assertIsNotNone(response.data['next'])
+
+# ==================== HOME SCREEN ====================
+@override_settings(HOME_FANOUT_WORKERS=0)
+class HomeViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='family@example.com', password='secret')
+        self.kid = Profile.objects.create(user=self.user, name='Kid', age=8, is_kid_profile=True)
+        all_ages = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        adults = MaturityLevel.objects.create(code='R', name='Restricted', minimum_age=17)
+        self.cartoon = Content.objects.create(title='Cartoon', content_type=Content.ContentType.MOVIE, maturity_level=all_ages)
+        self.thriller = Content.objects.create(title='Thriller', content_type=Content.ContentType.MOVIE, maturity_level=adults)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def home(self, profile_id):
+        response = self.client.get('/api/home/', HTTP_X_PROFILE_ID=profile_id)
+        self.assertEqual(response.status_code, 200)
+        return {row['id']: [item['id'] for item in row['items']] for row in response.data['rows']}
+
+    def test_continue_watching_respects_maturity(self):
+        for content in (self.cartoon, self.thriller):
+            WatchProgress.objects.create(profile=self.kid, content=content, resume_time_seconds=60)
+        self.assertEqual(self.home(str(self.kid.id))['continue-watching'], [str(self.cartoon.id)])
+
+    def test_progress_invalidates_skeleton_cached_under_any_header_format(self):
+        self.assertNotIn('continue-watching', self.home(self.kid.id.hex.upper()))
+        WatchProgress.objects.create(profile=self.kid, content=self.cartoon, resume_time_seconds=60)
+        self.assertEqual(self.home(self.kid.id.hex.upper())['continue-watching'], [str(self.cartoon.id)])
+
+    def test_partial_skeleton_is_cached_briefly(self):
+        with mock.patch('api.views_home.build_skeleton', return_value=([], False)), \
+                mock.patch('api.views_home.cache.set') as cache_set:
+            self.home(str(self.kid.id))
+        self.assertEqual(cache_set.call_args.args[2], settings.HOME_PARTIAL_CACHE_TIMEOUT)
+
+
+# ==================== VIEW COUNTERS ====================
+class WatchProgressHeartbeatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='watcher@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Watcher', age=30)
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        self.content = Content.objects.create(title='Film', content_type=Content.ContentType.MOVIE, maturity_level=level)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_update_records_heartbeat(self):
+        WatchProgress.objects.create(profile=self.profile, content=self.content, resume_time_seconds=60)
+        with mock.patch('api.views.record_heartbeat') as heartbeat:
+            response = self.client.patch(
+                f'/api/watch-progress/{self.content.id}/', {'resume_time_seconds': 90},
+                format='json', HTTP_X_PROFILE_ID=str(self.profile.id),
+            )
+        self.assertEqual(response.status_code, 200)
+        heartbeat.assert_called_once_with(self.content.id, self.profile.id, 90)
+
+
+class SoftDeletedContentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='late@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Late', age=30)
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        self.content = Content.objects.create(
+            title='Removed', content_type=Content.ContentType.MOVIE, maturity_level=level, is_deleted=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_writes_for_soft_deleted_content_are_not_found(self):
+        for url, extra in [
+            ('/api/watch-progress/', {'resume_time_seconds': 60}),
+            ('/api/watch-history/', {'watch_started_at': '2026-01-01T20:00:00Z'}),
+            ('/api/watchlist/', {}),
+        ]:
+            with self.subTest(url):
+                response = self.client.post(
+                    url, {'content_id': str(self.content.id), **extra},
+                    format='json', HTTP_X_PROFILE_ID=str(self.profile.id),
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+
+# ==================== REVIEW FEED ====================
+class ContentReviewFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(email='reader@example.com', password='secret')
+        profile = Profile.objects.create(user=user, name='Reader', age=30)
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        self.content = Content.objects.create(title='Film', content_type=Content.ContentType.MOVIE, maturity_level=level)
+        Review.objects.create(profile=profile, content=self.content, body='Great', contains_spoilers=False)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = f'/api/content/{self.content.id}/reviews/'
+
+    def test_spoiler_filters_use_their_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan text is SQLite specific')
+        for spoilers, index in [('true', 'review_spoiler_feed_idx'), ('false', 'review_clean_feed_idx')]:
+            with self.subTest(spoilers), CaptureQueriesContext(connection) as queries:
+                self.client.get(self.url, {'contains_spoilers': spoilers})
+                sql = next(query['sql'] for query in queries.captured_queries if 'FROM "review"' in query['sql'])
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = ' | '.join(row[-1] for row in cursor.fetchall())
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_cached_page_of_deleted_title_is_not_found(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        Content.objects.filter(id=self.content.id).update(is_deleted=True)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+# ==================== AUTOCOMPLETE ====================
+class AutocompleteSnapshotTests(TestCase):
+    def setUp(self):
+        level = MaturityLevel.objects.create(code='PG', name='PG', minimum_age=10)
+        Content.objects.create(title='The Dark Knight', content_type=Content.ContentType.MOVIE, maturity_level=level)
+        self.path = os.path.join(tempfile.mkdtemp(), 'nested', 'autocomplete.json')
+
+    def test_snapshot_round_trips_as_json(self):
+        index = Autocomplete.build(version=7)
+        index.save(self.path)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(1), b'{')
+
+        loaded = Autocomplete.load(self.path)
+        self.assertEqual(loaded.version, 7)
+        self.assertEqual(loaded.complete('knig'), index.complete('knig'))
+        self.assertEqual(loaded.complete('knig', max_age=5), {'titles': [], 'cast': []})
+
+    def test_unreadable_snapshot_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'\x80\x05not json')
+        self.assertIsNone(Autocomplete.load(self.path))
+
+
+# ==================== RENDERERS ====================
+class ORJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            'id': uuid.UUID(int=1),
+            'login_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'naive_at': datetime(2024, 5, 1, 12, 30, 15, 999999),
+            'release_date': date(2024, 5, 1),
+            'starts': time(20, 15, 0, 500123),
+            'price': Decimal('4.99'),
+            'title': 'caf\u00e9',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+# ==================== TRENDING ====================
+class TrendingGenerationTests(TestCase):
+    def test_generation_is_reread_from_rankings(self):
+        cache.clear()
+        with mock.patch('api.trending.cache.set') as cache_set:
+            self.assertEqual(trending._generation(), 0)
+        cache_set.assert_called_once_with(trending.GENERATION_KEY, 0, trending.GENERATION_TIMEOUT)
+
+# ==================== RATINGS ====================
+class RatingStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='critic@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Critic', age=30)
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        self.content = Content.objects.create(title='Film', content_type=Content.ContentType.MOVIE, maturity_level=level)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rate(self, value):
+        response = self.client.post(
+            '/api/ratings/', {'content_id': str(self.content.id), 'rating_value': value},
+            format='json', HTTP_X_PROFILE_ID=str(self.profile.id),
+        )
+        self.assertIn(response.status_code, (200, 201))
+
+    def test_rating_again_replaces_previous(self):
+        self.rate(2)
+        self.rate(5)
+        stats = ContentRatingStats.objects.get(content=self.content)
+        self.assertEqual((stats.rating_count, stats.rating_sum, stats.stars_2, stats.stars_5), (1, 5, 0, 1))
+
+    def test_rating_cannot_move_to_another_title(self):
+        self.rate(4)
+        rating = Rating.objects.get(profile=self.profile)
+        other = Content.objects.create(title='Sequel', content_type=Content.ContentType.MOVIE, maturity_level=self.content.maturity_level)
+        response = self.client.put(
+            f'/api/ratings/{rating.id}/', {'content_id': str(other.id), 'rating_value': 2},
+            format='json', HTTP_X_PROFILE_ID=str(self.profile.id),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ContentRatingStats.objects.get(content=self.content).rating_count, 1)
+        self.assertFalse(ContentRatingStats.objects.filter(content=other).exists())
+
+    def test_insert_conflict_rerates_existing_row(self):
+        # The row a concurrent first rating created (and counted).
+        Rating.objects.create(profile=self.profile, content=self.content, rating_value=3)
+        apply_rating_change(self.content.id, None, 3)
+        self.rate(4)
+        stats = ContentRatingStats.objects.get(content=self.content)
+        self.assertEqual((stats.rating_count, stats.rating_sum), (1, 4))
+
+
+# ==================== STREAMING SESSIONS ====================
+@override_settings(STREAM_SLOTS_REDIS_URL='')
+class StreamSlotTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(stream_slots, '_backends', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='family-plan@example.com', password='secret')
+        self.profile = Profile.objects.create(user=self.user, name='Family', age=30)
+        self.device = Device.objects.create(user=self.user, device_type=Device.DeviceType.values[0], device_name='TV')
+
+    def start(self, session_id):
+        return DeviceLogin.objects.create(id=session_id, device=self.device, profile=self.profile)
+
+    def test_admitted_sessions_not_yet_inserted_hold_their_slot(self):
+        self.start(uuid.uuid4())
+        a, b = uuid.uuid4(), uuid.uuid4()
+        # Both requests acquire before either inserts its DeviceLogin row.
+        self.assertTrue(stream_slots.acquire_slot(self.user.id, a, 2))
+        self.assertFalse(stream_slots.acquire_slot(self.user.id, b, 2))
+        self.start(a)
+        self.assertEqual(stream_slots._active_sessions(self.user.id).count(), 2)
+
+    def test_sessions_ended_without_release_are_pruned(self):
+        ended = self.start(uuid.uuid4())
+        self.assertTrue(stream_slots.acquire_slot(self.user.id, ended.id, 1))
+        DeviceLogin.objects.filter(id=ended.id).update(logout_at=timezone.now())
+        self.assertTrue(stream_slots.acquire_slot(self.user.id, uuid.uuid4(), 1))
+
+
+class AsyncStreamLogoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='streamer@example.com', password='secret')
+        profile = Profile.objects.create(user=self.user, name='Streamer', age=30)
+        device = Device.objects.create(user=self.user, device_type=Device.DeviceType.values[0], device_name='TV')
+        self.session = DeviceLogin.objects.create(device=device, profile=profile)
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def logout(self, session_id):
+        return self.client.post(
+            '/api/async/stream/logout/', {'session_id': session_id},
+            content_type='application/json', HTTP_AUTHORIZATION=self.auth,
+        )
+
+    def test_session_id_is_normalized(self):
+        with mock.patch('api.views_async.arelease_slots') as release, mock.patch('api.views_async.apublish_event') as publish:
+            response = self.logout(self.session.id.hex.upper())
+        self.assertEqual(response.status_code, 200)
+        release.assert_called_once_with(self.user.id, [str(self.session.id)])
+        self.assertEqual(publish.call_args.kwargs['session_ids'], [str(self.session.id)])
+
+    def test_malformed_session_id_is_not_found(self):
+        self.assertEqual(self.logout('not-a-uuid').status_code, 404)
+
+
+
+class StreamLimitQueryPlanTests(TestCase):
+    def test_stream_limit_queries_are_index_only(self):
+        if connection.vendor not in VENDORS:
+            self.skipTest(f'No plan check for {connection.vendor}')
+        user = User.objects.create_user(email='planner@example.com', password='secret')
+        plans = stream_limit_plans(user)
+        self.assertEqual(len(plans), 2)
+        for name, sql, plan, index_only in plans:
+            with self.subTest(name):
+                self.assertTrue(index_only, f'{name} does not read only {INDEX}: {plan}')
+
+
+
+# ==================== DOWNLOADS ====================
+class DownloadRenewalTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='traveller@example.com', password='secret')
+        self.profile = Profile.objects.create(user=user, name='Traveller', age=30)
+        self.device = Device.objects.create(user=user, device_type=Device.DeviceType.values[0], device_name='Tablet')
+        level = MaturityLevel.objects.create(code='G', name='General', minimum_age=0)
+        self.content = Content.objects.create(title='Film', content_type=Content.ContentType.MOVIE, maturity_level=level)
+
+    def download(self, quality, status):
+        return Download.objects.create(
+            profile=self.profile, content=self.content, device=self.device, video_quality=quality,
+            download_status=status, progress_percentage=100, expires_at=license_expiry(),
+        )
+
+    def test_renewal_without_uhd_downgrades_above_hd(self):
+        uhd = self.download(Download.VideoQuality.UHD, Download.DownloadStatus.EXPIRED)
+        hd = self.download(Download.VideoQuality.HD, Download.DownloadStatus.EXPIRED)
+        renewed, _ = renew_device_licenses(self.device, supports_uhd=False)
+        self.assertEqual(renewed, 2)
+        uhd.refresh_from_db()
+        hd.refresh_from_db()
+        self.assertEqual(
+            (uhd.video_quality, uhd.download_status, uhd.progress_percentage),
+            (Download.VideoQuality.HD, Download.DownloadStatus.PENDING, 0),
+        )
+        self.assertEqual((hd.video_quality, hd.download_status), (Download.VideoQuality.HD, Download.DownloadStatus.COMPLETED))
+
+    def test_renewal_with_uhd_keeps_quality(self):
+        uhd = self.download(Download.VideoQuality.UHD, Download.DownloadStatus.COMPLETED)
+        renew_device_licenses(self.device, supports_uhd=True)
+        uhd.refresh_from_db()
+        self.assertEqual((uhd.video_quality, uhd.download_status), (Download.VideoQuality.UHD, Download.DownloadStatus.COMPLETED))
@@ -0,0 +1,183 @@
+"""
+Trending / Top-10 rankings.
+
+Watch history is folded into hourly `TrendingBucket` rows per (country,
+content) incrementally: each run only reads WatchHistory rows created after
+the `RankingCheckpoint` high-water mark (served by the created_at index) and
+adds their counts onto the existing buckets. The sliding-window rankings are
+then recomputed from the buckets alone, which stay small however large the
+history grows, and written to `TrendingRanking` and the cache.
+
+Titles are ranked by total watch time, then by number of views.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Content, RankingCheckpoint, TrendingBucket, TrendingRanking, WatchHistory
+
+WINDOWS = {
+    TrendingRanking.Window.DAY: timedelta(hours=24),
+    TrendingRanking.Window.WEEK: timedelta(days=7),
+}
+WORLDWIDE = ''
+CHECKPOINT = 'trending'
+GENERATION_KEY = 'trending:generation'
+# The generation is re-read from TrendingRanking at least this often, so a
+# process whose cache missed the beat task's update (per-process cache, evicted
+# key) still picks up a new ranking within a minute.
+GENERATION_TIMEOUT = 60
+
+# Only rows at least this old are folded, so a transaction that commits a
+# little after its created_at timestamp is not skipped by the high-water mark.
+INGEST_LAG = timedelta(minutes=2)
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def ranking_cache_key(generation, window, country_code):
+    return f'trending:{generation}:{window}:{country_code or "world"}'
+
+
+# ==================== INGEST ====================
+def fold_new_history(now=None, lag=INGEST_LAG):
+    """Add WatchHistory rows past the high-water mark onto the hourly buckets. Returns rows folded."""
+    now = now or timezone.now()
+    upper = now - lag
+    with transaction.atomic():
+        checkpoint, _ = RankingCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT, defaults={'high_water_mark': _hour(now) - max(WINDOWS.values())},
+        )
+        lower = checkpoint.high_water_mark
+        if upper <= lower:
+            return 0
+
+        groups = list(
+            WatchHistory.objects.filter(created_at__gt=lower, created_at__lte=upper)
+            .values('content_id', country=F('profile__user__country_code'), hour=TruncHour('created_at'))
+            .annotate(views=Count('id'), seconds=Sum('watched_seconds'))
+            .order_by()
+        )
+        if groups:
+            existing = {
+                (bucket.hour, bucket.country_code, bucket.content_id): bucket
+                for bucket in TrendingBucket.objects.filter(
+                    hour__in={group['hour'] for group in groups},
+                    content_id__in={group['content_id'] for group in groups},
+                )
+            }
+            created = []
+            for group in groups:
+                bucket = existing.get((group['hour'], group['country'], group['content_id']))
+                if bucket is None:
+                    created.append(TrendingBucket(
+                        hour=group['hour'], country_code=group['country'], content_id=group['content_id'],
+                        views=group['views'], watch_seconds=group['seconds'] or 0,
+                    ))
+                else:
+                    bucket.views += group['views']
+                    bucket.watch_seconds += group['seconds'] or 0
+            TrendingBucket.objects.bulk_create(created, batch_size=1000)
+            TrendingBucket.objects.bulk_update(existing.values(), ['views', 'watch_seconds'], batch_size=1000)
+
+        checkpoint.high_water_mark = upper
+        checkpoint.save(update_fields=['high_water_mark', 'updated_at'])
+    return sum(group['views'] for group in groups)
+
+
+def prune_buckets(now=None):
+    """Drop buckets that have slid out of the longest window."""
+    now = now or timezone.now()
+    return TrendingBucket.objects.filter(hour__lte=_hour(now) - max(WINDOWS.values())).delete()[0]
+
+
+# ==================== RANKINGS ====================
+def compute_rankings(now=None):
+    """Rebuild TrendingRanking for every window and country and publish it to the cache."""
+    now = now or timezone.now()
+    size = settings.TRENDING_SIZE
+    rankings = {}
+    for window, span in WINDOWS.items():
+        totals = (
+            TrendingBucket.objects.filter(hour__gt=_hour(now) - span, content__is_deleted=False)
+            .values_list('country_code', 'content_id')
+            .annotate(total_views=Sum('views'), total_seconds=Sum('watch_seconds'))
+            .order_by()
+        )
+        per_country = defaultdict(list)
+        worldwide = defaultdict(lambda: [0, 0])
+        for country_code, content_id, views, seconds in totals:
+            per_country[country_code].append((seconds, views, content_id))
+            world = worldwide[content_id]
+            world[0] += seconds
+            world[1] += views
+        per_country[WORLDWIDE] = [(seconds, views, content_id) for content_id, (seconds, views) in worldwide.items()]
+        for country_code, entries in per_country.items():
+            rankings[window, country_code] = heapq.nlargest(size, entries)
+
+    content_ids = {content_id for top in rankings.values() for _, _, content_id in top}
+    maturity = dict(Content.all_objects.filter(id__in=content_ids).values_list('id', 'maturity_level_id'))
+
+    rows = []
+    cached = {}
+    generation = int(now.timestamp())
+    for (window, country_code), top in rankings.items():
+        for rank, (seconds, views, content_id) in enumerate(top, start=1):
+            rows.append(TrendingRanking(
+                window=window, country_code=country_code, rank=rank, content_id=content_id,
+                views=views, watch_seconds=seconds, computed_at=now,
+            ))
+        cached[ranking_cache_key(generation, window, country_code)] = [
+            (str(content_id), maturity.get(content_id), views, seconds) for seconds, views, content_id in top
+        ]
+
+    with transaction.atomic():
+        TrendingRanking.objects.all().delete()
+        TrendingRanking.objects.bulk_create(rows, batch_size=1000)
+
+    cache.set_many(cached, settings.TRENDING_CACHE_TIMEOUT)
+    cache.set(GENERATION_KEY, generation, GENERATION_TIMEOUT)
+    return len(rows)
+
+
+def update_rankings(now=None, lag=INGEST_LAG):
+    """One scheduled run: fold new history, prune old buckets, republish rankings."""
+    now = now or timezone.now()
+    folded = fold_new_history(now, lag=lag)
+    prune_buckets(now)
+    compute_rankings(now)
+    return folded
+
+
+# ==================== READ PATH ====================
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        computed_at = TrendingRanking.objects.aggregate(latest=Max('computed_at'))['latest']
+        generation = int(computed_at.timestamp()) if computed_at else 0
+        cache.set(GENERATION_KEY, generation, GENERATION_TIMEOUT)
+    return generation
+
+
+def get_ranking(window, country_code):
+    """[(content_id, maturity_level_id, views, watch_seconds)] in rank order."""
+    key = ranking_cache_key(_generation(), window, country_code)
+    entries = cache.get(key)
+    if entries is None:
+        entries = [
+            (str(content_id), maturity_level_id, views, seconds)
+            for content_id, maturity_level_id, views, seconds in
+            TrendingRanking.objects.filter(window=window, country_code=country_code)
+            .order_by('rank').values_list('content_id', 'content__maturity_level_id', 'views', 'watch_seconds')
+        ]
+        cache.set(key, entries, settings.TRENDING_CACHE_TIMEOUT)
+    return entries
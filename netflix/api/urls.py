@@ -1,6 +1,6 @@
 from .views import (
     UserView, ProfileView, GenreViewSet, MovieViewSet, TVShowViewSet,
-    WatchHistoryViewSet, WatchProgressViewSet, RatingViewSet, ReviewViewSet, WatchlistViewSet,
+    WatchHistoryViewSet, WatchProgressViewSet, RatingViewSet, ReviewViewSet, ContentReviewListView, WatchlistViewSet,
     DownloadViewSet
 )
 from .views_stripe import (
@@ -8,9 +8,14 @@ from .views_stripe import (
     SubscriptionPlanListView, SubscriptionStatusView, ManageSubscriptionView, BillingHistoryView
 )
 from .views_device import (
-    DeviceTokenObtainPairView, ProfileSelectView, StreamLogoutView, ActiveStreamsView,
+    DeviceTokenObtainPairView, ProfileSelectView, StreamLogoutView, StreamEvictOthersView, ActiveStreamsView,
     CustomTokenRefreshView
 )
+from .views_search import SearchView, AutocompleteView
+from .views_home import HomeView, TrendingView, RecommendationsView, LiveViewsView
+from .views_async import (
+    AsyncProfileSelectView, AsyncStreamLogoutView, AsyncActiveStreamsView, AsyncStreamHeartbeatView, AsyncStreamEventsView
+)
 from django.urls import path, include
 # from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -33,14 +38,29 @@ router.register('downloads', DownloadViewSet, basename='download')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('content/<uuid:content_id>/reviews/', ContentReviewListView.as_view(), name='content-reviews'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('home/', HomeView.as_view(), name='home'),
+    path('trending/', TrendingView.as_view(), name='trending'),
+    path('recommendations/', RecommendationsView.as_view(), name='recommendations'),
+    path('stats/live/', LiveViewsView.as_view(), name='live-views'),
     path('auth/login/', DeviceTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 
 
     path('profile/select/', ProfileSelectView.as_view(), name='profile-select'),
     path('stream/logout/', StreamLogoutView.as_view(), name='stream-logout'),
+    path('stream/evict-others/', StreamEvictOthersView.as_view(), name='stream-evict-others'),
     path('stream/active/', ActiveStreamsView.as_view(), name='active-streams'),
 
+    # Async (ASGI) versions of the streaming-session endpoints
+    path('async/profile/select/', AsyncProfileSelectView.as_view(), name='async-profile-select'),
+    path('async/stream/logout/', AsyncStreamLogoutView.as_view(), name='async-stream-logout'),
+    path('async/stream/active/', AsyncActiveStreamsView.as_view(), name='async-active-streams'),
+    path('async/stream/heartbeat/', AsyncStreamHeartbeatView.as_view(), name='async-stream-heartbeat'),
+    path('async/stream/events/', AsyncStreamEventsView.as_view(), name='async-stream-events'),
+
 
     path('payment/stripe/checkout/', StripeCheckoutView.as_view(), name='stripe-checkout'),
     path('payment/stripe/verify-session/', VerifyStripeSessionView.as_view(), name='stripe-verify-session'),
@@ -1,5 +1,10 @@
-from rest_framework import viewsets, permissions, serializers
+from rest_framework import generics, viewsets, permissions, serializers
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
 from .models import (
     User, Profile, UserSubscription, Genre, Movie, TVShow, Content,
     WatchHistory, WatchProgress, Rating, Review, UserContentInteraction,
@@ -9,11 +14,22 @@ from .serializers import (
     UserSerializer, ProfileSerializer, 
     GenreSerializer, MovieSerializer, TVShowSerializer,
     WatchHistorySerializer, WatchProgressSerializer, RatingSerializer,
-    ReviewSerializer, WatchlistSerializer, DownloadSerializer, DownloadCreateSerializer
+    ReviewSerializer, ContentReviewSerializer, WatchlistSerializer, DownloadSerializer, DownloadCreateSerializer,
+    DownloadRenewSerializer
 )
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, inline_serializer, extend_schema_view, OpenApiExample
+from .catalog_cache import CatalogCacheMixin
+from .feed_cache import REVIEW_FEED_CACHE_TIMEOUT, SPOILER_FILTERS, review_feed_cache_key
+from .counters import record_heartbeat
+from .rating_stats import apply_rating_change
+from .maturity import MaturityFilterMixin
+from .pagination import CatalogPagination, KeysetPagination
+from .history_archive import hot_cutoff
+from .downloads import active_download_device_ids, license_expiry, renew_device_licenses
+from .sqlite_tuning import serialized_write
 
 
 @extend_schema(tags=['01. Accounts'])
@@ -91,61 +107,74 @@ class ProfileView(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['05. Content'])
-class GenreViewSet(viewsets.ReadOnlyModelViewSet):
+class GenreViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Genre.objects.all().order_by('display_order', 'name')
     serializer_class = GenreSerializer
     permission_classes = [permissions.IsAuthenticated]
+    read_replica = True
 
 
 @extend_schema(tags=['05. Content'])
-class MovieViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema(
+    parameters=[OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Only show titles this profile may watch', required=False)]
+)
+class MovieViewSet(MaturityFilterMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
-    List and retrieve movies.
+    List and retrieve movies, newest release first, paginated.
     Filter by genre using ?genre=Action
+    With X-Profile-ID, only titles suitable for the profile's age are returned.
     """
     serializer_class = MovieSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatalogPagination
+    read_replica = True
 
     def get_queryset(self):
         queryset = Content.objects.filter(content_type=Content.ContentType.MOVIE).select_related(
-            'movie_details', 'maturity_level'
+            'movie_details', 'maturity_level', 'rating_stats'
         ).prefetch_related(
             'contentgenre_set__genre',
             'contentcast_set__cast_member'
-        ).all()
+        ).order_by('-release_date', 'id')
         
         genre = self.request.query_params.get('genre')
         if genre:
-            queryset = queryset.filter(contentgenre_set__genre__name__iexact=genre)
+            queryset = queryset.filter(contentgenre__genre__name__iexact=genre)
             
-        return queryset
+        return self.filter_by_maturity(queryset)
 
 
 @extend_schema(tags=['05. Content'])
-class TVShowViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema(
+    parameters=[OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Only show titles this profile may watch', required=False)]
+)
+class TVShowViewSet(MaturityFilterMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
-    List and retrieve TV Shows.
+    List and retrieve TV Shows, newest release first, paginated.
     Detailed view includes seasons and episodes.
+    With X-Profile-ID, only titles suitable for the profile's age are returned.
     """
     serializer_class = TVShowSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatalogPagination
+    read_replica = True
 
     def get_queryset(self):
         queryset = Content.objects.filter(content_type=Content.ContentType.TV_SHOW).select_related(
-            'tv_show_details', 'maturity_level'
+            'tv_show_details', 'maturity_level', 'rating_stats'
         ).prefetch_related(
             'contentgenre_set__genre',
             'contentcast_set__cast_member',
             'tv_show_details__seasons',
             'tv_show_details__seasons__episodes',
             'tv_show_details__seasons__episodes__content'
-        ).all()
+        ).order_by('-release_date', 'id')
         
         genre = self.request.query_params.get('genre')
         if genre:
-            queryset = queryset.filter(contentgenre_set__genre__name__iexact=genre)
+            queryset = queryset.filter(contentgenre__genre__name__iexact=genre)
             
-        return queryset
+        return self.filter_by_maturity(queryset)
 
 
 # ==================== USER INTERACTION VIEWSETS ====================
@@ -179,19 +208,55 @@ class ProfileMixin:
         )
     ]
 )
+@extend_schema_view(
+    list=extend_schema(parameters=[
+        OpenApiParameter(name='since', type=OpenApiTypes.DATETIME, description='Oldest watch_started_at to include (default: start of the hot window)'),
+        OpenApiParameter(name='until', type=OpenApiTypes.DATETIME, description='Only include views started before this'),
+    ])
+)
 class WatchHistoryViewSet(ProfileMixin, viewsets.ModelViewSet):
-    """Track what the profile has watched."""
+    """
+    Track what the profile has watched.
+    Listing returns the last WATCH_HISTORY_HOT_MONTHS months unless ?since= / ?until= ask for older views.
+    """
     serializer_class = WatchHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'head']
+    read_replica = True
 
     def get_queryset(self):
         profile = self.get_profile()
-        return WatchHistory.objects.filter(profile=profile).select_related('content')
+        queryset = WatchHistory.objects.filter(profile=profile).select_related('content')
+        if self.action == 'list':
+            since, until = self._parse_bound('since'), self._parse_bound('until')
+            if since is None and until is None:
+                # Hot rows only: on Postgres this prunes to the recent monthly partitions.
+                since = hot_cutoff()
+            if since is not None:
+                queryset = queryset.filter(watch_started_at__gte=since)
+            if until is not None:
+                queryset = queryset.filter(watch_started_at__lt=until)
+        return queryset
+
+    def _parse_bound(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                moment = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise serializers.ValidationError({name: 'Use an ISO date or datetime.'})
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
 
     def perform_create(self, serializer):
         profile = self.get_profile()
-        content = Content.objects.get(id=serializer.validated_data['content_id'])
+        # Content.objects hides soft-deleted titles: they are a 404 like unknown ids.
+        content = get_object_or_404(Content, id=serializer.validated_data['content_id'])
         serializer.save(profile=profile, content=content)
 
 
@@ -222,15 +287,22 @@ class WatchProgressViewSet(ProfileMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         profile = self.get_profile()
-        content = Content.objects.get(id=serializer.validated_data['content_id'])
+        content = get_object_or_404(Content, id=serializer.validated_data['content_id'])
         # Use update_or_create for upsert
-        obj, created = WatchProgress.objects.update_or_create(
-            profile=profile,
-            content=content,
-            defaults={'resume_time_seconds': serializer.validated_data['resume_time_seconds']}
-        )
+        with serialized_write():
+            obj, created = WatchProgress.objects.update_or_create(
+                profile=profile,
+                content=content,
+                defaults={'resume_time_seconds': serializer.validated_data['resume_time_seconds']}
+            )
+        record_heartbeat(content.id, profile.id, obj.resume_time_seconds)
         return obj
 
+    def perform_update(self, serializer):
+        with serialized_write():
+            obj = serializer.save()
+        record_heartbeat(obj.content_id, obj.profile_id, obj.resume_time_seconds)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -269,15 +341,36 @@ class RatingViewSet(ProfileMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         profile = self.get_profile()
-        content = Content.objects.get(id=serializer.validated_data['content_id'])
-        # Upsert rating
-        obj, created = Rating.objects.update_or_create(
-            profile=profile,
-            content=content,
-            defaults={'rating_value': serializer.validated_data['rating_value']}
-        )
+        content = get_object_or_404(Content, id=serializer.validated_data['content_id'])
+        rating_value = serializer.validated_data['rating_value']
+        with transaction.atomic():
+            # Insert first: of two concurrent first ratings only one creates the
+            # row; the other fails on the unique constraint once it commits and
+            # re-rates it below, so the stats count the profile once.
+            try:
+                with transaction.atomic():
+                    obj = Rating.objects.create(profile=profile, content=content, rating_value=rating_value)
+                previous = None
+            except IntegrityError:
+                obj = Rating.objects.select_for_update().get(profile=profile, content=content)
+                previous = obj.rating_value
+                obj.rating_value = rating_value
+                obj.save(update_fields=['rating_value', 'updated_at'])
+            apply_rating_change(content.id, previous, obj.rating_value)
         return obj
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous = Rating.objects.select_for_update().values_list('rating_value', flat=True).get(pk=serializer.instance.pk)
+            obj = serializer.save()
+            apply_rating_change(obj.content_id, previous, obj.rating_value)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            previous = Rating.objects.select_for_update().values_list('rating_value', flat=True).filter(pk=instance.pk).first()
+            instance.delete()
+            apply_rating_change(instance.content_id, previous, None)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -327,7 +420,7 @@ class ReviewViewSet(ProfileMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         profile = self.get_profile()
-        content = Content.objects.get(id=serializer.validated_data['content_id'])
+        content = get_object_or_404(Content, id=serializer.validated_data['content_id'])
         serializer.save(profile=profile, content=content)
 
     def create(self, request, *args, **kwargs):
@@ -346,6 +439,59 @@ class ReviewViewSet(ProfileMixin, viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
+@extend_schema(tags=['06. User Interactions'])
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name='contains_spoilers', type=OpenApiTypes.STR, enum=['true', 'false'], description='false hides spoiler reviews, true shows only those'),
+        OpenApiParameter(name='cursor', type=OpenApiTypes.STR, description='Opaque cursor from the previous page\'s next link'),
+        OpenApiParameter(name='page_size', type=OpenApiTypes.INT, description='Max 100'),
+    ]
+)
+class ContentReviewListView(generics.ListAPIView):
+    """
+    Every profile's reviews of one title, newest first, with keyset pagination.
+    The first page of each spoiler filter is cached until a review of the title changes.
+    """
+    serializer_class = ContentReviewSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = Review.objects.filter(content_id=self.kwargs['content_id']).select_related('profile').only(
+            'id', 'title', 'body', 'contains_spoilers', 'created_at', 'profile__name'
+        )
+        spoilers = self.request.query_params.get('contains_spoilers', 'all')
+        if spoilers != 'all':
+            queryset = queryset.filter(contains_spoilers=spoilers == 'true')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        content_id = self.kwargs['content_id']
+        spoilers = request.query_params.get('contains_spoilers', 'all')
+        if spoilers not in SPOILER_FILTERS:
+            return Response({'error': 'contains_spoilers must be true or false.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Checked before the cache: a title deleted since its page was cached is a 404.
+        if not Content.objects.filter(id=content_id).exists():
+            return Response(
+                {"error": "Content not found with the provided ID."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        paginator = self.paginator
+        key = review_feed_cache_key(content_id, spoilers) if paginator.is_first_page(request) else None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            paginator.request, paginator.next_cursor = request, cached['next_cursor']
+            return paginator.get_paginated_response(cached['results'])
+
+        page = self.paginate_queryset(self.get_queryset())
+        data = self.get_serializer(page, many=True).data
+        if key:
+            cache.set(key, {'results': list(data), 'next_cursor': paginator.next_cursor}, REVIEW_FEED_CACHE_TIMEOUT)
+        return self.get_paginated_response(data)
+
+
 @extend_schema(tags=['06. User Interactions'])
 @extend_schema(
     parameters=[OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Active Profile ID', required=True)],
@@ -373,7 +519,7 @@ class WatchlistViewSet(ProfileMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         profile = self.get_profile()
-        content = Content.objects.get(id=serializer.validated_data['content_id'])
+        content = get_object_or_404(Content, id=serializer.validated_data['content_id'])
         obj, created = UserContentInteraction.objects.update_or_create(
             profile=profile,
             content=content,
@@ -462,26 +608,13 @@ class DownloadViewSet(ProfileMixin, viewsets.ModelViewSet):
                 'plan_name': plan.name
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # CHECK 2: Device limit (count unique devices with active downloads)
-        active_download_devices = Download.objects.filter(
-            profile__user=user,
-            download_status__in=[Download.DownloadStatus.PENDING, Download.DownloadStatus.DOWNLOADING, Download.DownloadStatus.COMPLETED],
-            expires_at__gt=timezone.now()
-        ).values('device_id').distinct().count()
-        
-        # Check if this is a new device
-        device_already_has_downloads = Download.objects.filter(
-            profile__user=user,
-            device=device,
-            download_status__in=[Download.DownloadStatus.PENDING, Download.DownloadStatus.DOWNLOADING, Download.DownloadStatus.COMPLETED],
-            expires_at__gt=timezone.now()
-        ).exists()
-        
-        if not device_already_has_downloads and active_download_devices >= plan.max_download_devices:
+        # CHECK 2: Device limit (unique devices with active downloads; a new device needs a free one)
+        active_devices = active_download_device_ids(user)
+        if device.id not in active_devices and len(active_devices) >= plan.max_download_devices:
             return Response({
                 'error': 'Maximum download devices reached',
                 'max_devices': plan.max_download_devices,
-                'active_devices': active_download_devices
+                'active_devices': len(active_devices)
             }, status=status.HTTP_403_FORBIDDEN)
         
         # CHECK 3: Quality restriction (UHD only for Premium)
@@ -498,7 +631,7 @@ class DownloadViewSet(ProfileMixin, viewsets.ModelViewSet):
             device=device,
             video_quality=allowed_quality,
             download_status=Download.DownloadStatus.PENDING,
-            expires_at=timezone.now() + timezone.timedelta(days=30),
+            expires_at=license_expiry(),
             progress_percentage=0
         )
         
@@ -507,4 +640,53 @@ class DownloadViewSet(ProfileMixin, viewsets.ModelViewSet):
         if allowed_quality != requested_quality:
             response_data['notice'] = f'Quality downgraded to {allowed_quality} (UHD not available on your plan)'
         
-        return Response(response_data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        request=DownloadRenewSerializer,
+        responses=inline_serializer(
+            name='DownloadRenewResponse',
+            fields={'renewed': serializers.IntegerField(), 'expires_at': serializers.DateTimeField()}
+        )
+    )
+    @action(detail=False, methods=['post'])
+    def renew(self, request):
+        """
+        Renew the licenses of every download on a device (all profiles) when it
+        comes back online: one request, one UPDATE.
+        """
+        input_serializer = DownloadRenewSerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+        user = request.user
+        
+        try:
+            device = Device.objects.get(id=input_serializer.validated_data['device_id'], user=user)
+        except Device.DoesNotExist:
+            return Response({'error': 'Invalid device'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            subscription = user.subscriptions.select_related('subscription_plan').get(
+                status=UserSubscription.SubscriptionStatus.ACTIVE,
+                current_period_end__gt=timezone.now()
+            )
+        except UserSubscription.DoesNotExist:
+            return Response({'error': 'Active subscription required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        plan = subscription.subscription_plan
+        if not plan.allows_downloads:
+            return Response({
+                'error': 'Downloads not available on your plan',
+                'plan_name': plan.name
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # A device whose downloads all expired counts as a new download device again
+        active_devices = active_download_device_ids(user)
+        if device.id not in active_devices and len(active_devices) >= plan.max_download_devices:
+            return Response({
+                'error': 'Maximum download devices reached',
+                'max_devices': plan.max_download_devices,
+                'active_devices': len(active_devices)
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        renewed, expires_at = renew_device_licenses(device, plan.supports_uhd)
+        return Response({'renewed': renewed, 'expires_at': expires_at})
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Async streaming-session endpoints for ASGI deployments (uvicorn).
+
+Same behaviour and payloads as ProfileSelectView, StreamLogoutView,
+ActiveStreamsView and the watch progress heartbeat, under /api/async/, plus
+the server-sent session events stream (api/stream_events.py).
+They are plain async Django views: the database is reached through the
+async ORM (aget, acount, acreate, ...) and Redis through redis.asyncio, so
+a worker holds thousands of open sessions on one event loop instead of one
+thread per request. Under WSGI they still work, one event loop per request.
+
+DRF views are synchronous, so authentication (JWT bearer tokens, as in the
+DRF API) and JSON handling are done here.
+"""
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .counters import arecord_heartbeat
+from .device_utils import get_client_ip
+from .ids import interaction_id
+from .models import Content, Device, DeviceLogin, Profile, User, UserSubscription, WatchProgress
+from .sqlite_tuning import serialized_write
+from .stream_events import SESSION_ENDED, SESSION_KICKED, SESSION_STARTED, apublish_event, events
+from .stream_slots import aacquire_slot, arelease_slots
+
+_jwt = JWTAuthentication()
+
+
+async def authenticate(request):
+    """The user of a valid `Authorization: Bearer <access token>` header, else None."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = _jwt.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = _jwt.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]})
+    except (KeyError, User.DoesNotExist):
+        return None
+    return user if user.is_active else None
+
+
+def error(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+async def active_subscription(user):
+    return await (
+        UserSubscription.objects.select_related('subscription_plan')
+        .aget(user=user, status=UserSubscription.SubscriptionStatus.ACTIVE, current_period_end__gt=timezone.now())
+    )
+
+
+def active_sessions(user):
+    return DeviceLogin.objects.filter(user=user, logout_at__isnull=True)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """Async view that requires a JWT-authenticated user and parses JSON bodies."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        if request.method == 'POST':
+            try:
+                self.data = json.loads(request.body or b'{}')
+            except ValueError:
+                return error('Invalid JSON body', 400)
+            if not isinstance(self.data, dict):
+                return error('Invalid JSON body', 400)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+# ==================== STREAM SESSIONS ====================
+class AsyncProfileSelectView(AsyncAPIView):
+    """ProfileSelectView: start streaming on a profile if a stream slot is free."""
+
+    async def post(self, request):
+        profile_id = self.data.get('profile_id')
+        device_id = request.headers.get('X-Device-ID')
+        if not profile_id:
+            return error('profile_id is required', 400)
+        if not device_id:
+            return error('X-Device-ID header is required', 400)
+
+        try:
+            profile = await Profile.objects.aget(id=profile_id, user=request.user)
+        except (Profile.DoesNotExist, ValidationError):
+            return error('Invalid profile', 404)
+        try:
+            device = await Device.objects.aget(id=device_id, user=request.user)
+        except (Device.DoesNotExist, ValidationError):
+            return error('Invalid device', 404)
+        try:
+            subscription = await active_subscription(request.user)
+        except UserSubscription.DoesNotExist:
+            return error('Active subscription required', 403)
+        max_streams = subscription.subscription_plan.max_concurrent_streams
+
+        existing_session = await DeviceLogin.objects.filter(device=device, profile=profile, logout_at__isnull=True).afirst()
+        if existing_session:
+            return JsonResponse({'message': 'Session already active', 'session_id': str(existing_session.id)})
+
+        session_id = interaction_id()
+        admitted = await aacquire_slot(request.user.id, session_id, max_streams)
+        if admitted is None:
+            admitted = await active_sessions(request.user).acount() < max_streams
+        if not admitted:
+            return error(
+                'Too many concurrent streams', 403,
+                max_streams=max_streams, active_streams=await active_sessions(request.user).acount(),
+            )
+
+        try:
+            session = await DeviceLogin.objects.acreate(
+                id=session_id, device=device, profile=profile, ip_address=get_client_ip(request),
+            )
+        except Exception:
+            await arelease_slots(request.user.id, [session_id])
+            raise
+        await apublish_event(request.user.id, SESSION_STARTED, session_ids=[session.id], device_id=device.id, profile_id=profile.id)
+        return JsonResponse({'message': 'Stream started', 'session_id': str(session.id)})
+
+
+class AsyncStreamLogoutView(AsyncAPIView):
+    """StreamLogoutView: end one session, or every session on the X-Device-ID device."""
+
+    async def post(self, request):
+        session_id = self.data.get('session_id')
+        device_id = request.headers.get('X-Device-ID')
+
+        if session_id:
+            # Slot store members and event payloads use the canonical form.
+            try:
+                session_id = str(uuid.UUID(str(session_id)))
+            except ValueError:
+                return error('Session not found', 404)
+            sessions = active_sessions(request.user).filter(id=session_id)
+            session_device_id = await sessions.values_list('device_id', flat=True).afirst()
+            if session_device_id is None or not await sessions.aupdate(logout_at=timezone.now()):
+                return error('Session not found', 404)
+            await arelease_slots(request.user.id, [session_id])
+            kicked = device_id and str(session_device_id) != device_id
+            await apublish_event(
+                request.user.id, SESSION_KICKED if kicked else SESSION_ENDED,
+                session_ids=[session_id], device_id=session_device_id,
+            )
+            return JsonResponse({'message': 'Session ended'})
+
+        if device_id:
+            try:
+                sessions = active_sessions(request.user).filter(device_id=device_id)
+                session_ids = [pk async for pk in sessions.values_list('id', flat=True)]
+            except ValidationError:
+                session_ids = []
+            updated = await DeviceLogin.objects.filter(id__in=session_ids, logout_at__isnull=True).aupdate(logout_at=timezone.now())
+            await arelease_slots(request.user.id, session_ids)
+            if updated:
+                await apublish_event(request.user.id, SESSION_ENDED, session_ids=session_ids, device_id=device_id)
+            return JsonResponse({'message': f'{updated} session(s) ended'})
+
+        return error('session_id or X-Device-ID header required', 400)
+
+
+class AsyncActiveStreamsView(AsyncAPIView):
+    """ActiveStreamsView: the user's active sessions and stream limit."""
+
+    async def get(self, request):
+        sessions = [
+            {
+                'session_id': str(session.id),
+                'device_name': session.device.device_name,
+                'device_type': session.device.device_type,
+                'profile_name': session.profile.name,
+                'login_at': session.login_at.isoformat(),
+                'ip_address': session.ip_address,
+            }
+            async for session in active_sessions(request.user).select_related('device', 'profile')
+        ]
+        try:
+            max_streams = (await active_subscription(request.user)).subscription_plan.max_concurrent_streams
+        except UserSubscription.DoesNotExist:
+            max_streams = 0
+        return JsonResponse({'max_streams': max_streams, 'active_count': len(sessions), 'sessions': sessions})
+
+
+class AsyncStreamEventsView(AsyncAPIView):
+    """
+    Server-sent events for the user's streaming sessions: session_started,
+    session_ended, session_kicked and resync (see api/stream_events.py).
+    Keep it open instead of polling ActiveStreamsView.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            # A WSGI worker would buffer the endless stream and never respond.
+            return error('Stream events require an ASGI server', 501)
+        response = StreamingHttpResponse(events(request.user.id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+# ==================== HEARTBEAT ====================
+def _save_progress(profile_id, content_id, position):
+    with serialized_write():
+        progress, _ = WatchProgress.objects.update_or_create(
+            profile_id=profile_id, content_id=content_id, defaults={'resume_time_seconds': position},
+        )
+    return progress
+
+
+class AsyncStreamHeartbeatView(AsyncAPIView):
+    """
+    Playback heartbeat: POST /api/watch-progress/ without the nested content
+    in the response. Body: {"content_id": ..., "resume_time_seconds": ...};
+    header X-Profile-ID.
+    """
+
+    async def post(self, request):
+        profile_id = request.headers.get('X-Profile-ID')
+        if not profile_id:
+            return error('X-Profile-ID header is required.', 400)
+        content_id = self.data.get('content_id')
+        position = self.data.get('resume_time_seconds')
+        if not content_id or not isinstance(position, int) or isinstance(position, bool) or position < 0:
+            return error('content_id and a non-negative integer resume_time_seconds are required', 400)
+
+        try:
+            profile = await Profile.objects.aget(id=profile_id, user=request.user)
+        except (Profile.DoesNotExist, ValidationError):
+            return error('Invalid profile.', 400)
+        try:
+            if not await Content.objects.filter(id=content_id).aexists():
+                return error('Content not found', 404)
+        except ValidationError:
+            return error('Content not found', 404)
+
+        progress = await sync_to_async(_save_progress)(profile.id, content_id, position)
+        await arecord_heartbeat(content_id, profile.id, position)
+        return JsonResponse({
+            'id': str(progress.id),
+            'content_id': str(content_id),
+            'resume_time_seconds': progress.resume_time_seconds,
+            'last_watched_at': progress.last_watched_at.isoformat(),
+        })
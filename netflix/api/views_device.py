@@ -4,6 +4,7 @@ Custom authentication views with device tracking.
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
 from .models import Device, DeviceLogin, Profile, UserSubscription
 from .device_utils import get_device_info, get_client_ip
@@ -96,6 +97,13 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from .ids import interaction_id
+from .stream_slots import acquire_slot, end_sessions, release_slots
+from .stream_events import SESSION_ENDED, SESSION_KICKED, SESSION_STARTED, publish_event
+
+
+def active_stream_count(user):
+    return DeviceLogin.objects.filter(user=user, logout_at__isnull=True).count()
 
 
 @extend_schema(tags=['04. Profiles'])
@@ -184,12 +192,6 @@ class ProfileSelectView(APIView):
         
         max_streams = subscription.subscription_plan.max_concurrent_streams
         
-        # Count active streams (DeviceLogins where logout_at is NULL)
-        active_streams = DeviceLogin.objects.filter(
-            device__user=request.user,
-            logout_at__isnull=True
-        ).count()
-        
         # Check if this device already has an active session
         existing_session = DeviceLogin.objects.filter(
             device=device,
@@ -204,22 +206,36 @@ class ProfileSelectView(APIView):
                 'session_id': str(existing_session.id)
             })
         
-        # Check stream limit
-        if active_streams >= max_streams:
+        # Check stream limit: claim a slot for the new session id up front
+        session_id = interaction_id()
+        admitted = acquire_slot(request.user.id, session_id, max_streams)
+        if admitted is None:
+            # Slot store unavailable: count active streams (DeviceLogins where logout_at is NULL)
+            admitted = active_stream_count(request.user) < max_streams
+        if not admitted:
             return Response(
                 {
                     'error': 'Too many concurrent streams',
                     'max_streams': max_streams,
-                    'active_streams': active_streams
+                    'active_streams': active_stream_count(request.user)
                 },
                 status=status.HTTP_403_FORBIDDEN
             )
         
         # Create new DeviceLogin session
-        session = DeviceLogin.objects.create(
-            device=device,
-            profile=profile,
-            ip_address=get_client_ip(request)
+        try:
+            session = DeviceLogin.objects.create(
+                id=session_id,
+                device=device,
+                profile=profile,
+                ip_address=get_client_ip(request)
+            )
+        except Exception:
+            release_slots(request.user.id, [session_id])
+            raise
+        publish_event(
+            request.user.id, SESSION_STARTED,
+            session_ids=[session.id], device_id=device.id, profile_id=profile.id
         )
         
         return Response({
@@ -282,11 +298,18 @@ class StreamLogoutView(APIView):
             try:
                 session = DeviceLogin.objects.get(
                     id=session_id,
-                    device__user=request.user,
+                    user=request.user,
                     logout_at__isnull=True
                 )
                 session.logout_at = timezone.now()
                 session.save()
+                release_slots(request.user.id, [session.id])
+                # Ended from another device: tell that device to stop playback
+                kicked = device_id and str(session.device_id) != device_id
+                publish_event(
+                    request.user.id, SESSION_KICKED if kicked else SESSION_ENDED,
+                    session_ids=[session.id], device_id=session.device_id
+                )
                 return Response({'message': 'Session ended'})
             except DeviceLogin.DoesNotExist:
                 return Response(
@@ -296,11 +319,19 @@ class StreamLogoutView(APIView):
         
         elif device_id:
             # Logout all sessions on this device
-            updated = DeviceLogin.objects.filter(
+            sessions = DeviceLogin.objects.filter(
                 device_id=device_id,
-                device__user=request.user,
+                user=request.user,
                 logout_at__isnull=True
-            ).update(logout_at=timezone.now())
+            )
+            session_ids = list(sessions.values_list('id', flat=True))
+            updated = sessions.filter(id__in=session_ids).update(logout_at=timezone.now())
+            release_slots(request.user.id, session_ids)
+            if updated:
+                publish_event(
+                    request.user.id, SESSION_ENDED,
+                    session_ids=session_ids, device_id=device_id
+                )
             
             return Response({
                 'message': f'{updated} session(s) ended'
@@ -312,6 +343,72 @@ class StreamLogoutView(APIView):
         )
 
 
+@extend_schema(tags=['08. Streaming'])
+@extend_schema(
+    request=inline_serializer(
+        name='StreamEvictOthersRequest',
+        fields={'session_id': serializers.UUIDField(required=False)}
+    ),
+    examples=[
+        OpenApiExample(
+            'Sign Out Other Devices',
+            value={'session_id': '11111111-2222-3333-4444-555555555555'},
+            request_only=True
+        )
+    ]
+)
+class StreamEvictOthersView(APIView):
+    """
+    Sign out other devices: end every active session except the current one
+    (session_id, or all sessions on the X-Device-ID device) to free their slots.
+    Evicted devices receive a session_kicked event.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='X-Device-ID',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description='Device to keep (optional if session_id provided)',
+                required=False
+            )
+        ]
+    )
+    def post(self, request):
+        session_id = request.data.get('session_id')
+        device_id = request.headers.get('X-Device-ID')
+        if not session_id and not device_id:
+            return Response(
+                {'error': 'session_id or X-Device-ID header required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # The session (or device) to keep must be the caller's
+        sessions = DeviceLogin.objects.filter(user=request.user)
+        try:
+            if session_id:
+                current = sessions.filter(id=session_id, logout_at__isnull=True).exists()
+                others = sessions.exclude(id=session_id)
+            else:
+                current = Device.objects.filter(id=device_id, user=request.user).exists()
+                others = sessions.exclude(device_id=device_id)
+        except DjangoValidationError:
+            current = False
+        if not current:
+            return Response(
+                {'error': 'Session not found' if session_id else 'Invalid device'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # One UPDATE for all of them, then free their slots and notify the evicted devices
+        ended = end_sessions(others)
+        return Response({
+            'message': f'{ended} session(s) ended'
+        })
+
+
 @extend_schema(tags=['08. Streaming'])
 class ActiveStreamsView(APIView):
     """List all active streaming sessions for the user."""
@@ -319,7 +416,7 @@ class ActiveStreamsView(APIView):
     
     def get(self, request):
         active_sessions = DeviceLogin.objects.filter(
-            device__user=request.user,
+            user=request.user,
             logout_at__isnull=True
         ).select_related('device', 'profile')
         
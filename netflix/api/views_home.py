@@ -0,0 +1,324 @@
+"""
+Home screen assembled in one request.
+
+Each row (continue watching, my list, new releases, one per genre) is an
+independent id-only `values_list()` query. Rows run concurrently on a small
+thread pool with an overall deadline; a row that misses it is left out
+rather than holding up the page. The resulting skeleton (row titles and
+content ids) is cached per profile for HOME_CACHE_TIMEOUT seconds (only
+HOME_PARTIAL_CACHE_TIMEOUT when a row was left out) and dropped when the
+profile's progress or watchlist changes. Content details
+come from the shared content-mini cache.
+
+The Top-10 endpoint reads the rankings materialized by api/trending.py and
+the live endpoint the real-time counters in api/counters.py. Recommendations
+come from the item-item neighbors built by api/recommendations.py.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .catalog_cache import catalog_version
+from .content_cache import content_minis
+from .feed_cache import home_cache_key
+from .counters import live_top
+from .recommendations import recommend
+from .maturity import bracket_for_age, maturity_brackets, profile_age
+from .models import Content, Genre, TrendingRanking, UserContentInteraction, WatchProgress
+from .trending import WORLDWIDE, get_ranking
+
+logger = logging.getLogger(__name__)
+
+ROW_SIZE = 20
+TRENDING_LIMIT = 10
+LIVE_LIMIT_MAX = 100
+RECOMMENDATION_LIMIT = 20
+RECOMMENDATION_LIMIT_MAX = 50
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.HOME_FANOUT_WORKERS, thread_name_prefix='home-row')
+    return _executor
+
+
+# ==================== ROW QUERIES ====================
+# Each returns a list of (content_id, extra) pairs.
+def continue_watching(profile_id, levels):
+    rows = (
+        WatchProgress.objects.filter(
+            profile_id=profile_id, content__is_deleted=False, content__maturity_level_id__in=levels,
+        )
+        .order_by('-last_watched_at').values_list('content_id', 'resume_time_seconds')[:ROW_SIZE]
+    )
+    return [(content_id, {'resume_time_seconds': resume}) for content_id, resume in rows]
+
+
+def my_list(profile_id, levels):
+    rows = (
+        UserContentInteraction.objects.filter(
+            profile_id=profile_id, is_in_watchlist=True,
+            content__is_deleted=False, content__maturity_level_id__in=levels,
+        )
+        .order_by('-updated_at').values_list('content_id', flat=True)[:ROW_SIZE]
+    )
+    return [(content_id, None) for content_id in rows]
+
+
+def _catalog(levels):
+    return Content.objects.filter(episode_details__isnull=True, maturity_level_id__in=levels)
+
+
+def new_releases(profile_id, levels):
+    rows = _catalog(levels).order_by('-release_date').values_list('id', flat=True)[:ROW_SIZE]
+    return [(content_id, None) for content_id in rows]
+
+
+def genre_row(genre_id):
+    def query(profile_id, levels):
+        rows = (
+            _catalog(levels).filter(contentgenre__genre_id=genre_id)
+            .order_by('-release_date').values_list('id', flat=True)[:ROW_SIZE]
+        )
+        return [(content_id, None) for content_id in rows]
+    return query
+
+
+def home_genres():
+    key = f'home:genres:{catalog_version()}'
+    genres = cache.get(key)
+    if genres is None:
+        genres = list(
+            Genre.objects.order_by('display_order', 'name')
+            .values_list('id', 'name')[:settings.HOME_GENRE_ROWS]
+        )
+        cache.set(key, genres, settings.CATALOG_CACHE_TIMEOUT)
+    return genres
+
+
+def _run_row(query, profile_id, levels):
+    try:
+        return query(profile_id, levels)
+    finally:
+        # Worker threads hold their own connections; apply the same
+        # CONN_MAX_AGE / health rules the request cycle applies.
+        close_old_connections()
+
+
+def build_skeleton(profile_id, levels):
+    """
+    ([{'id', 'title', 'items': [(content_id, extra)]}], complete): empty,
+    timed-out and failed rows are left out; `complete` is False if any row
+    timed out or failed.
+    """
+    rows = [
+        ('continue-watching', 'Continue Watching', continue_watching),
+        ('my-list', 'My List', my_list),
+        ('new-releases', 'New Releases', new_releases),
+    ] + [(f'genre:{genre_id}', name, genre_row(genre_id)) for genre_id, name in home_genres()]
+
+    if settings.HOME_FANOUT_WORKERS <= 0:
+        results = {row_id: query(profile_id, levels) for row_id, _, query in rows}
+    else:
+        executor = _get_executor()
+        futures = {row_id: executor.submit(_run_row, query, profile_id, levels) for row_id, _, query in rows}
+        wait(futures.values(), timeout=settings.HOME_ROW_TIMEOUT)
+        results = {}
+        for row_id, future in futures.items():
+            if not future.done():
+                logger.warning('Home row %s missed the %ss deadline', row_id, settings.HOME_ROW_TIMEOUT)
+                continue
+            try:
+                results[row_id] = future.result()
+            except Exception:
+                logger.exception('Home row %s failed', row_id)
+
+    skeleton = [
+        {'id': row_id, 'title': title, 'items': [(str(content_id), extra) for content_id, extra in results[row_id]]}
+        for row_id, title, _ in rows
+        if results.get(row_id)
+    ]
+    return skeleton, len(results) == len(rows)
+
+
+@extend_schema(tags=['05. Content'])
+class HomeView(APIView):
+    """
+    All home screen rows for the active profile in one response:
+    continue watching, my list, new releases and one row per genre,
+    filtered to what the profile may watch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Active Profile ID', required=True)],
+    )
+    def get(self, request):
+        profile_id = request.headers.get('X-Profile-ID')
+        if not profile_id:
+            return Response({'error': 'X-Profile-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        age = profile_age(request.user, profile_id)
+        if age is None:
+            return Response({'error': 'Invalid profile.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        key = home_cache_key(profile_id)
+        version = catalog_version()
+        cached = cache.get(key)
+        if cached is not None and cached['version'] == version:
+            skeleton = cached['rows']
+        else:
+            bracket = bracket_for_age(age)
+            levels = maturity_brackets()['eligible'][bracket] if bracket is not None else []
+            skeleton, complete = build_skeleton(profile_id, levels)
+            timeout = settings.HOME_CACHE_TIMEOUT if complete else settings.HOME_PARTIAL_CACHE_TIMEOUT
+            cache.set(key, {'version': version, 'rows': skeleton}, timeout)
+
+        minis = content_minis(content_id for row in skeleton for content_id, _ in row['items'])
+        rows = []
+        for row in skeleton:
+            items = [dict(minis[content_id], **(extra or {})) for content_id, extra in row['items'] if content_id in minis]
+            if items:
+                rows.append({'id': row['id'], 'title': row['title'], 'items': items})
+        return Response({'rows': rows})
+
+
+@extend_schema(tags=['05. Content'])
+class TrendingView(APIView):
+    """
+    Most watched titles over the last 24 hours or 7 days in the user's
+    country (worldwide when the country has no ranking yet), filtered to
+    what the profile may watch when X-Profile-ID is given.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='window', type=OpenApiTypes.STR, enum=TrendingRanking.Window.values, description='Ranking window (default 24h)'),
+            OpenApiParameter(name='country', type=OpenApiTypes.STR, description="Two-letter country code (default: the user's)"),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, description=f'Number of titles (default {TRENDING_LIMIT})'),
+            OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Active Profile ID', required=False),
+        ],
+    )
+    def get(self, request):
+        window = request.query_params.get('window', TrendingRanking.Window.DAY)
+        if window not in TrendingRanking.Window.values:
+            return Response({'error': f"window must be one of {', '.join(TrendingRanking.Window.values)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', TRENDING_LIMIT)), settings.TRENDING_SIZE)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        levels = None
+        profile_id = request.headers.get('X-Profile-ID')
+        if profile_id:
+            age = profile_age(request.user, profile_id)
+            if age is None:
+                return Response({'error': 'Invalid profile.'}, status=status.HTTP_400_BAD_REQUEST)
+            bracket = bracket_for_age(age)
+            levels = set(maturity_brackets()['eligible'][bracket]) if bracket is not None else set()
+
+        country = request.query_params.get('country', request.user.country_code or WORLDWIDE).upper()
+        entries = get_ranking(window, country)
+        if not entries and country != WORLDWIDE:
+            country = WORLDWIDE
+            entries = get_ranking(window, country)
+
+        if levels is not None:
+            entries = [entry for entry in entries if entry[1] in levels]
+        entries = entries[:max(limit, 0)]
+
+        minis = content_minis(content_id for content_id, *_ in entries)
+        results = [
+            dict(minis[content_id], rank=rank, views=views, watch_seconds=seconds)
+            for rank, (content_id, _, views, seconds) in enumerate(entries, start=1)
+            if content_id in minis
+        ]
+        return Response({'window': window, 'country': country or None, 'results': results})
+
+
+@extend_schema(tags=['05. Content'])
+class RecommendationsView(APIView):
+    """
+    Titles similar to what the profile watched and rated highly, excluding
+    anything already watched. Profiles without history get the trending
+    titles for their country instead.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, description=f'Number of titles (default {RECOMMENDATION_LIMIT}, max {RECOMMENDATION_LIMIT_MAX})'),
+            OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Active Profile ID', required=True),
+        ],
+    )
+    def get(self, request):
+        profile_id = request.headers.get('X-Profile-ID')
+        if not profile_id:
+            return Response({'error': 'X-Profile-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        age = profile_age(request.user, profile_id)
+        if age is None:
+            return Response({'error': 'Invalid profile.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', RECOMMENDATION_LIMIT)), 1), RECOMMENDATION_LIMIT_MAX)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        bracket = bracket_for_age(age)
+        levels = maturity_brackets()['eligible'][bracket] if bracket is not None else []
+        source = 'personalized'
+        scored = recommend(profile_id, limit, levels)
+        if not scored:
+            source = 'trending'
+            allowed = set(levels)
+            entries = get_ranking(TrendingRanking.Window.WEEK, request.user.country_code or WORLDWIDE)
+            if not entries:
+                entries = get_ranking(TrendingRanking.Window.WEEK, WORLDWIDE)
+            scored = [(content_id, None) for content_id, level, *_ in entries if level in allowed][:limit]
+
+        minis = content_minis(content_id for content_id, _ in scored)
+        results = [dict(minis[content_id], score=score) for content_id, score in scored if content_id in minis]
+        return Response({'source': source, 'results': results})
+
+@extend_schema(tags=['05. Content'])
+class LiveViewsView(APIView):
+    """Staff dashboard: content most played in the last `minutes`, from the real-time counters."""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='minutes', type=OpenApiTypes.INT, description='Window in minutes (default 60)'),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, description='Number of titles (default 20, max 100)'),
+        ],
+    )
+    def get(self, request):
+        try:
+            minutes = int(request.query_params.get('minutes', 60))
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({'error': 'minutes and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < minutes <= settings.VIEW_COUNTER_RETENTION // 60 or not 0 < limit <= LIVE_LIMIT_MAX:
+            return Response({'error': 'minutes or limit out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        top = live_top(minutes, limit)
+        minis = content_minis(content_id for content_id, *_ in top)
+        results = [
+            dict(minis[content_id], watch_seconds=seconds, unique_viewers=viewers)
+            for content_id, seconds, viewers in top
+            if content_id in minis
+        ]
+        return Response({'minutes': minutes, 'results': results})
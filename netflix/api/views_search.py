@@ -0,0 +1,140 @@
+"""
+Catalog search and typeahead endpoints (see api/search.py and api/autocomplete.py).
+"""
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, inline_serializer
+from rest_framework import serializers, status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .autocomplete import autocomplete
+from .maturity import profile_age
+from .models import Content
+from .search import get_search_backend, parse_query
+from .serializers import SearchResultSerializer
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+class SearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+class SearchResults:
+    """
+    Lazy, sliceable result set so the paginator only asks the index for the
+    total and the requested page, then loads just those Content rows.
+    """
+
+    def __init__(self, backend, groups, content_type=None):
+        self.backend = backend
+        self.groups = groups
+        self.content_type = content_type
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.groups, self.content_type)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if page.stop <= page.start:
+            return []
+        hits = self.backend.search(
+            self.groups, self.content_type, limit=page.stop - page.start, offset=page.start
+        )
+        contents = Content.objects.select_related('maturity_level').in_bulk([content_id for content_id, _ in hits])
+        results = []
+        for content_id, score in hits:
+            content = contents.get(content_id)
+            if content is not None:
+                content.search_score = score
+                results.append(content)
+        return results
+
+
+@extend_schema(tags=['05. Content'])
+class SearchView(APIView):
+    """
+    Ranked full-text search over titles, descriptions, cast and genres.
+    Every word is prefix matched and small typos are tolerated, so it can be
+    called on each keystroke.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, description='Search text', required=True),
+            OpenApiParameter(name='type', type=OpenApiTypes.STR, description='movie or tv_show', enum=Content.ContentType.values),
+            OpenApiParameter(name='page', type=OpenApiTypes.INT),
+            OpenApiParameter(name='page_size', type=OpenApiTypes.INT, description='Max 50'),
+        ],
+        responses=SearchResultSerializer(many=True),
+    )
+    def get(self, request):
+        groups = parse_query(request.query_params.get('q', ''))
+        if not groups:
+            return Response(
+                {'error': 'q must contain at least one word of two or more characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_type = request.query_params.get('type')
+        if content_type and content_type not in Content.ContentType.values:
+            return Response(
+                {'error': f"type must be one of: {', '.join(Content.ContentType.values)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = self.pagination_class()
+        results = SearchResults(get_search_backend(), groups, content_type)
+        page = paginator.paginate_queryset(results, request, view=self)
+        return paginator.get_paginated_response(SearchResultSerializer(page, many=True).data)
+
+
+@extend_schema(tags=['05. Content'])
+class AutocompleteView(APIView):
+    """
+    Title and cast typeahead served from an in-memory index; safe to call on
+    every keystroke. With X-Profile-ID, only titles the profile may watch
+    (and cast appearing in them) are suggested.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, description='Typed prefix', required=True),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, description='Suggestions per group (max 20)'),
+            OpenApiParameter(name='X-Profile-ID', type=OpenApiTypes.STR, location=OpenApiParameter.HEADER, description='Active Profile ID'),
+        ],
+        responses=inline_serializer(
+            name='AutocompleteResponse',
+            fields={
+                'titles': serializers.ListField(child=serializers.DictField()),
+                'cast': serializers.ListField(child=serializers.DictField()),
+            }
+        ),
+    )
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_age = None
+        profile_id = request.headers.get('X-Profile-ID')
+        if profile_id:
+            max_age = profile_age(request.user, profile_id)
+            if max_age is None:
+                return Response({'error': 'Invalid profile.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(autocomplete.get().complete(request.query_params.get('q', ''), max(limit, 1), max_age))
+
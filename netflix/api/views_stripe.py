@@ -36,6 +36,7 @@ class SubscriptionPlanListView(generics.ListAPIView):
     queryset = SubscriptionPlan.objects.filter(is_active=True).order_by('display_order')
     serializer_class = SubscriptionPlanSerializer
     permission_classes = [IsAuthenticated]
+    read_replica = True
 
 
 @extend_schema(tags=['03. Subscription'])
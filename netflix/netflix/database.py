@@ -0,0 +1,145 @@
+"""
+DATABASES from the environment (.env / process env via decouple).
+
+DB_ENGINE=sqlite (default)
+    DB_NAME (default BASE_DIR/db.sqlite3). Connections wait up to
+    DB_BUSY_TIMEOUT seconds for a lock instead of failing with "database is
+    locked". SQLITE_PROFILE picks the PRAGMAs api/sqlite_tuning.py applies
+    to every new connection (SQLITE_PROFILES below): `development` only
+    switches to WAL, so readers do not block the writer; `production` is
+    tuned for single-node deployments and also starts write transactions
+    with BEGIN IMMEDIATE.
+
+DB_ENGINE=postgresql
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_SSLMODE.
+    DB_POOL=True (default) uses Django's native psycopg connection pool
+    (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT per process),
+    which checks each connection before handing it out. DB_POOL=False keeps
+    persistent connections for DB_CONN_MAX_AGE seconds instead, with
+    CONN_HEALTH_CHECKS. DB_STATEMENT_TIMEOUT (ms) cancels runaway queries
+    server side; 0 (default) disables it. It applies to every connection,
+    migrate included, so leave it unset for migrate: the data migrations
+    also lift it for themselves, but schema changes on large tables can
+    exceed it.
+
+DB_REPLICAS adds read replicas `replica1`, `replica2`, ... (comma separated):
+SQLite file paths, opened read-only, or Postgres `host[:port]` entries that
+share the primary's credentials and options. api/db_routing.py decides
+which reads go there.
+"""
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+
+SQLITE_PROFILES = {
+    'development': {
+        'journal_mode': 'WAL',
+    },
+    'production': {
+        'journal_mode': 'WAL',
+        # fsync at checkpoints only; with WAL a crash can lose the last
+        # commits but never corrupts the database.
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative: KiB, i.e. 64 MiB per connection
+        'temp_store': 'MEMORY',
+        'journal_size_limit': 64 * 1024 * 1024,
+    },
+}
+
+
+def sqlite_profile():
+    profile = config('SQLITE_PROFILE', default='development')
+    if profile not in SQLITE_PROFILES:
+        raise ImproperlyConfigured(f'SQLITE_PROFILE must be one of {", ".join(SQLITE_PROFILES)}, not {profile!r}.')
+    return profile
+
+
+def sqlite_pragmas(profile):
+    """PRAGMA name -> value for every new connection."""
+    busy_timeout = config('DB_BUSY_TIMEOUT', default=5, cast=float)
+    return dict(SQLITE_PROFILES[profile], busy_timeout=int(busy_timeout * 1000))
+
+
+def sqlite_database(base_dir):
+    options = {
+        # Seconds the sqlite3 module waits on a locked database (its busy handler);
+        # also covers the moment between connecting and the PRAGMAs.
+        'timeout': config('DB_BUSY_TIMEOUT', default=5, cast=float),
+    }
+    if sqlite_profile() == 'production':
+        # A deferred transaction that reads, then writes, fails at once with
+        # "database is locked" if another writer got in between, busy timeout
+        # or not. Taking the write lock at BEGIN makes writers queue instead.
+        options['transaction_mode'] = 'IMMEDIATE'
+    return {
+        'ENGINE': ENGINES['sqlite'],
+        'NAME': config('DB_NAME', default=str(base_dir / 'db.sqlite3')),
+        'OPTIONS': options,
+    }
+
+
+def postgresql_database():
+    options = {
+        'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        'sslmode': config('DB_SSLMODE', default='prefer'),
+        'application_name': config('DB_APPLICATION_NAME', default='netflix'),
+    }
+    statement_timeout = config('DB_STATEMENT_TIMEOUT', default=0, cast=int)
+    if statement_timeout:
+        options['options'] = f'-c statement_timeout={statement_timeout}'
+
+    database = {
+        'ENGINE': ENGINES['postgresql'],
+        'NAME': config('DB_NAME', default='netflix'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+        'OPTIONS': options,
+    }
+    if config('DB_POOL', default=True, cast=bool):
+        from psycopg_pool import ConnectionPool
+
+        # Pooled connections must not also be persistent (CONN_MAX_AGE stays 0).
+        options['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'check': ConnectionPool.check_connection,
+        }
+    else:
+        database['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+        database['CONN_HEALTH_CHECKS'] = True
+    return database
+
+
+def replica_database(primary, location):
+    replica = dict(primary, OPTIONS=dict(primary['OPTIONS']), TEST={'MIRROR': 'default'})
+    if primary['ENGINE'] == ENGINES['sqlite']:
+        replica['NAME'] = f'file:{location}?mode=ro'
+        replica['OPTIONS'].pop('transaction_mode', None)
+    else:
+        host, _, port = location.partition(':')
+        replica.update(HOST=host, PORT=port or primary['PORT'])
+    return replica
+
+
+def databases(base_dir):
+    engine = config('DB_ENGINE', default='sqlite')
+    if engine == 'sqlite':
+        default = sqlite_database(base_dir)
+    elif engine == 'postgresql':
+        default = postgresql_database()
+    else:
+        raise ImproperlyConfigured(f'DB_ENGINE must be one of {", ".join(ENGINES)}, not {engine!r}.')
+    replicas = config('DB_REPLICAS', default='', cast=Csv())
+    result = {'default': default}
+    for number, location in enumerate(replicas, start=1):
+        result[f'replica{number}'] = replica_database(default, location)
+    return result
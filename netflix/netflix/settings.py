@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+
+from .database import databases, sqlite_pragmas, sqlite_profile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +53,19 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson-backed JSON; falls back to the stdlib encoder if orjson is missing.
+    # MessagePack via Accept: application/msgpack or ?format=msgpack.
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.ORJSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Swagger/OpenAPI Configuration
@@ -77,12 +92,15 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'api.instrumentation.QueryInstrumentationMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -111,12 +129,23 @@ WSGI_APPLICATION = 'netflix.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# SQLite by default; DB_ENGINE=postgresql and friends in .env, see netflix/database.py.
+DATABASES = databases(BASE_DIR)
+
+# SQLite connection tuning (api/sqlite_tuning.py). With SQLITE_SERIALIZE_WRITES,
+# hot write paths (watch progress) queue on a per-process lock instead of
+# contending for the database lock.
+SQLITE_PROFILE = sqlite_profile()
+SQLITE_PRAGMAS = sqlite_pragmas(SQLITE_PROFILE)
+SQLITE_SERIALIZE_WRITES = config('SQLITE_SERIALIZE_WRITES', default=SQLITE_PROFILE == 'production', cast=bool)
+
+# Safe-method requests to views marked `read_replica = True` read from a replica
+# (api/db_routing.py); after a write the client sticks to the primary for
+# DB_REPLICA_STICKY_SECONDS so it reads its own writes.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+DB_REPLICA_APPS = config('DB_REPLICA_APPS', default='api', cast=Csv())
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=10, cast=int)
 
 
 # Password validation
@@ -166,6 +195,94 @@ FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Query / latency instrumentation (opt-in, see api/instrumentation.py)
+QUERY_INSTRUMENTATION_ENABLED = config('QUERY_INSTRUMENTATION_ENABLED', default=False, cast=bool)
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+# Bearer token for Prometheus scrapes of /metrics (staff sessions are always allowed).
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Response compression (gzip always; brotli/zstd when installed)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+# Shared cache. Catalog versions, the home / review feed and profile-age caches,
+# the replica read pin and the trending generation are invalidated by other
+# processes (admin, Celery, other workers), so every process must use the same
+# cache: set CACHE_REDIS_URL in any multi-process deployment. Empty URL: a
+# per-process LocMemCache (tests, single-process runs).
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'netflix',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Rendered catalog documents (movies, tv-shows, genres), in seconds
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# Catalog search: minimum seconds between typo-correction vocabulary rebuilds
+SEARCH_VOCABULARY_REFRESH = config('SEARCH_VOCABULARY_REFRESH', default=300, cast=int)
+
+# Title / cast typeahead (api/autocomplete.py). The JSON snapshot lives outside the
+# source tree by default; an empty path disables snapshots.
+AUTOCOMPLETE_SNAPSHOT_PATH = config(
+    'AUTOCOMPLETE_SNAPSHOT_PATH', default=str(Path.home() / '.cache' / 'netflix' / 'autocomplete.json'),
+)
+AUTOCOMPLETE_VERSION_CHECK = config('AUTOCOMPLETE_VERSION_CHECK', default=5, cast=float)
+
+# Home screen (api/views_home.py). HOME_FANOUT_WORKERS=0 builds rows sequentially.
+HOME_FANOUT_WORKERS = config('HOME_FANOUT_WORKERS', default=4, cast=int)
+HOME_ROW_TIMEOUT = config('HOME_ROW_TIMEOUT', default=2.0, cast=float)
+HOME_CACHE_TIMEOUT = config('HOME_CACHE_TIMEOUT', default=60, cast=int)
+# Skeletons missing a row (timed out or failed) are only kept this long
+HOME_PARTIAL_CACHE_TIMEOUT = config('HOME_PARTIAL_CACHE_TIMEOUT', default=5, cast=int)
+HOME_GENRE_ROWS = config('HOME_GENRE_ROWS', default=6, cast=int)
+
+# Trending / Top-10 rankings (api/trending.py), refreshed by the update-trending-rankings beat task.
+TRENDING_SIZE = config('TRENDING_SIZE', default=50, cast=int)
+TRENDING_CACHE_TIMEOUT = config('TRENDING_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Real-time view counters (api/counters.py). Empty URL: in-process counters (tests, local runs).
+VIEW_COUNTERS_REDIS_URL = config('VIEW_COUNTERS_REDIS_URL', default='')
+VIEW_COUNTER_BUCKET_SECONDS = config('VIEW_COUNTER_BUCKET_SECONDS', default=300, cast=int)
+VIEW_COUNTER_RETENTION = config('VIEW_COUNTER_RETENTION', default=86400, cast=int)
+VIEW_HEARTBEAT_MAX_SECONDS = config('VIEW_HEARTBEAT_MAX_SECONDS', default=120, cast=int)
+
+# Concurrent-stream slots (api/stream_slots.py). Empty URL: in-process slots (tests, single process).
+STREAM_SLOTS_REDIS_URL = config('STREAM_SLOTS_REDIS_URL', default='')
+STREAM_SLOT_TTL = config('STREAM_SLOT_TTL', default=6 * 3600, cast=int)
+
+# Stream session events pushed over SSE (api/stream_events.py). Defaults to the stream-slot Redis.
+STREAM_EVENTS_REDIS_URL = config('STREAM_EVENTS_REDIS_URL', default=STREAM_SLOTS_REDIS_URL)
+STREAM_EVENTS_KEEPALIVE = config('STREAM_EVENTS_KEEPALIVE', default=20, cast=int)
+STREAM_EVENTS_QUEUE_SIZE = config('STREAM_EVENTS_QUEUE_SIZE', default=16, cast=int)
+
+# Offline download licenses (api/downloads.py); the expire-downloads beat task flips lapsed ones in batches.
+DOWNLOAD_LICENSE_DAYS = config('DOWNLOAD_LICENSE_DAYS', default=30, cast=int)
+DOWNLOAD_EXPIRY_BATCH = config('DOWNLOAD_EXPIRY_BATCH', default=1000, cast=int)
+
+# Item-item recommendations (api/recommendations.py), rebuilt by `manage.py build_recommendations`.
+RECOMMENDATION_NEIGHBORS = config('RECOMMENDATION_NEIGHBORS', default=50, cast=int)
+RECOMMENDATION_SEEDS = config('RECOMMENDATION_SEEDS', default=50, cast=int)
+
+# Watch history tiers (api/history_archive.py): months listed by default, and
+# the age at which `archive_watch_history` moves rows out of the table.
+WATCH_HISTORY_HOT_MONTHS = config('WATCH_HISTORY_HOT_MONTHS', default=3, cast=int)
+WATCH_HISTORY_ARCHIVE_MONTHS = config('WATCH_HISTORY_ARCHIVE_MONTHS', default=24, cast=int)
+
+# Primary keys of interaction tables (watch history, progress, ratings, reviews, ...):
+# time-ordered UUIDv7 instead of random UUIDv4, see api/ids.py.
+TIME_ORDERED_IDS = config('TIME_ORDERED_IDS', default=False, cast=bool)
+
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -196,4 +313,20 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'api.tasks.cleanup_old_stripe_events',
         'schedule': crontab(day_of_week=0, hour=3, minute=0),  # Weekly on Sunday 3 AM
     },
+    'update-trending-rankings': {
+        'task': 'api.tasks.update_trending_rankings',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+    'fold-view-counters': {
+        'task': 'api.tasks.fold_view_counters',
+        'schedule': crontab(minute='*'),  # Every minute
+    },
+    'ensure-watch-history-partitions': {
+        'task': 'api.tasks.ensure_watch_history_partitions',
+        'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM
+    },
+    'expire-downloads': {
+        'task': 'api.tasks.expire_downloads',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
 }
\ No newline at end of file
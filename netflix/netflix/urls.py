@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include 
 from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from api.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +29,9 @@ urlpatterns = [
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     
+    # Prometheus scrape endpoint (QUERY_INSTRUMENTATION_ENABLED)
+    path('metrics', metrics_view, name='metrics'),
+
     path('', TemplateView.as_view(template_name='index.html'), name='home'),
     path('subscribe/', TemplateView.as_view(template_name='subscribe.html'), name='subscribe'),
 ]